@@ -0,0 +1,278 @@
+import gzip
+import os
+import re
+import time
+from email.utils import formatdate
+from typing import Any, Mapping, Optional, Set, Tuple
+
+import anyio
+from fastapi.responses import ORJSONResponse
+from starlette.background import BackgroundTask
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from ..core import metrics
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is accepted by every client we serve
+    brotli = None
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Compressed representations get their own strong ETag: the plain one plus "-gzip"/"-br"
+CODING_SUFFIX_RE = re.compile(r'-(?:gzip|br)"$')
+
+
+def make_etag(stat_result: os.stat_result) -> str:
+    """Strong ETag for an immutable finished download."""
+    return f'"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak If-None-Match comparison that treats every content-coding of `etag` as the same."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    plain = CODING_SUFFIX_RE.sub('"', etag)
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if CODING_SUFFIX_RE.sub('"', tag) == plain:
+            return True
+    return False
+
+
+def accepted_codings(accept_encoding: Optional[str]) -> Set[str]:
+    """Content-codings the client accepts (q > 0) from an Accept-Encoding header."""
+    codings = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            codings.add(name)
+    return codings
+
+
+def cache_headers(etag: Optional[str], expires_at: Optional[float]) -> dict:
+    """ETag and Cache-Control for a response built from a cached entry; no-store without one."""
+    if etag is None:
+        return {"cache-control": "no-store", "vary": "Accept-Encoding"}
+    # Private: entries are per cookie set, so shared caches must not reuse them
+    max_age = max(int(expires_at - time.time()), 0) if expires_at is not None else 0
+    return {"etag": etag, "cache-control": f"private, max-age={max_age}", "vary": "Accept-Encoding"}
+
+
+class CachedJSONResponse(ORJSONResponse):
+    """orjson body with a strong ETag, 304 on a matching If-None-Match, and gzip/br when large.
+
+    Compression happens here rather than in a middleware so that downloads and
+    other streamed bodies are never touched, and so each encoding gets its own
+    ETag.
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        request_headers: Optional[Mapping[str, str]] = None,
+        etag: Optional[str] = None,
+        expires_at: Optional[float] = None,
+        compress_min_size: int = 1024,
+    ) -> None:
+        super().__init__(content, headers=cache_headers(etag, expires_at))
+        request_headers = request_headers or {}
+        if etag is not None and etag_matches(request_headers.get("if-none-match"), etag):
+            self.status_code = 304
+            self.body = b""
+            del self.headers["content-length"]
+            del self.headers["content-type"]
+            return
+
+        if not compress_min_size or len(self.body) < compress_min_size:
+            return
+        codings = accepted_codings(request_headers.get("accept-encoding"))
+        if brotli is not None and "br" in codings:
+            coding, self.body = "br", brotli.compress(self.body, quality=4)
+        elif "gzip" in codings:
+            # mtime=0 keeps the bytes identical for the same content, as a strong ETag promises
+            coding, self.body = "gzip", gzip.compress(self.body, compresslevel=6, mtime=0)
+        else:
+            return
+        self.headers["content-encoding"] = coding
+        self.headers["content-length"] = str(len(self.body))
+        if etag is not None:
+            self.headers["etag"] = f'{etag[:-1]}-{coding}"'
+
+    @classmethod
+    def not_modified(cls, etag: str, expires_at: Optional[float] = None) -> Response:
+        return Response(status_code=304, headers=cache_headers(etag, expires_at))
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single-range `Range` header into an inclusive (start, end) pair.
+
+    Returns None when the header is absent or uses a form we don't serve
+    (e.g. multiple ranges), in which case the full file is sent. Raises
+    ValueError when the range cannot be satisfied.
+    """
+    if not range_header:
+        return None
+    match = RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(f"Range {range_header} not satisfiable for size {size}")
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(FileResponse):
+    """FileResponse with Range/206, conditional ETag and configurable chunk size.
+
+    Uses the ASGI `http.response.zerocopy` / `http.response.pathsend`
+    extensions when the server offers them so the body is sent with
+    sendfile(2), and falls back to large threaded reads otherwise.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        request_headers: Optional[Mapping[str, str]] = None,
+        method: str = "GET",
+        chunk_size: int = 1024 * 1024,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+        filename: Optional[str] = None,
+    ) -> None:
+        stat_result = os.stat(path)
+        super().__init__(
+            path,
+            headers=headers,
+            media_type=media_type,
+            background=background,
+            filename=filename,
+        )
+        self.chunk_size = chunk_size
+        self.stat_result = stat_result
+        self.size = stat_result.st_size
+        self.etag = make_etag(stat_result)
+        self.start, self.end = 0, self.size - 1
+        self.bytes_sent = 0
+
+        request_headers = request_headers or {}
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["etag"] = self.etag
+        self.headers["last-modified"] = formatdate(stat_result.st_mtime, usegmt=True)
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and self.etag in [t.strip() for t in if_none_match.split(",")]:
+            self.status_code = 304
+            self.start, self.end = 0, -1
+            self.headers["content-length"] = "0"
+            return
+
+        # Range is only defined for GET; an If-Range mismatch means the client's copy is stale
+        byte_range = None
+        if method.upper() in ("GET", "HEAD"):
+            if_range = request_headers.get("if-range")
+            if not if_range or if_range.strip() == self.etag:
+                try:
+                    byte_range = parse_range(request_headers.get("range"), self.size)
+                except ValueError:
+                    self.status_code = 416
+                    self.start, self.end = 0, -1
+                    self.headers["content-range"] = f"bytes */{self.size}"
+                    self.headers["content-length"] = "0"
+                    return
+
+        if byte_range is not None:
+            self.start, self.end = byte_range
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {self.start}-{self.end}/{self.size}"
+        self.headers["content-length"] = str(self.end - self.start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        started = time.monotonic()
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            })
+            await self._send_body(scope, send)
+        finally:
+            metrics.PHASE_SECONDS.observe(time.monotonic() - started, platform=None, phase="stream")
+            metrics.SERVED_BYTES.inc(self.bytes_sent, kind="file")
+            # Runs even when the client disconnects mid-transfer so leases are released
+            if self.background is not None:
+                await self.background()
+
+    async def _send_body(self, scope: Scope, send: Send) -> None:
+        count = self.end - self.start + 1
+        extensions = scope.get("extensions") or {}
+        if scope["method"].upper() == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopy" in extensions:
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": f.fileno(),
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+            self.bytes_sent += count
+            return
+
+        if "http.response.pathsend" in extensions and self.status_code == 200:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+            self.bytes_sent += count
+            return
+
+        fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+        try:
+            offset = self.start
+            remaining = count
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(
+                    os.pread, fd, min(self.chunk_size, remaining), offset
+                )
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+                self.bytes_sent += len(chunk)
+            if remaining > 0:
+                # File shrank underneath us; end the body rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            os.close(fd)
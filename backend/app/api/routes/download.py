@@ -1,17 +1,42 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks, Header, Request
-from fastapi.responses import StreamingResponse
-from typing import Optional, Dict, Any
+from fastapi.responses import RedirectResponse, StreamingResponse
+from typing import Optional, Dict, Any, List, Tuple
 from ...services.download import DownloadService
+from ...services.streaming import ProgressiveUnavailable
+from ...services.artifacts import Artifact
+from ...services.batch import stream_batch
+from ...services.jobs import TERMINAL_STATES, JobManager, JobState, create_job_store
+from ...services.scheduler import QueueFull
+from ...services.failures import CircuitOpen
+from ...core.config import get_settings
+from ...core import metrics
+from ...core.signing import UrlSigner
+from ..responses import CachedJSONResponse, RangeFileResponse, etag_matches
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
 import logging
 from enum import Enum
 import traceback
 from urllib.parse import quote
+import uuid
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-download_service = DownloadService()
+settings = get_settings()
+download_service = DownloadService(temp_dir=settings.TEMP_DIR, download_dir=settings.DOWNLOAD_DIR)
+job_manager = JobManager(
+    download_service,
+    create_job_store(settings.JOB_STORE, settings.JOB_DB_PATH),
+    result_ttl=settings.JOB_RESULT_TTL,
+    progress_interval=settings.JOB_PROGRESS_INTERVAL,
+)
+url_signer = UrlSigner.from_settings(settings)
+
+# "http"/"https" only; yt-dlp's DASH protocol names start with "http" too
+PROGRESSIVE_PROTOCOLS = "[protocol^=http][protocol!*=dash]"
+
+EXPOSED_FILE_HEADERS = "Content-Disposition, Content-Type, Content-Length, Content-Range, Accept-Ranges, ETag, Content-Location"
 
 
 class Format(str, Enum):
@@ -36,42 +61,196 @@ class Platform(str, Enum):
     REDDIT = "reddit"
 
 
+class Delivery(str, Enum):
+    PROXY = "proxy"        # bytes stream through the backend
+    DIRECT = "direct"      # JSON with the media URL for the client to fetch itself
+    REDIRECT = "redirect"  # 303 to the media URL
+    LINK = "link"          # JSON with a URL to GET: the media URL, or a signed one for our own download
+
+
 class DownloadRequest(BaseModel):
     url: str
     platform: Platform
     format: Format
     quality: Quality
     authInfo: Optional[Dict[str, Any]] = Field(default=None, description="Authentication information from the browser")
+    progressive: bool = Field(default=False, description="Stream bytes while downloading (single-file formats only)")
+    transcode: bool = Field(default=False, description="Re-encode when the source codecs can't be copied into the container")
+    delivery: Delivery = Field(default=Delivery.PROXY, description="Hand over the media URL instead of proxying when the format allows it")
+    start: Optional[float] = Field(default=None, ge=0, description="Clip start in seconds; only the clip is downloaded")
+    end: Optional[float] = Field(default=None, gt=0, description="Clip end in seconds")
+
+
+class BatchRequest(BaseModel):
+    urls: List[str] = Field(default_factory=list, description="Videos to download")
+    playlist_url: Optional[str] = Field(default=None, description="Playlist whose entries are downloaded")
+    platform: Platform
+    format: Format
+    quality: Quality
+    authInfo: Optional[Dict[str, Any]] = Field(default=None, description="Authentication information from the browser")
+    concurrency: Optional[int] = Field(default=None, ge=1, description="Items downloaded at once, capped by BATCH_MAX_CONCURRENCY")
+    transcode: bool = Field(default=False, description="Re-encode when the source codecs can't be copied into the container")
+
+
+class PrefetchRequest(BaseModel):
+    url: str
+    platform: Platform
+    authInfo: Optional[Dict[str, Any]] = Field(default=None, description="Authentication information from the browser")
 
 
 def get_format_string(format: Format, quality: Quality) -> Optional[str]:
+    """Format string preferring codecs that stream-copy into the output container (see get_container)."""
     if format == Format.AUDIO:
-        return "bestaudio[ext=mp4]/bestaudio[ext=mp4]/bestaudio"
-
-    quality_map = {
-        Quality.HIGHEST: "bestvideo[ext=mp4]+bestaudio[ext=mp4]/best[ext=mp4]/best",
-        Quality.HD1080: "bestvideo[height<=1080][ext=mp4]+bestaudio[ext=mp4]/best[height<=1080][ext=mp4]/best",
-        Quality.HD720: "bestvideo[height<=720][ext=mp4]+bestaudio[ext=mp4]/best[height<=720][ext=mp4]/best",
-        Quality.SD480: "bestvideo[height<=480][ext=mp4]+bestaudio[ext=mp4]/best[height<=480][ext=mp4]/best",
-        Quality.SD360: "bestvideo[height<=360][ext=mp4]+bestaudio[ext=mp4]/best[height<=360][ext=mp4]/best",
+        return "bestaudio[acodec^=mp4a]/bestaudio[ext=m4a]/bestaudio"
+
+    height_filter = {
+        Quality.HIGHEST: "",
+        Quality.HD1080: "[height<=1080]",
+        Quality.HD720: "[height<=720]",
+        Quality.SD480: "[height<=480]",
+        Quality.SD360: "[height<=360]",
+    }.get(quality)
+    if height_filter is None:
+        return None
+    # H.264 + AAC merge into mp4 with a plain copy; other mp4 codecs remux; anything else is a last resort
+    return (
+        f"bestvideo{height_filter}[vcodec^=avc1]+bestaudio[acodec^=mp4a]"
+        f"/best{height_filter}[vcodec^=avc1][acodec^=mp4a]"
+        f"/bestvideo{height_filter}[ext=mp4]+bestaudio[ext=m4a]"
+        f"/best{height_filter}[ext=mp4]"
+        f"/best{height_filter}" + ("/best" if height_filter else "")
+    )
+
+
+def get_container(format: Format) -> str:
+    return "m4a" if format == Format.AUDIO else "mp4"
+
+
+def get_clip(request: DownloadRequest) -> Optional[Tuple[float, Optional[float]]]:
+    """The (start, end) section to download, or None for the whole video; end None runs to the end."""
+    if request.start is None and request.end is None:
+        return None
+    start = request.start or 0.0
+    if request.end is not None and request.end <= start:
+        raise HTTPException(status_code=400, detail="Clip end must be after its start")
+    return start, request.end
+
+
+def get_progressive_format_string(format: Format, quality: Quality) -> str:
+    """Format string restricted to single plain HTTP(S) files that need no merge step.
+
+    HLS is excluded along with DASH: its segments only become a file after a
+    fixup, so the bytes couldn't be streamed as they arrive. DASH audio served
+    over plain HTTPS (YouTube's m4a_dash) is left out for the same reason.
+    """
+    if format == Format.AUDIO:
+        audio = f"{PROGRESSIVE_PROTOCOLS}[container!*=dash]"
+        return f"bestaudio[ext=m4a]{audio}/bestaudio{audio}"
+
+    height_filter = {
+        Quality.HIGHEST: "",
+        Quality.HD1080: "[height<=?1080]",
+        Quality.HD720: "[height<=?720]",
+        Quality.SD480: "[height<=?480]",
+        Quality.SD360: "[height<=?360]",
+    }.get(quality, "")
+    return (
+        f"best{height_filter}[ext=mp4]{PROGRESSIVE_PROTOCOLS}"
+        f"/best{height_filter}{PROGRESSIVE_PROTOCOLS}"
+        f"/best{PROGRESSIVE_PROTOCOLS}"
+    )
+
+
+def circuit_open_error(e: CircuitOpen) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail={"error": str(e)},
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def queue_full_error(e: QueueFull) -> HTTPException:
+    logger.warning(f"Rejecting request: {e}")
+    return HTTPException(
+        status_code=429,
+        detail={"error": str(e)},
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def signed_url(req: Request, route: str, key: str, **path_params: str) -> str:
+    """Expiring URL for `route` that needs no other credentials.
+
+    The route name is signed along with `key`, so a link for one route can't be replayed on another.
+    """
+    expires, sig = url_signer.sign(f"{route}:{key}")
+    return str(req.url_for(route, **path_params).include_query_params(expires=expires, sig=sig))
+
+
+def signed_job_url(req: Request, route: str, job_id: str) -> str:
+    return signed_url(req, route, job_id, job_id=job_id)
+
+
+def check_signature(route: str, key: str, expires: int, sig: str) -> None:
+    if not url_signer.verify(f"{route}:{key}", expires, sig):
+        raise HTTPException(status_code=403, detail="Link is invalid or has expired")
+
+
+def artifact_response(artifact: Artifact, req: Request) -> RangeFileResponse:
+    """Serve a finished download with Range/ETag support, holding a lease until it is sent."""
+    download_service.artifacts.acquire(artifact.id)
+    headers = {
+        "Content-Location": signed_url(req, "get_download_file", artifact.id, file_id=artifact.id),
+        "Access-Control-Expose-Headers": EXPOSED_FILE_HEADERS,
     }
-    return quality_map.get(quality)
+    try:
+        response = RangeFileResponse(
+            artifact.path,
+            request_headers=req.headers,
+            method=req.method,
+            chunk_size=settings.FILE_CHUNK_SIZE,
+            headers=headers,
+            media_type=artifact.content_type,
+            filename=artifact.filename,
+            background=BackgroundTask(download_service.artifacts.release, artifact),
+        )
+    except Exception:
+        download_service.artifacts.release(artifact)
+        raise
+    logger.info(f"Serving file {artifact.filename} with status {response.status_code}")
+    return response
+
 
+def info_etag(request: DownloadRequest, cookie: Optional[str]) -> Tuple[Optional[str], Optional[float]]:
+    """Strong ETag and expiry of the cached extraction behind this /info request, if any."""
+    validator = download_service.info_validator(request.url, platform=request.platform, cookies=cookie)
+    if validator is None:
+        return None, None
+    digest, expires_at = validator
+    return f'"{digest}"', expires_at
 
-@router.post("/info")
+
+@router.post("/info", response_class=CachedJSONResponse)
 async def get_video_info(
     request: DownloadRequest,
     req: Request,
     cookie: Optional[str] = Header(None)
 ):
     try:
-        logger.info(f"Received info request for URL: {request.url}")
-        logger.info(f"Request headers: {dict(req.headers)}")
-        logger.info(f"Platform: {request.platform}, Format: {request.format}, Quality: {request.quality}")
+        logger.info(
+            f"Received info request for URL: {request.url}",
+            extra={"platform": request.platform, "format": request.format, "quality": request.quality},
+        )
         
-        # Log if we received browser auth info
+        # Log which browser auth fields we received, never their values
         if request.authInfo:
-            logger.info(f"Received authentication info from browser: {request.authInfo}")
+            logger.debug(f"Received authentication info from browser: {sorted(request.authInfo.keys())}")
+        
+        # A reopened popup revalidates its copy against the cached extraction
+        etag, expires_at = info_etag(request, cookie)
+        if etag is not None and etag_matches(req.headers.get("if-none-match"), etag):
+            logger.info(f"Info for URL not modified: {request.url}")
+            return CachedJSONResponse.not_modified(etag, expires_at)
         
         info = await download_service.get_video_info(
             request.url,
@@ -80,7 +259,20 @@ async def get_video_info(
             auth_info=request.authInfo
         )
         logger.info(f"Successfully retrieved info for URL: {request.url}")
-        return info
+        # get_video_info returns without yielding once it has read or filled the
+        # cache entry, so this is the validator of the entry the summary came from
+        etag, expires_at = info_etag(request, cookie)
+        return CachedJSONResponse(
+            info,
+            request_headers=req.headers,
+            etag=etag,
+            expires_at=expires_at,
+            compress_min_size=settings.RESPONSE_COMPRESS_MIN_SIZE,
+        )
+    except QueueFull as e:
+        raise queue_full_error(e)
+    except CircuitOpen as e:
+        raise circuit_open_error(e)
     except Exception as e:
         logger.error(f"Error getting video info: {str(e)}")
         logger.error(f"Traceback: {traceback.format_exc()}")
@@ -99,6 +291,23 @@ async def get_video_info(
         )
 
 
+@router.post("/prefetch", status_code=202)
+async def prefetch_video_info(
+    request: PrefetchRequest,
+    req: Request,
+    cookie: Optional[str] = Header(None),
+    x_ufd_client: Optional[str] = Header(None),
+):
+    """Fire-and-forget: extract a page's info in the background so a following /info or /start is instant."""
+    # The extension sends a per-install id; the address is a fallback shared by everyone behind a NAT
+    client = x_ufd_client or (req.client.host if req.client else "anonymous")
+    status = download_service.prefetch_info(
+        request.url, platform=request.platform, cookies=cookie, auth_info=request.authInfo, client=client
+    )
+    logger.info(f"Prefetch for {request.platform} URL: {status}")
+    return {"status": status}
+
+
 @router.post("/start")
 async def start_download(
     request: DownloadRequest,
@@ -107,65 +316,109 @@ async def start_download(
     cookie: Optional[str] = Header(None)
 ):
     try:
-        logger.info(f"Starting download for URL: {request.url}")
-        logger.info(f"Request headers: {dict(req.headers)}")
-        logger.info(f"Platform: {request.platform}, Format: {request.format}, Quality: {request.quality}")
+        logger.info(
+            f"Starting download for URL: {request.url}",
+            extra={"platform": request.platform, "format": request.format, "quality": request.quality},
+        )
         
-        # Log if we received browser auth info
+        # Log which browser auth fields we received, never their values
         if request.authInfo:
-            logger.info(f"Received authentication info from browser: {request.authInfo}")
+            logger.debug(f"Received authentication info from browser: {sorted(request.authInfo.keys())}")
         
         format_string = get_format_string(request.format, request.quality)
         if not format_string:
             raise HTTPException(status_code=400, detail="Invalid format or quality combination")
         
+        container = get_container(request.format)
+        clip = get_clip(request)
+        # Media URLs and progressive streams carry the whole video, so clips are always cut here
+        if request.delivery != Delivery.PROXY and not request.transcode and clip is None:
+            direct = await download_service.resolve_direct_url(
+                request.url,
+                get_progressive_format_string(request.format, request.quality),
+                platform=request.platform,
+                cookies=cookie,
+                auth_info=request.authInfo,
+            )
+            if direct is not None:
+                metrics.DELIVERIES.inc(platform=request.platform, mode=request.delivery)
+                logger.info(f"Handing {request.platform} media URL to the client ({request.delivery.value})")
+                if request.delivery == Delivery.REDIRECT:
+                    # 303 so the client follows with a GET rather than re-POSTing this body
+                    return RedirectResponse(direct["url"], status_code=303)
+                return {"mode": Delivery.DIRECT.value, **direct}
+        
+        if request.delivery == Delivery.LINK:
+            # Download in the background and hand out a GET the browser's download
+            # manager can stream to disk (and resume) instead of holding this POST open
+            job = job_manager.submit(
+                request.url,
+                format_string,
+                platform=request.platform,
+                cookies=cookie,
+                auth_info=request.authInfo,
+                container=container,
+                transcode=request.transcode,
+                clip=clip,
+            )
+            metrics.DELIVERIES.inc(platform=request.platform, mode=Delivery.LINK)
+            return {
+                "mode": Delivery.LINK.value,
+                "url": signed_job_url(req, "get_signed_job_file", job.id),
+                "status_url": signed_job_url(req, "get_job", job.id),
+            }
+        
+        # A finished file in the media cache beats streaming a fresh download
+        if request.progressive and clip is None and not download_service.has_cached_media(
+            request.url, format_string, platform=request.platform, cookies=cookie,
+            container=container, transcode=request.transcode,
+        ):
+            try:
+                result = await download_service.start_progressive_download(
+                    request.url,
+                    get_progressive_format_string(request.format, request.quality),
+                    platform=request.platform,
+                    cookies=cookie,
+                    auth_info=request.authInfo
+                )
+            except ProgressiveUnavailable as e:
+                logger.info(f"Progressive streaming unavailable, falling back to full download: {e}")
+            else:
+                metrics.DELIVERIES.inc(platform=request.platform, mode=Delivery.PROXY)
+                background_tasks.add_task(download_service.finish_progressive_download, result)
+                headers = {
+                    "Content-Disposition": f'attachment; filename="{result["filename"]}"',
+                    "Content-Type": result["content_type"],
+                    "Access-Control-Expose-Headers": "Content-Disposition, Content-Type"
+                }
+                logger.info(f"Progressively streaming response with headers: {headers}")
+                return StreamingResponse(
+                    metrics.count_stream(result["stream"], "progressive", request.platform),
+                    headers=headers,
+                    media_type=result["content_type"]
+                )
+        
         logger.info(f"Using format string: {format_string}")
-        result = await download_service.download_video(
+        # Identical concurrent requests share one download; the artifact is kept
+        # around after this response so it can be resumed with Range requests
+        artifact = await download_service.download_shared(
             request.url,
             format_string,
             platform=request.platform,
             cookies=cookie,
-            auth_info=request.authInfo
-        )
-        logger.info(f"Download completed: {result['filename']}")
-        
-        async def cleanup_file():
-            try:
-                import os
-                os.unlink(result["file_path"])
-                logger.info(f"Cleaned up file: {result['file_path']}")
-            except Exception as e:
-                logger.error(f"Error cleaning up file: {str(e)}")
-                logger.error(f"Traceback: {traceback.format_exc()}")
-        
-        def iterfile():
-            try:
-                with open(result["file_path"], "rb") as f:
-                    while chunk := f.read(8192):
-                        yield chunk
-            except Exception as e:
-                logger.error(f"Error streaming file: {str(e)}")
-                logger.error(f"Traceback: {traceback.format_exc()}")
-                raise
-        
-        background_tasks.add_task(cleanup_file)
-
-        # Always use mp4 content type
-        content_type = "video/mp4"
-
-        headers = {
-            "Content-Disposition": f'attachment; filename="{result["filename"]}"',
-            "Content-Type": content_type,
-            "Access-Control-Expose-Headers": "Content-Disposition, Content-Type"
-        }
-        
-        logger.info(f"Streaming response with headers: {headers}")
-        return StreamingResponse(
-            iterfile(),
-            headers=headers,
-            media_type=content_type
+            auth_info=request.authInfo,
+            container=container,
+            transcode=request.transcode,
+            clip=clip,
         )
+        logger.info(f"Download completed: {artifact.filename}")
+        metrics.DELIVERIES.inc(platform=request.platform, mode=Delivery.PROXY)
+        return artifact_response(artifact, req)
         
+    except QueueFull as e:
+        raise queue_full_error(e)
+    except CircuitOpen as e:
+        raise circuit_open_error(e)
     except Exception as e:
         logger.error(f"Error starting download: {str(e)}")
         logger.error(f"Traceback: {traceback.format_exc()}")
@@ -182,3 +435,169 @@ async def start_download(
                 "traceback": traceback.format_exc() if not str(e).startswith("HTTP Error") else None
             }
         )
+
+
+@router.post("/batch")
+async def start_batch_download(
+    request: BatchRequest,
+    cookie: Optional[str] = Header(None)
+):
+    """Download several videos (or a playlist) and stream them back as one ZIP archive."""
+    format_string = get_format_string(request.format, request.quality)
+    if not format_string:
+        raise HTTPException(status_code=400, detail="Invalid format or quality combination")
+    if not request.urls and not request.playlist_url:
+        raise HTTPException(status_code=400, detail="Provide urls or a playlist_url")
+
+    try:
+        download_service.scheduler.downloads.check_capacity()
+        items = [{"url": url, "title": None} for url in request.urls]
+        if request.playlist_url:
+            items += await download_service.list_playlist(
+                request.playlist_url,
+                settings.BATCH_MAX_ITEMS,
+                platform=request.platform,
+                cookies=cookie,
+                auth_info=request.authInfo
+            )
+    except QueueFull as e:
+        raise queue_full_error(e)
+    except CircuitOpen as e:
+        raise circuit_open_error(e)
+    except Exception as e:
+        logger.error(f"Error listing playlist: {str(e)}")
+        raise HTTPException(status_code=400, detail={"error": str(e)})
+
+    if not items:
+        raise HTTPException(status_code=400, detail="Playlist has no downloadable entries")
+    if len(items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batches are limited to {settings.BATCH_MAX_ITEMS} items")
+
+    concurrency = min(request.concurrency or settings.BATCH_MAX_CONCURRENCY, settings.BATCH_MAX_CONCURRENCY)
+    logger.info(f"Starting batch of {len(items)} items with concurrency {concurrency}")
+    filename = f"batch_{uuid.uuid4().hex[:8]}.zip"
+    batch = stream_batch(
+        download_service,
+        items,
+        format_string,
+        platform=request.platform,
+        cookies=cookie,
+        auth_info=request.authInfo,
+        concurrency=concurrency,
+        chunk_size=settings.FILE_CHUNK_SIZE,
+        container=get_container(request.format),
+        transcode=request.transcode,
+    )
+    return StreamingResponse(
+        metrics.count_stream(batch, "batch", request.platform),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Access-Control-Expose-Headers": "Content-Disposition, Content-Type",
+        },
+    )
+
+
+@router.api_route("/files/{file_id}", methods=["GET", "HEAD"])
+async def get_download_file(file_id: str, req: Request, expires: int, sig: str):
+    """Fetch (or resume) a finished download while it is still retained, with the signed Content-Location URL."""
+    check_signature("get_download_file", file_id, expires, sig)
+    artifact = download_service.artifacts.get(file_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="File not found or expired")
+    return artifact_response(artifact, req)
+
+
+@router.api_route("/signed/jobs/{job_id}", methods=["GET", "HEAD"])
+async def get_signed_job_file(job_id: str, req: Request, expires: int, sig: str):
+    """A job's file behind an expiring signature; 503 with Retry-After while the job is still running."""
+    check_signature("get_signed_job_file", job_id, expires, sig)
+    job = job_manager.get(job_id)
+    if job is not None and job.state not in TERMINAL_STATES:
+        # Answer at once rather than holding a bodiless GET open; clients poll status_url
+        raise HTTPException(
+            status_code=503,
+            detail={"error": f"Job is {job.state.value}", "state": job.state.value},
+            headers={"Retry-After": str(settings.SIGNED_URL_RETRY_AFTER)},
+        )
+    return job_file_response(job_id, req)
+
+
+def job_response(job, req: Request) -> Dict[str, Any]:
+    """A job's state with signed links; the job id alone grants no access to it."""
+    data = job.to_dict()
+    data.pop("artifact_id", None)
+    data["status_url"] = signed_job_url(req, "get_job", job.id)
+    data["cancel_url"] = signed_job_url(req, "cancel_job", job.id)
+    if job.state == JobState.COMPLETED:
+        data["file_url"] = signed_job_url(req, "get_job_file", job.id)
+    if job.state in (JobState.QUEUED, JobState.RUNNING, JobState.COMPLETED):
+        data["download_url"] = signed_job_url(req, "get_signed_job_file", job.id)
+    return data
+
+
+def job_file_response(job_id: str, req: Request) -> RangeFileResponse:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.state != JobState.COMPLETED:
+        raise HTTPException(status_code=409, detail={"error": f"Job is {job.state.value}", "state": job.state.value})
+
+    artifact = download_service.artifacts.get(job.artifact_id) if job.artifact_id else None
+    if artifact is None:
+        raise HTTPException(status_code=410, detail="Job result has expired")
+    return artifact_response(artifact, req)
+
+
+@router.post("/jobs", status_code=202)
+async def create_job(
+    request: DownloadRequest,
+    req: Request,
+    cookie: Optional[str] = Header(None)
+):
+    """Queue a download and return immediately with a job id to poll."""
+    format_string = get_format_string(request.format, request.quality)
+    if not format_string:
+        raise HTTPException(status_code=400, detail="Invalid format or quality combination")
+
+    try:
+        job = job_manager.submit(
+            request.url,
+            format_string,
+            platform=request.platform,
+            cookies=cookie,
+            auth_info=request.authInfo,
+            container=get_container(request.format),
+            transcode=request.transcode,
+            clip=get_clip(request),
+        )
+    except QueueFull as e:
+        raise queue_full_error(e)
+    return job_response(job, req)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, req: Request, expires: int, sig: str):
+    """A job's progress, with the signed `status_url` from the job."""
+    check_signature("get_job", job_id, expires, sig)
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job, req)
+
+
+@router.api_route("/jobs/{job_id}/file", methods=["GET", "HEAD"])
+async def get_job_file(job_id: str, req: Request, expires: int, sig: str):
+    """A finished job's file; the signed `file_url` from the job status, which doesn't wait."""
+    check_signature("get_job_file", job_id, expires, sig)
+    return job_file_response(job_id, req)
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str, req: Request, expires: int, sig: str):
+    """Cancel a job, with the signed `cancel_url` from the job."""
+    check_signature("cancel_job", job_id, expires, sig)
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job_manager.get(job_id) or job, req)
@@ -1,7 +1,5 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-import os
-from pathlib import Path
 
 class Settings(BaseSettings):
     # API Settings
@@ -17,14 +15,151 @@ class Settings(BaseSettings):
     
     # Download Settings
     MAX_CONCURRENT_DOWNLOADS: int = 2
+    MAX_CONCURRENT_EXTRACTIONS: int = 4
+    MAX_QUEUED_DOWNLOADS: int = 20
+    MAX_QUEUED_EXTRACTIONS: int = 50
+    # Per-platform concurrency caps, e.g. "tiktok=1,instagram=1"
+    PLATFORM_CONCURRENCY_LIMITS: str = ""
+    
+    # Execution Settings
+    EXECUTION_MODE: str = "thread"  # "thread" or "process"
+    PROCESS_POOL_SIZE: int = 0  # 0 = MAX_CONCURRENT_DOWNLOADS + MAX_CONCURRENT_EXTRACTIONS
+    PROCESS_MAX_JOBS_PER_WORKER: int = 50
+    PROCESS_MAX_WORKER_MEMORY_MB: int = 512
+    # Import yt-dlp in the background after startup instead of on the first request
+    YTDLP_PRELOAD: bool = True
+    # Compare yt-dlp with the latest PyPI release in the background at startup
+    YTDLP_VERSION_CHECK: bool = True
+    # Connections per download: concurrent HLS/DASH fragments, or byte ranges of a progressive file
+    DOWNLOAD_CONNECTIONS: int = 4
+    # Per-platform overrides, e.g. "tiktok=1,youtube=4"
+    PLATFORM_DOWNLOAD_CONNECTIONS: str = ""
+    # Progressive files smaller than this download over a single connection
+    PARALLEL_MIN_SIZE: int = 8 * 1024 * 1024
+    # Deprecated and ignored since the rate limiter replaced fixed sleeps; kept so existing .env files load
     YDL_SLEEP_INTERVAL: int = 2
     YDL_MAX_SLEEP_INTERVAL: int = 5
     YDL_SLEEP_INTERVAL_REQUESTS: int = 3
     
+    # Rate Limit Settings (token bucket per platform and origin host, AIMD on 429s/bot checks)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_RPS: float = 2.0
+    RATE_LIMIT_BURST: float = 5.0
+    RATE_LIMIT_MIN_RPS: float = 0.05
+    RATE_LIMIT_INCREASE: float = 0.1  # requests/s added back per success
+    RATE_LIMIT_DECREASE: float = 0.5  # rate multiplier on a throttling error
+    # Per-platform ceilings in requests/s, e.g. "instagram=0.5,tiktok=1"
+    PLATFORM_RATE_LIMITS: str = ""
+    
+    # Direct Delivery Settings (hand the browser the media URL instead of proxying bytes)
+    # YouTube stream URLs are bound to the extracting IP and TikTok's need its cookies
+    DIRECT_URL_PLATFORMS: str = "twitter,reddit,facebook,instagram"
+    
+    # Signed URL Settings (expiring GET links the browser's download manager can fetch)
+    # Must be shared by all workers; a random per-process key is used when empty
+    URL_SIGNING_KEY: str = ""
+    SIGNED_URL_TTL: int = 900
+    # Retry-After (seconds) on a signed job URL fetched before the job has finished
+    SIGNED_URL_RETRY_AFTER: int = 5
+    # Deprecated and ignored since signed job URLs stopped waiting for the job; kept so existing .env files load
+    SIGNED_URL_JOB_WAIT: int = 600
+    
+    # Failure Settings (permanent per-URL errors are cached; extractor breakers fail fast)
+    NEGATIVE_CACHE_TTL: int = 120
+    NEGATIVE_CACHE_MAX_ENTRIES: int = 1024
+    # Consecutive extractor errors that open a platform's breaker (0 disables)
+    CIRCUIT_BREAKER_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_COOLDOWN: int = 60
+    
+    # Info Cache Settings
+    INFO_CACHE_TTL: int = 300
+    INFO_CACHE_MAX_ENTRIES: int = 128
+    # Total size of cached entries, measured pickled (live objects take several times more)
+    INFO_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    
+    # Response Settings (/info answers carry an ETag from the info cache and are compressed when large)
+    # JSON bodies at least this size are sent gzip or brotli encoded when the client accepts it (0 disables)
+    RESPONSE_COMPRESS_MIN_SIZE: int = 1024
+    
+    # Prefetch Settings (speculative /info extraction when the extension sees a video page)
+    # Prefetches running or queued at once across all clients (0 disables)
+    PREFETCH_MAX_CONCURRENCY: int = 2
+    
+    # Streaming Settings
+    STREAM_CHUNK_SIZE: int = 64 * 1024
+    STREAM_POLL_INTERVAL: float = 0.05
+    FILE_CHUNK_SIZE: int = 1024 * 1024
+    ARTIFACT_RETENTION_SECONDS: int = 600
+    
+    # Media Cache Settings (finished downloads kept in DOWNLOAD_DIR, 0 disables)
+    MEDIA_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    MEDIA_CACHE_EVICTION: str = "lru"  # "lru" or "lfu"
+    
+    # Batch Settings
+    BATCH_MAX_ITEMS: int = 50
+    BATCH_MAX_CONCURRENCY: int = 3
+    
+    # Job Settings
+    JOB_STORE: str = "memory"  # "memory" or "sqlite"
+    JOB_DB_PATH: str = "jobs.db"
+    JOB_RESULT_TTL: int = 3600
+    JOB_PROGRESS_INTERVAL: float = 0.5
+    
+    # Logging Settings
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"  # "text" or "json"
+    # Write records from a background thread so the event loop never blocks on log I/O
+    LOG_ASYNC: bool = True
+    # Fraction of requests whose INFO logs are kept, by path prefix, e.g. "/api/v1/download/jobs=0.05"
+    LOG_SAMPLE_RATES: str = ""
+    LOG_DEFAULT_SAMPLE_RATE: float = 1.0
+    # Honour the X-Debug-Traffic request header (verbose yt-dlp output and HTTP traffic dump)
+    ALLOW_DEBUG_TRAFFIC: bool = False
+    
     @property
     def cors_origins_list(self) -> list[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
     
+    @property
+    def platform_concurrency_limits(self) -> dict[str, int]:
+        limits = {}
+        for item in self.PLATFORM_CONCURRENCY_LIMITS.split(","):
+            if "=" in item:
+                platform, limit = item.split("=", 1)
+                limits[platform.strip()] = int(limit)
+        return limits
+    
+    @property
+    def platform_download_connections(self) -> dict[str, int]:
+        connections = {}
+        for item in self.PLATFORM_DOWNLOAD_CONNECTIONS.split(","):
+            if "=" in item:
+                platform, count = item.split("=", 1)
+                connections[platform.strip()] = int(count)
+        return connections
+    
+    @property
+    def platform_rate_limits(self) -> dict[str, float]:
+        rates = {}
+        for item in self.PLATFORM_RATE_LIMITS.split(","):
+            if "=" in item:
+                platform, rate = item.split("=", 1)
+                rates[platform.strip()] = float(rate)
+        return rates
+    
+    @property
+    def direct_url_platforms(self) -> set[str]:
+        return {platform.strip() for platform in self.DIRECT_URL_PLATFORMS.split(",") if platform.strip()}
+    
+    @property
+    def log_sample_rates(self) -> dict[str, float]:
+        rates = {}
+        for item in self.LOG_SAMPLE_RATES.split(","):
+            if "=" in item:
+                prefix, rate = item.rsplit("=", 1)
+                rates[prefix.strip()] = float(rate)
+        return rates
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -32,8 +167,3 @@ class Settings(BaseSettings):
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
-
-# Create necessary directories
-settings = get_settings()
-os.makedirs(settings.DOWNLOAD_DIR, exist_ok=True)
-os.makedirs(settings.TEMP_DIR, exist_ok=True) 
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Logging setup for the API process.
+
+Records are handed to a QueueHandler on the calling thread and written to the
+stream by a QueueListener thread, so the event loop never waits on log I/O.
+LOG_FORMAT=json writes one JSON object per line, including any `extra=` fields
+and the id of the request that produced the record.
+
+Per-route sampling decides once per request whether its INFO/DEBUG records
+are kept, so a sampled request logs completely and an unsampled one not at
+all. Warnings and errors are always kept.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Optional, TextIO
+
+# Per-request state, set by the request middleware and inherited by tasks it spawns
+request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+request_sampled: contextvars.ContextVar[bool] = contextvars.ContextVar("request_sampled", default=True)
+# When set, yt-dlp runs with verbose output and dumps its HTTP traffic for this request
+debug_traffic: contextvars.ContextVar[bool] = contextvars.ContextVar("debug_traffic", default=False)
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            data["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class RequestFilter(logging.Filter):
+    """Drop INFO/DEBUG records of unsampled requests and tag the rest with the request id.
+
+    Runs on the thread that logged the record, where the request's context
+    variables are visible.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING and not request_sampled.get():
+            return False
+        record.request_id = request_id.get()
+        return True
+
+
+class RouteSampler:
+    """Sample rates by path prefix; the longest matching prefix wins."""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, default: float = 1.0):
+        self.rates = sorted((rates or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.default = default
+
+    def rate_for(self, path: str) -> float:
+        for prefix, rate in self.rates:
+            if path.startswith(prefix):
+                return rate
+        return self.default
+
+    def sample(self, path: str) -> bool:
+        rate = self.rate_for(path)
+        return rate >= 1 or random.random() < rate
+
+
+sampler = RouteSampler()
+
+
+def configure_logging(
+    level: str = "INFO",
+    fmt: str = "text",
+    use_queue: bool = True,
+    sample_rates: Optional[Dict[str, float]] = None,
+    default_sample_rate: float = 1.0,
+    stream: Optional[TextIO] = None,
+) -> None:
+    """Replace the root handlers. Safe to call again (e.g. from benchmarks)."""
+    global _listener, sampler
+    stop_logging()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.setLevel(level.upper())
+
+    if use_queue:
+        front = logging.handlers.QueueHandler(queue.SimpleQueue())
+        _listener = logging.handlers.QueueListener(front.queue, handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        front = handler
+    front.addFilter(RequestFilter())
+    root.addHandler(front)
+
+    sampler = RouteSampler(sample_rates, default_sample_rate)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+@contextmanager
+def request_context(path: str, debug: bool = False):
+    """Set the request id, sampling decision and debug-traffic flag for one request."""
+    rid = uuid.uuid4().hex[:12]
+    tokens = [
+        (request_id, request_id.set(rid)),
+        # Requests that ask for a traffic dump are always logged
+        (request_sampled, request_sampled.set(debug or sampler.sample(path))),
+        (debug_traffic, debug_traffic.set(debug)),
+    ]
+    try:
+        yield rid
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
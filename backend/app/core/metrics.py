@@ -0,0 +1,238 @@
+"""
+Process-wide metrics rendered in the Prometheus text exposition format.
+
+A small in-house registry rather than prometheus_client: the app runs as a
+single process (yt-dlp worker processes relay their hooks to the parent), so
+plain locked dicts are all that's needed. Values that other components
+already track (queue depth, cache hit counts) are read at scrape time through
+collectors instead of being duplicated here.
+"""
+
+import math
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+LabelValues = Tuple[str, ...]
+# (name, type, help, [(labels, value), ...])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, Any], float]]]
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, math.inf)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(getattr(labels.get(n), "value", labels.get(n)) or "unknown") for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        return lines + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(set(buckets) | {math.inf}))
+        # label values -> [per-bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, state):
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Add a callable that reports gauges/counters owned by another component at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, type_, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {type_}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+PHASE_SECONDS = registry.histogram(
+    "ufd_phase_duration_seconds",
+    "Time spent per download phase (extract, download, postprocess, stream)",
+    ("platform", "phase"),
+)
+POSTPROCESSOR_SECONDS = registry.histogram(
+    "ufd_postprocessor_duration_seconds",
+    "Time spent in each yt-dlp postprocessor (Merger, FFmpegVideoConvertor, ...)",
+    ("platform", "postprocessor"),
+)
+POOL_WAIT_SECONDS = registry.histogram(
+    "ufd_pool_wait_seconds",
+    "Time spent waiting for a worker slot",
+    ("pool", "platform"),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf),
+)
+DOWNLOADED_BYTES = registry.counter(
+    "ufd_downloaded_bytes_total", "Bytes fetched from origins by yt-dlp", ("platform",)
+)
+SERVED_BYTES = registry.counter(
+    "ufd_served_bytes_total", "Bytes sent to clients", ("kind",)
+)
+DELIVERIES = registry.counter(
+    "ufd_deliveries_total", "Downloads by how the bytes reached the client", ("platform", "mode")
+)
+FAILED_FAST = registry.counter(
+    "ufd_failed_fast_total", "yt-dlp calls refused without trying", ("platform", "reason")
+)
+YTDLP_ERRORS = registry.counter(
+    "ufd_ytdlp_errors_total", "yt-dlp DownloadErrors by class", ("platform", "error_class")
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "ufd_http_request_duration_seconds",
+    "Time until response headers, per route",
+    ("method", "route", "status"),
+)
+
+
+class DownloadPhases:
+    """yt-dlp progress/postprocessor hooks that time a download's phases.
+
+    Extraction runs from the start of the call until the first progress event,
+    the download phase until the last "finished" event, and each postprocessor
+    from its "started" to its "finished" hook.
+    """
+
+    def __init__(self, platform: Optional[str] = None):
+        self.platform = platform
+        self.started = time.monotonic()
+        self.download_started: Optional[float] = None
+        self.download_finished: Optional[float] = None
+        self._pp_started: Dict[str, float] = {}
+        self.postprocess_seconds = 0.0
+
+    def progress_hook(self, status: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        if self.download_started is None:
+            self.download_started = now
+            PHASE_SECONDS.observe(now - self.started, platform=self.platform, phase="extract")
+        if status.get("status") == "finished":
+            self.download_finished = now
+            size = status.get("total_bytes") or status.get("downloaded_bytes")
+            if size:
+                DOWNLOADED_BYTES.inc(size, platform=self.platform)
+
+    def postprocessor_hook(self, status: Dict[str, Any]) -> None:
+        name = status.get("postprocessor") or "unknown"
+        if status.get("status") == "started":
+            self._pp_started[name] = time.monotonic()
+        elif status.get("status") == "finished" and name in self._pp_started:
+            elapsed = time.monotonic() - self._pp_started.pop(name)
+            self.postprocess_seconds += elapsed
+            POSTPROCESSOR_SECONDS.observe(elapsed, platform=self.platform, postprocessor=name)
+
+    def finish(self) -> None:
+        if self.download_started is None:
+            # Nothing was downloaded (already on disk); it was all extraction
+            PHASE_SECONDS.observe(time.monotonic() - self.started, platform=self.platform, phase="extract")
+            return
+        if self.download_finished is not None:
+            PHASE_SECONDS.observe(self.download_finished - self.download_started, platform=self.platform, phase="download")
+        if self.postprocess_seconds:
+            PHASE_SECONDS.observe(self.postprocess_seconds, platform=self.platform, phase="postprocess")
+
+
+async def count_stream(stream: AsyncIterator[bytes], kind: str, platform: Optional[str] = None) -> AsyncIterator[bytes]:
+    """Pass a response body through, recording bytes served and the time spent streaming it."""
+    started = time.monotonic()
+    try:
+        async for chunk in stream:
+            SERVED_BYTES.inc(len(chunk), kind=kind)
+            yield chunk
+    finally:
+        PHASE_SECONDS.observe(time.monotonic() - started, platform=platform, phase="stream")
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Artifact:
+    """A finished download that can be fetched (and resumed) until it expires."""
+    id: str
+    path: str
+    filename: str
+    content_type: str
+    expires_at: float
+    refs: int = 0
+    owned: bool = True  # False for files that belong to the media cache
+    title: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+
+class ArtifactStore:
+    """Keeps finished downloads on disk while they are being served.
+
+    Every response that reads an artifact holds a lease on it; the file is
+    deleted only once its retention window has passed and the last lease has
+    been released, so resumed range requests never hit a missing file.
+    """
+
+    def __init__(self, retention: float = 600, on_forget: Optional[Callable[[Artifact], None]] = None):
+        self.retention = retention
+        # Called for files that aren't ours to delete (media cache) once they're no longer served
+        self.on_forget = on_forget
+        self._artifacts: Dict[str, Artifact] = {}
+        self._sweep_handle: Optional[asyncio.TimerHandle] = None
+
+    def register(
+        self, path: str, filename: str, content_type: str, retention: Optional[float] = None, owned: bool = True,
+        title: Optional[str] = None,
+    ) -> Artifact:
+        artifact = Artifact(
+            id=uuid.uuid4().hex,
+            path=path,
+            filename=filename,
+            content_type=content_type,
+            expires_at=time.time() + (self.retention if retention is None else retention),
+            owned=owned,
+            title=title,
+        )
+        self._artifacts[artifact.id] = artifact
+        logger.info(f"Registered artifact {artifact.id} for {path}")
+        self._schedule_sweep()
+        return artifact
+
+    def get(self, artifact_id: str) -> Optional[Artifact]:
+        artifact = self._artifacts.get(artifact_id)
+        if artifact is None or not os.path.exists(artifact.path):
+            return None
+        return artifact
+
+    def acquire(self, artifact_id: str) -> Optional[Artifact]:
+        """Take a lease on an artifact for the duration of one response."""
+        artifact = self.get(artifact_id)
+        if artifact is None:
+            return None
+        artifact.refs += 1
+        return artifact
+
+    def release(self, artifact: Artifact) -> None:
+        artifact.refs = max(artifact.refs - 1, 0)
+        self.sweep()
+
+    def expire(self, artifact_id: Optional[str]) -> None:
+        """Delete an artifact as soon as nobody is reading it."""
+        artifact = self._artifacts.get(artifact_id) if artifact_id else None
+        if artifact is not None:
+            artifact.expires_at = 0
+            self.sweep()
+
+    def sweep(self) -> None:
+        """Delete expired artifacts that nobody is reading."""
+        now = time.time()
+        for artifact_id, artifact in list(self._artifacts.items()):
+            if artifact.refs > 0 or artifact.expires_at > now:
+                continue
+            del self._artifacts[artifact_id]
+            if not artifact.owned:
+                if self.on_forget is not None:
+                    self.on_forget(artifact)
+                continue
+            try:
+                os.unlink(artifact.path)
+                logger.info(f"Cleaned up file: {artifact.path}")
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Error cleaning up file: {str(e)}")
+        self._schedule_sweep()
+
+    def _schedule_sweep(self) -> None:
+        # Leased artifacts are swept again when their last lease is released
+        idle = [a.expires_at for a in self._artifacts.values() if a.refs == 0]
+        if not idle:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._sweep_handle is not None:
+            self._sweep_handle.cancel()
+        next_expiry = min(idle)
+        self._sweep_handle = loop.call_later(max(next_expiry - time.time(), 0) + 1, self.sweep)
@@ -0,0 +1,91 @@
+"""
+Batch downloads streamed back as one ZIP archive.
+
+Items download concurrently through the shared download pool (at bulk
+priority, so interactive requests still go first) and are written to the
+archive in the order they finish. A failed item doesn't stop the batch; it is
+listed in the manifest.json written as the archive's last entry.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .scheduler import PRIORITY_BULK
+from .zipstream import ZipStream
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+
+def entry_name(index: int, title: Optional[str], ext: str = "mp4") -> str:
+    """Archive name for an item; the index prefix keeps names unique and ordered."""
+    safe = re.sub(r'[\\/:*?"<>|\x00-\x1f]+', "_", title or "").strip(" .")[:100]
+    return f"{index:03d} - {safe or 'video'}.{ext}"
+
+
+async def stream_batch(
+    download_service, items: List[Dict[str, Any]], format_id: str, platform: str = None, cookies: str = None,
+    auth_info: Optional[Dict[str, Any]] = None, concurrency: int = 3, chunk_size: int = 1024 * 1024,
+    container: str = "mp4", transcode: bool = False,
+) -> AsyncIterator[bytes]:
+    """Download `items` ({"url", "title"} dicts) and yield a ZIP archive of the results as it is built."""
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def fetch(url: str):
+        async with semaphore:
+            return await download_service.download_shared(
+                url, format_id, platform=platform, cookies=cookies, auth_info=auth_info, priority=PRIORITY_BULK,
+                container=container, transcode=transcode,
+            )
+
+    tasks = {
+        asyncio.create_task(fetch(item["url"])): (index, item)
+        for index, item in enumerate(items, start=1)
+    }
+    archive = ZipStream(chunk_size)
+    manifest = []
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, item = tasks[task]
+                record = {"index": index, "url": item["url"]}
+                artifact = None
+                try:
+                    artifact = download_service.artifacts.acquire(task.result().id)
+                    if artifact is None:
+                        raise Exception("Download finished but its file has already expired")
+                    ext = Path(artifact.filename).suffix.lstrip(".") or container
+                    name = entry_name(index, artifact.title or item.get("title"), ext)
+                    async for chunk in archive.add_file(name, artifact.path):
+                        if chunk:
+                            yield chunk
+                    record.update(status="ok", filename=name, title=artifact.title or item.get("title"))
+                except Exception as e:
+                    logger.warning(f"Batch item {index} failed: {e}")
+                    record.update(status="failed", error=str(e))
+                finally:
+                    if artifact is not None:
+                        download_service.artifacts.release(artifact)
+                manifest.append(record)
+
+        manifest.sort(key=lambda record: record["index"])
+        failed = sum(1 for record in manifest if record["status"] == "failed")
+        logger.info(f"Batch finished: {len(manifest) - failed} succeeded, {failed} failed")
+        yield archive.add_bytes(MANIFEST_NAME, json.dumps({
+            "total": len(manifest),
+            "succeeded": len(manifest) - failed,
+            "failed": failed,
+            "items": manifest,
+        }, indent=2).encode())
+        yield archive.close()
+    finally:
+        # Client went away: leaving download_shared lets it cancel downloads nobody else wants
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,87 @@
+"""
+Browser cookies turned into http.cookiejar cookies, kept in memory.
+
+Like the rest of the yt-dlp side this module has no FastAPI/service imports,
+so worker processes build and cache their own jars.
+"""
+
+import hashlib
+import http.cookiejar
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Platform-specific cookie domains
+PLATFORM_DOMAINS = {
+    'youtube': ['.youtube.com', '.google.com', 'accounts.google.com', 'www.youtube.com', 'youtube.com'],
+    'facebook': ['.facebook.com', '.fb.com', 'www.facebook.com', 'facebook.com', 'm.facebook.com'],
+    'twitter': ['.twitter.com', '.x.com', 'twitter.com', 'www.twitter.com', 'x.com'],
+    'instagram': ['.instagram.com', '.cdninstagram.com', 'www.instagram.com', 'instagram.com'],
+    'tiktok': ['.tiktok.com', '.tiktokcdn.com', 'www.tiktok.com', 'tiktok.com'],
+    'reddit': ['.reddit.com', '.redd.it', 'www.reddit.com', 'reddit.com', 'old.reddit.com']
+}
+
+# Fallback when a platform has no configured domains
+DEFAULT_DOMAINS = ['.youtube.com', '.google.com']
+
+# Browser cookie lifetime we assume; the extension doesn't send expiry dates
+COOKIE_LIFETIME = 31536000
+
+
+def build_cookies(cookies: str, platform: Optional[str] = None) -> List[http.cookiejar.Cookie]:
+    """Scope every `name=value` pair of a Cookie header to the platform's domains."""
+    domains = PLATFORM_DOMAINS.get(platform) or DEFAULT_DOMAINS
+    expiry = int(time.time()) + COOKIE_LIFETIME
+    result = []
+    for pair in cookies.split(';'):
+        name, sep, value = pair.strip().partition('=')
+        name, value = name.strip(), value.strip()
+        if not sep or not name or not value:
+            continue
+        for domain in domains:
+            result.append(http.cookiejar.Cookie(
+                0, name, value, None, False,
+                domain, True, domain.startswith('.'),
+                '/', True,
+                name.startswith('__Secure'), expiry, False, None, None, {},
+            ))
+    return result
+
+
+class CookieJarCache:
+    """Small TTL cache of prepared cookies, keyed by a digest of the cookie set.
+
+    The raw cookie string is never used as a key, and entries expire quickly
+    so credentials don't linger in memory.
+    """
+
+    def __init__(self, max_entries: int = 64, ttl: float = 600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, List[http.cookiejar.Cookie]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cookies: str, platform: Optional[str] = None) -> List[http.cookiejar.Cookie]:
+        key = hashlib.sha256(f"{platform}\0{cookies}".encode()).hexdigest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        prepared = build_cookies(cookies, platform)
+        logger.info(f"Prepared {len(prepared)} cookies in memory for platform: {platform}")
+        with self._lock:
+            self._entries[key] = (now + self.ttl, prepared)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return prepared
+
+
+cookie_cache = CookieJarCache()
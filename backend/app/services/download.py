@@ -1,52 +1,32 @@
-import yt_dlp
 import asyncio
-from typing import Dict, Any, Optional
+import threading
+import time
+import uuid
+from typing import Dict, Any, Optional, List, Callable, Tuple
 import logging
 from pathlib import Path
-import json
 import os
 from datetime import datetime
 import random
-import tempfile
-import subprocess
-import sys
-import pkg_resources
+from urllib.parse import parse_qs, urlparse
+from ..core.config import get_settings
+from ..core import log, metrics
+from .info_cache import InfoCache, make_cache_key
+from .video_info import VideoSummary
+from .postprocessing import output_key, postprocess_opts
+from .failures import PERMANENT_ERROR_CLASSES, CircuitBreakers, CircuitOpen, NegativeCache, extractor_from_error
+from .rate_limit import RateLimiter
+from .streaming import ProgressiveUnavailable, tail_file, wait_for_file
+from .artifacts import Artifact, ArtifactStore
+from .singleflight import SingleFlight
+from .media_cache import MediaCache, MediaEntry, make_media_key
+from .scheduler import Scheduler, WorkPool, PRIORITY_INTERACTIVE, PRIORITY_DOWNLOAD, PRIORITY_BULK, PRIORITY_PREFETCH
+from .prefetch import Prefetcher
+from .process_pool import ProcessRunner
+from . import ydl_worker
 
 logger = logging.getLogger(__name__)
 
-# Check yt-dlp version at startup
-def check_ytdlp_version():
-    try:
-        current_version = pkg_resources.get_distribution("yt-dlp").version
-        logger.info(f"Current yt-dlp version: {current_version}")
-        
-        # Try to get the latest version from PyPI
-        try:
-            import urllib.request
-            import json
-            
-            url = "https://pypi.org/pypi/yt-dlp/json"
-            with urllib.request.urlopen(url, timeout=5) as response:
-                data = json.loads(response.read().decode())
-                latest_version = data["info"]["version"]
-                
-                if current_version != latest_version:
-                    logger.warning(f"yt-dlp version {current_version} is outdated! Latest is {latest_version}")
-                    logger.warning("You may encounter extraction errors with YouTube. Consider updating with: python -m pip install -U yt-dlp")
-                    return False
-                else:
-                    logger.info(f"yt-dlp is up to date (version {current_version})")
-                    return True
-        except Exception as e:
-            logger.warning(f"Could not check for yt-dlp updates: {e}")
-            return None
-    except Exception as e:
-        logger.error(f"Error checking yt-dlp version: {e}")
-        return None
-
-# Run the version check
-is_ytdlp_updated = check_ytdlp_version()
-
 # Mobile user agents have better success rates
 MOBILE_USER_AGENTS = [
     'Mozilla/5.0 (Linux; Android 12; SM-S906N Build/QP1A.190711.020; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/80.0.3987.119 Mobile Safari/537.36',
@@ -55,23 +35,273 @@ MOBILE_USER_AGENTS = [
     'Mozilla/5.0 (iPad; CPU OS 14_7_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1',
 ]
 
-# Platform-specific cookie domains
-PLATFORM_DOMAINS = {
-    'youtube': ['.youtube.com', '.google.com', 'accounts.google.com', 'www.youtube.com', 'youtube.com'],
-    'facebook': ['.facebook.com', '.fb.com', 'www.facebook.com', 'facebook.com', 'm.facebook.com'],
-    'twitter': ['.twitter.com', '.x.com', 'twitter.com', 'www.twitter.com', 'x.com'],
-    'instagram': ['.instagram.com', '.cdninstagram.com', 'www.instagram.com', 'instagram.com'],
-    'tiktok': ['.tiktok.com', '.tiktokcdn.com', 'www.tiktok.com', 'tiktok.com'],
-    'reddit': ['.reddit.com', '.redd.it', 'www.reddit.com', 'reddit.com', 'old.reddit.com']
+# Content types for the containers yt-dlp can hand us without postprocessing
+CONTENT_TYPES = {
+    'mp4': 'video/mp4',
+    'm4a': 'audio/mp4',
+    'webm': 'video/webm',
+    'mp3': 'audio/mpeg',
+    'opus': 'audio/ogg',
+    'ogg': 'audio/ogg',
 }
 
+# Substrings of yt-dlp DownloadError messages, used to label error metrics
+YTDLP_ERROR_CLASSES = [
+    ("Failed to extract any player response", "player_response"),
+    ("Sign in to confirm you're not a bot", "bot_check"),
+    ("Private video", "private"),
+    ("This video is not available", "unavailable"),
+    ("Video unavailable", "unavailable"),
+    ("Unsupported URL", "unsupported_url"),
+    ("Requested format is not available", "format_unavailable"),
+    ("Unable to extract", "extractor"),
+    ("HTTP Error 429", "rate_limited"),
+    ("HTTP Error 403", "forbidden"),
+    ("HTTP Error 404", "not_found"),
+    ("ffmpeg", "ffmpeg"),
+    ("timed out", "timeout"),
+]
+
+
+# Request headers the browser can't be made to send on a plain download
+CREDENTIAL_HEADERS = {"cookie", "authorization"}
+
+
+def direct_url_blocker(selected: Dict[str, Any]) -> Optional[str]:
+    """Why a selected format can't be handed to the browser as a URL, or None if it can."""
+    if selected["needs_merge"] or not selected["url"]:
+        return "format needs merging"
+    if selected["protocol"] not in ("http", "https"):
+        return f"{selected['protocol']} needs a manifest-aware downloader"
+    if selected["cookies"]:
+        return "media URL needs cookies"
+    if CREDENTIAL_HEADERS & {k.lower() for k in selected["http_headers"]}:
+        return "media URL needs credential headers"
+    # Signed URLs bound to the extracting IP (googlevideo's ip=) fail from the user's machine
+    if "ip" in parse_qs(urlparse(selected["url"]).query):
+        return "media URL is bound to the server's IP"
+    return None
+
+
+# ydl_worker calls that make requests to the origin
+RATE_LIMITED_CALLS = ("extract", "list_entries", "download")
+
+
+def classify_ytdlp_error(message: str) -> str:
+    for needle, error_class in YTDLP_ERROR_CLASSES:
+        if needle in message:
+            return error_class
+    return "other"
+
+
 class DownloadService:
     def __init__(self, temp_dir: str = "temp", download_dir: str = "downloads"):
         self.temp_dir = Path(temp_dir)
         self.download_dir = Path(download_dir)
-        self.temp_dir.mkdir(exist_ok=True)
-        self.download_dir.mkdir(exist_ok=True)
-        self.semaphore = asyncio.Semaphore(2)
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.download_dir.mkdir(parents=True, exist_ok=True)
+        settings = get_settings()
+        self.scheduler = Scheduler.from_settings(settings)
+        self.rate_limiter = RateLimiter.from_settings(settings)
+        self.negative_cache = NegativeCache.from_settings(settings)
+        self.breakers = CircuitBreakers.from_settings(settings, resolve_extractor=self._extractor_name)
+        self.info_cache = InfoCache(
+            max_entries=settings.INFO_CACHE_MAX_ENTRIES,
+            ttl=settings.INFO_CACHE_TTL,
+            max_bytes=settings.INFO_CACHE_MAX_BYTES,
+        )
+        self.artifacts = ArtifactStore(
+            retention=settings.ARTIFACT_RETENTION_SECONDS,
+            on_forget=lambda artifact: self.media_cache.unpin(artifact.path),
+        )
+        self.media_cache = MediaCache(
+            str(self.download_dir),
+            max_bytes=settings.MEDIA_CACHE_MAX_BYTES,
+            policy=settings.MEDIA_CACHE_EVICTION,
+        )
+        self.in_flight = SingleFlight()
+        self.prefetcher = Prefetcher.from_settings(settings)
+        # Running progressive downloads, shared by every client tailing the same file
+        self._progressive: Dict[tuple, Dict[str, Any]] = {}
+        self.process_runner = None
+        if settings.EXECUTION_MODE == "process":
+            self.process_runner = ProcessRunner(
+                size=settings.PROCESS_POOL_SIZE or (settings.MAX_CONCURRENT_DOWNLOADS + settings.MAX_CONCURRENT_EXTRACTIONS),
+                max_jobs_per_worker=settings.PROCESS_MAX_JOBS_PER_WORKER,
+                max_worker_memory_mb=settings.PROCESS_MAX_WORKER_MEMORY_MB,
+            )
+
+    async def _extractor_name(self, url: str) -> str:
+        if self.process_runner is not None:
+            # In process mode only the workers load yt-dlp's extractors; don't import them all here too
+            return await self.process_runner.run("extractor_name", url)
+        return await asyncio.to_thread(ydl_worker.extractor_name, url)
+
+    @staticmethod
+    def _unique_basename() -> str:
+        """Temp file name that can't collide with another download started in the same second."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return f"download_{timestamp}_{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def _request_key(
+        url: str, format_id: Optional[str], platform: str = None, cookies: str = None, container: str = "mp4", transcode: bool = False,
+        clip: Optional[Tuple[float, Optional[float]]] = None,
+    ) -> tuple:
+        """Identifies a download request: same video, same session, same format string and output."""
+        return make_cache_key(url, platform, cookies) + (format_id, output_key(container, transcode, clip))
+
+    def _cached_result(self, entry) -> Dict[str, Any]:
+        path = self.media_cache.path_for(entry)
+        ext = path.suffix.lstrip(".")
+        return {
+            "file_path": str(path),
+            "filename": f"{self._unique_basename()}.{ext}",
+            "title": entry.title or "Unknown Title",
+            "content_type": CONTENT_TYPES.get(ext, "application/octet-stream"),
+            "cached": True,
+        }
+
+    def has_cached_media(
+        self, url: str, format_id: Optional[str], platform: str = None, cookies: str = None, container: str = "mp4", transcode: bool = False,
+        clip: Optional[Tuple[float, Optional[float]]] = None,
+    ) -> bool:
+        """Whether an identical earlier request left a file in the media cache."""
+        return self.media_cache.has_alias(self._request_key(url, format_id, platform, cookies, container, transcode, clip))
+
+    async def find_cached_media(
+        self, url: str, format_id: Optional[str], platform: str = None, cookies: str = None, container: str = "mp4", transcode: bool = False,
+        clip: Optional[Tuple[float, Optional[float]]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Look for a finished download of this request in the media cache.
+
+        An identical earlier request is a direct hit that needs no yt-dlp at all.
+        Otherwise, if /info already extracted this URL, running format selection
+        on the cached info is enough to find the same media fetched by someone else.
+        """
+        if not self.media_cache.enabled:
+            return None
+        request_key = self._request_key(url, format_id, platform, cookies, container, transcode, clip)
+        entry = self.media_cache.get_alias(request_key)
+        if entry is None:
+            info = self.info_cache.get(make_cache_key(url, platform, cookies))
+            if info is None:
+                return None
+            opts = self._get_yt_dlp_opts(format_id, platform=platform)
+            try:
+                selected = await self._call_ydl(self.scheduler.extraction, "select_format", opts, info)
+            except Exception as e:
+                logger.warning(f"Format selection for media cache lookup failed: {e}")
+                return None
+            media_key = make_media_key(
+                info.get("extractor_key"), info.get("id"), selected["format_id"], output_key(container, transcode, clip)
+            )
+            entry = self.media_cache.get(media_key)
+            if entry is None:
+                return None
+            self.media_cache.add_alias(request_key, media_key)
+        logger.info(f"Media cache hit for {platform} URL, serving {entry.filename}")
+        return self._cached_result(entry)
+
+    def register_result(self, result: Dict[str, Any], retention: Optional[float] = None) -> Artifact:
+        """Register a download result as an artifact; media cache files are pinned instead of deleted by it."""
+        if result.get("cached") and not result.get("pinned"):
+            self.media_cache.pin(result["file_path"])
+        return self.artifacts.register(
+            result["file_path"], result["filename"], result["content_type"],
+            retention=retention, owned=not result.get("cached"), title=result.get("title"),
+        )
+
+    def _store_in_cache(self, media_key: str, path: str, title: str, request_key: tuple) -> Optional[MediaEntry]:
+        """Move a finished download into the media cache, pinned for the artifact that will serve it."""
+        entry = self.media_cache.put(media_key, path, title, pin=True)
+        if entry is not None:
+            self.media_cache.add_alias(request_key, media_key)
+        return entry
+
+    def _cache_info(self, cache_key, info: Optional[Dict[str, Any]]) -> None:
+        """Store a projected single-video extraction result so /start can skip re-extraction."""
+        if not info:
+            return
+        try:
+            self.info_cache.set(cache_key, info)
+        except Exception as e:
+            logger.warning(f"Failed to cache video info: {e}")
+
+    async def _call_ydl(
+        self, pool: WorkPool, func_name: str, *args, platform: str = None,
+        progress_hooks: Optional[List[Callable]] = None, postprocessor_hooks: Optional[List[Callable]] = None,
+    ) -> Any:
+        """Run a ydl_worker function on the pool's threads, or in a worker process in process mode.
+
+        The caller must already hold a slot in `pool`. Calls that hit the network
+        fail fast on a recent permanent error for the URL or an open circuit
+        breaker, then go through the rate limiter and report back whether the
+        origin throttled them. Extractions and downloads are timed per phase
+        and yt-dlp errors are counted by class.
+        """
+        from yt_dlp.utils import DownloadError
+
+        # select_format works on a cached info dict; the others take (opts, url, ...)
+        url = args[1] if func_name in RATE_LIMITED_CALLS else None
+        probe = None
+        if url is not None:
+            # Keyed like the info cache: a private video may work with another session's cookies
+            failure_key = make_cache_key(url, platform, args[0]["http_headers"].get("Cookie"))
+            cached_error = self.negative_cache.get(failure_key)
+            if cached_error is not None:
+                metrics.FAILED_FAST.inc(platform=platform, reason="negative_cache")
+                logger.info(f"Failing fast on a recent permanent error for {platform} URL")
+                raise DownloadError(cached_error)
+            try:
+                probe = await self.breakers.check(platform, url)
+            except CircuitOpen:
+                metrics.FAILED_FAST.inc(platform=platform, reason="circuit_open")
+                raise
+        try:
+            if url is not None:
+                await self.rate_limiter.acquire(platform, url)
+            phases = None
+            if func_name == "download":
+                phases = metrics.DownloadPhases(platform)
+                progress_hooks = [phases.progress_hook, *(progress_hooks or [])]
+                postprocessor_hooks = [phases.postprocessor_hook, *(postprocessor_hooks or [])]
+            started = time.monotonic()
+            try:
+                if self.process_runner is not None:
+                    result = await self.process_runner.run(
+                        func_name, *args, progress_hooks=progress_hooks, postprocessor_hooks=postprocessor_hooks
+                    )
+                else:
+                    kwargs = {}
+                    if func_name == "download":
+                        kwargs = {"progress_hooks": progress_hooks, "postprocessor_hooks": postprocessor_hooks}
+                    result = await pool.to_thread(getattr(ydl_worker, func_name), *args, **kwargs)
+            except Exception as e:
+                error_class = None
+                if type(e).__name__ == "DownloadError":
+                    error_class = classify_ytdlp_error(str(e))
+                    metrics.YTDLP_ERRORS.inc(platform=platform, error_class=error_class)
+                    if url is not None:
+                        self.rate_limiter.record(platform, url, error_class)
+                        if error_class in PERMANENT_ERROR_CLASSES:
+                            self.negative_cache.set(failure_key, str(e))
+                if url is not None:
+                    # Anything that isn't an extractor error just settles a probe
+                    self.breakers.record(platform, extractor_from_error(str(e)), error_class or "other", probe)
+                raise
+            if url is not None:
+                self.rate_limiter.record(platform, url)
+                self.breakers.record(platform, result.get("extractor") if isinstance(result, dict) else None, probe=probe)
+            if phases is not None:
+                phases.finish()
+                result["postprocess_seconds"] = round(phases.postprocess_seconds, 3)
+            elif func_name in ("extract", "list_entries"):
+                metrics.PHASE_SECONDS.observe(time.monotonic() - started, platform=platform, phase="extract")
+            return result
+        finally:
+            # A cancelled call (client gone) would otherwise hold the half-open probe forever
+            self.breakers.release(probe)
 
     def _process_auth_info(self, auth_info: Optional[Dict[str, Any]], platform: str = None) -> Dict[str, Any]:
         """Process authentication information from the browser extension."""
@@ -80,136 +310,34 @@ class DownloadService:
         
         result = {}
         
-        # Log the auth info we received (without exposing sensitive values)
-        logger.info(f"Processing auth info for platform: {platform}")
-        logger.info(f"Auth info keys: {list(auth_info.keys())}")
-        
         # Extract authentication status
         if 'isLoggedIn' in auth_info:
             result['is_authenticated'] = auth_info['isLoggedIn']
-            logger.info(f"User is authenticated: {result['is_authenticated']}")
         
         # Extract additional platform-specific information
         if platform == 'youtube':
             if 'isAgeRestricted' in auth_info:
                 result['is_age_restricted'] = auth_info['isAgeRestricted']
-                logger.info(f"Content is age restricted: {result['is_age_restricted']}")
             
             if 'videoElement' in auth_info:
                 result['has_video_element'] = auth_info['videoElement']
-                logger.info(f"Page has video element: {result['has_video_element']}")
         
         # Extract page title if available
         if 'title' in auth_info:
             result['page_title'] = auth_info['title']
-            logger.info(f"Page title: {result['page_title']}")
         
         # Extract cookies if they're provided directly in the auth_info
         if 'cookies' in auth_info and auth_info['cookies']:
             result['cookies'] = auth_info['cookies']
-            logger.info(f"Received {len(auth_info['cookies'].split(';'))} cookies in auth_info")
         
         # Extract user agent if provided
         if 'userAgent' in auth_info:
             result['user_agent'] = auth_info['userAgent']
-            logger.info(f"Using custom user agent from auth_info")
         
-        return result
-
-    def _create_cookies_file(self, cookies: str, platform: str = None, auth_info: Optional[Dict[str, Any]] = None) -> str:
-        """Create a temporary cookies.txt file from browser cookies."""
-        # Process any cookies from auth_info
-        processed_auth = self._process_auth_info(auth_info, platform)
-        if 'cookies' in processed_auth and not cookies:
-            cookies = processed_auth['cookies']
-            logger.info(f"Using cookies from auth_info instead of header cookies")
+        # Log which fields we received (without exposing sensitive values)
+        logger.debug(f"Auth info for {platform}: {sorted(result.keys())}")
         
-        if not cookies:
-            logger.warning("No cookies provided to create cookie file")
-            return None
-
-        try:
-            # Create a temporary file for cookies
-            fd, path = tempfile.mkstemp(suffix='.txt', dir=self.temp_dir)
-            
-            # Get platform domains
-            domains = PLATFORM_DOMAINS.get(platform, []) if platform else [None]
-            if not domains:
-                logger.warning(f"No domain configured for platform {platform}, using default domains")
-                domains = ['.youtube.com', '.google.com']  # Default to YouTube domains as fallback
-            
-            logger.info(f"Creating cookies file for domains: {domains}")
-            
-            # Convert cookies string to Netscape format
-            cookie_lines = []
-            cookie_count = 0
-            
-            # Special handling for YouTube cookies
-            if platform == 'youtube':
-                # Add standard Netscape cookie file header
-                cookie_lines.append("# Netscape HTTP Cookie File")
-                cookie_lines.append("# This file was generated by UFD Backend")
-                cookie_lines.append("")
-            
-            # Process each cookie
-            for cookie in cookies.split(';'):
-                cookie = cookie.strip()
-                if '=' in cookie:
-                    try:
-                        name, value = cookie.split('=', 1)
-                        name = name.strip()
-                        value = value.strip()
-                        
-                        if not name or not value:
-                            continue
-                            
-                        # Add cookie for each domain
-                        for domain in domains:
-                            if domain:
-                                # Format: domain, domain_initial_dot, path, secure, expiry, name, value
-                                expiry = int(datetime.now().timestamp()) + 31536000  # 1 year from now
-                                
-                                # Special handling for critical cookies
-                                if platform == 'youtube' and name in ['SID', 'HSID', 'SSID', 'APISID', 'SAPISID', 
-                                                                      '__Secure-1PSID', '__Secure-3PSID']:
-                                    # These are critical auth cookies, ensure they're correctly formatted
-                                    logger.info(f"Adding critical auth cookie: {name}")
-                                    is_secure = 'TRUE' if name.startswith('__Secure') else 'FALSE'
-                                    
-                                    cookie_lines.append(f"{domain}\tTRUE\t/\t{is_secure}\t{expiry}\t{name}\t{value}")
-                                    cookie_count += 1
-                                else:
-                                    # Standard cookie
-                                    cookie_lines.append(f"{domain}\tTRUE\t/\tFALSE\t{expiry}\t{name}\t{value}")
-                                    cookie_count += 1
-                    except Exception as e:
-                        logger.warning(f"Error processing cookie {cookie}: {e}")
-                        continue
-            
-            # Write cookies to file
-            with os.fdopen(fd, 'w') as f:
-                f.write('\n'.join(cookie_lines))
-            
-            # Verify the file was written correctly
-            if os.path.exists(path) and os.path.getsize(path) > 0:
-                logger.info(f"Created cookies file at {path} with {cookie_count} cookies for platform: {platform}")
-                
-                # Log the first few lines for debugging (without showing values)
-                try:
-                    with open(path, 'r') as f:
-                        first_lines = [line.split('\t')[0:6] + ['[VALUE_HIDDEN]'] if '\t' in line else line for line in f.readlines()[:5]]
-                        logger.info(f"Cookie file preview (first 5 lines): {first_lines}")
-                except Exception as e:
-                    logger.warning(f"Could not read cookie file for preview: {e}")
-                
-                return path
-            else:
-                logger.error(f"Cookie file was not created properly at {path}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error creating cookies file: {e}")
-            return None
+        return result
 
     def _get_yt_dlp_opts(self, format_id: str = None, cookies: str = None, platform: str = None, auth_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Get yt-dlp options based on format and cookies."""
@@ -256,11 +384,9 @@ class DownloadService:
 
         if cookies:
             headers['Cookie'] = cookies
-            logger.info(f"Added cookie header with {len(cookies.split(';'))} cookies")
 
         # Check if we're running in Docker/Render
         is_docker = os.environ.get('RENDER') == 'true'
-        logger.info(f"Running in Docker/Render environment: {is_docker}")
         
         # Base options with better retry and timeout settings
         opts = {
@@ -293,24 +419,17 @@ class DownloadService:
                 "tiktok": {"no_webpage": True},
                 "reddit": {"no_webpage": True}
             },
-            "sleep_interval": 2,
-            "max_sleep_interval": 5,
-            "sleep_interval_requests": 3,
         }
         
         # Enhanced options for Docker/Render environments where headless browser access is available
         if is_docker and platform == 'youtube':
-            logger.info("Adding browser-specific options for YouTube extraction")
             opts.update({
-                "verbose": True,  # Enable verbose output for better debugging
-                "debug_printtraffic": True,  # Print traffic for debugging
                 "force_generic_extractor": False,
                 "downloader": "websocket_fragment",
             })
             
             # Use Chromium if available in Docker
             if os.path.exists("/usr/bin/chromium"):
-                logger.info("Using Chromium browser for extraction")
                 opts["prefer_insecure"] = True
                 opts["allow_unplayable_formats"] = True
                 
@@ -318,29 +437,44 @@ class DownloadService:
                 if not "youtube_include_dash_manifest" in opts:
                     opts["youtube_include_dash_manifest"] = True
         
-        # Log the most important options
-        important_opts = {k: v for k, v in opts.items() if k in ["format", "retries", "verbose", "nocheckcertificate"]}
-        logger.info(f"Important yt-dlp options: {important_opts}")
+        # Fetch HLS/DASH fragments, or byte ranges of large progressive files, over several connections
+        settings = get_settings()
+        connections = settings.platform_download_connections.get(
+            getattr(platform, "value", platform), settings.DOWNLOAD_CONNECTIONS
+        )
+        opts.update({
+            "concurrent_fragment_downloads": connections,
+            "parallel_connections": connections,
+            "parallel_min_size": settings.PARALLEL_MIN_SIZE,
+        })
 
-        # Create cookies file from browser cookies if provided
-        if cookies:
-            cookies_file = self._create_cookies_file(cookies, platform, auth_info)
-            if cookies_file:
-                opts["cookiefile"] = cookies_file
-                logger.info(f"Using cookies file: {cookies_file}")
-            else:
-                logger.warning("Failed to create cookies file, will only use header cookies")
+        # Verbose output and HTTP traffic dumps only for requests that ask for them
+        if log.debug_traffic.get():
+            opts.update({"quiet": False, "verbose": True, "debug_printtraffic": True})
+
+        # Browser cookies go into the YoutubeDL cookie jar from memory, scoped to the platform's domains
+        if cookies and platform:
+            opts["browser_cookies"] = (cookies, getattr(platform, "value", platform))
 
         return opts
 
+    def info_validator(self, url: str, platform: str = None, cookies: str = None) -> Optional[Tuple[str, float]]:
+        """(digest, expires_at) of the cached extraction that /info answers from, if there is one.
+
+        The /info summary is derived from it alone, so the digest is a strong
+        validator for the response, checked without unpickling or yt-dlp.
+        """
+        return self.info_cache.validator(make_cache_key(url, platform, cookies))
+
     async def get_video_info(self, url: str, platform: str = None, cookies: str = None, auth_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Get video information."""
+        from yt_dlp.utils import DownloadError
+
         try:
             logger.info(f"Getting video info for {platform} URL: {url[:30]}...")
             
             # Process authentication info from the extension
             processed_auth = self._process_auth_info(auth_info, platform)
-            logger.info(f"Processed auth info: {json.dumps({k: '...' for k in processed_auth.keys()})}")
             
             # Try to parse URL to check if it's valid
             try:
@@ -348,38 +482,27 @@ class DownloadService:
                 parsed_url = urlparse(url)
                 if not parsed_url.scheme or not parsed_url.netloc:
                     raise ValueError(f"Invalid URL format: {url}")
-                logger.info(f"URL validated: {parsed_url.netloc}")
             except Exception as e:
                 logger.warning(f"URL validation issue: {e}")
             
+            cache_key = make_cache_key(url, platform, cookies)
+            await self.prefetcher.join(cache_key)
+            cached_info = self.info_cache.get(cache_key)
+            if cached_info is not None:
+                logger.info(f"Info cache hit for {platform} URL")
+                return VideoSummary.from_info(cached_info).to_dict()
+            
             yt_dlp_opts = self._get_yt_dlp_opts(cookies=cookies, platform=platform, auth_info=auth_info)
             
             try:
-                with yt_dlp.YoutubeDL(yt_dlp_opts) as ydl:
-                    logger.info(f"Calling yt-dlp extract_info for {platform}")
-                    info = await asyncio.to_thread(ydl.extract_info, url, download=False)
-                    logger.info(f"Successfully extracted info for {platform} URL")
-                    
-                    formats = []
-                    if "formats" in info:
-                        for f in info["formats"]:
-                            if f.get("vcodec", "none") != "none":  # Video format
-                                formats.append(
-                                    {
-                                        "quality": f'{f.get("height", "?")}p',
-                                        "format": "video",
-                                        "size": f.get("filesize_approx", 0),
-                                    }
-                                )
-                    
-                    logger.info(f"Found {len(formats)} available formats")
-                    return {
-                        "title": info.get("title", "Unknown Title"),
-                        "thumbnail": info.get("thumbnail"),
-                        "duration": info.get("duration"),
-                        "formats": formats,
-                    }
-            except yt_dlp.utils.DownloadError as e:
+                logger.info(f"Calling yt-dlp extract_info for {platform}")
+                pool = self.scheduler.extraction
+                async with pool.slot(platform, PRIORITY_INTERACTIVE):
+                    result = await self._call_ydl(pool, "extract", yt_dlp_opts, url, platform=platform)
+                logger.info(f"Successfully extracted info for {platform} URL")
+                self._cache_info(cache_key, result["info"])
+                return result["summary"].to_dict()
+            except DownloadError as e:
                 error_message = str(e)
                 logger.error(f"yt-dlp download error: {error_message}")
                 
@@ -404,49 +527,64 @@ class DownloadService:
         except Exception as e:
             logger.error(f"Error getting video info: {str(e)}")
             raise
-        finally:
-            # Cleanup any temporary cookie files
-            for file in self.temp_dir.glob("*.txt"):
-                try:
-                    file.unlink()
-                except Exception as e:
-                    logger.warning(f"Failed to delete temporary file {file}: {e}")
 
     async def download_video(
-        self, url: str, format_id: Optional[str] = None, platform: str = None, cookies: str = None, auth_info: Optional[Dict[str, Any]] = None
+        self, url: str, format_id: Optional[str] = None, platform: str = None, cookies: str = None, auth_info: Optional[Dict[str, Any]] = None,
+        progress_hooks: Optional[List[Callable]] = None, postprocessor_hooks: Optional[List[Callable]] = None,
+        on_start: Optional[Callable[[], None]] = None, priority: int = PRIORITY_DOWNLOAD,
+        container: str = "mp4", transcode: bool = False, clip: Optional[Tuple[float, Optional[float]]] = None,
     ) -> Dict[str, Any]:
-        """Download video with the specified format."""
-        async with self.semaphore:
+        """Download video with the specified format into `container`, re-encoding only if `transcode` is set.
+
+        `clip` is a (start, end) pair of seconds; only that section is fetched.
+        """
+        # Cache hits skip the download queue entirely
+        cached = await self.find_cached_media(url, format_id, platform, cookies, container, transcode, clip)
+        if cached is not None:
+            return cached
+
+        from yt_dlp.utils import DownloadError
+
+        pool = self.scheduler.downloads
+        async with pool.slot(platform, priority):
+            if on_start is not None:
+                on_start()
             try:
                 logger.info(f"Starting download for {platform} URL: {url[:30]}...")
                 
                 # Process authentication info from the extension
                 processed_auth = self._process_auth_info(auth_info, platform)
-                logger.info(f"Processed auth info for download: {json.dumps({k: '...' for k in processed_auth.keys()})}")
                 
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                temp_file = self.temp_dir / f"download_{timestamp}.mp4"
+                basename = self._unique_basename()
+                # yt-dlp picks the extension; postprocessing decides the final container
+                outtmpl = str(self.temp_dir / f"{basename}.%(ext)s")
 
                 # Create options for yt-dlp
                 opts = self._get_yt_dlp_opts(format_id, cookies=cookies, platform=platform, auth_info=auth_info)
                 opts.update({
-                    "outtmpl": str(temp_file),
+                    "outtmpl": outtmpl,
                     "quiet": False,
                     "progress": True,
-                    "merge_output_format": "mp4",  # Force MP4 output
-                    "postprocessors": [{
-                        'key': 'FFmpegVideoConvertor',
-                        'preferedformat': 'mp4',  # Ensure MP4 format
-                    }]
+                    "clip": clip,
+                    **postprocess_opts(container, transcode),
                 })
 
+                # Reuse the extraction from a preceding /info call if we have one
+                cache_key = make_cache_key(url, platform, cookies)
+                await self.prefetcher.join(cache_key)
+                cached_info = self.info_cache.get(cache_key)
+
                 try:
                     # Try with the configured options
                     logger.info(f"Attempting download with primary configuration for {platform}")
-                    with yt_dlp.YoutubeDL(opts) as ydl:
-                        info = await asyncio.to_thread(ydl.extract_info, url)
-                        logger.info(f"Download completed successfully with primary configuration")
-                except yt_dlp.utils.DownloadError as e:
+                    info = await self._call_ydl(
+                        pool, "download", opts, url, cached_info, platform=platform,
+                        progress_hooks=progress_hooks, postprocessor_hooks=postprocessor_hooks,
+                    )
+                    if info["cache_stale"]:
+                        self.info_cache.invalidate(cache_key)
+                    logger.info(f"Download completed successfully with primary configuration")
+                except DownloadError as e:
                     error_message = str(e)
                     logger.error(f"Primary download attempt failed: {error_message}")
                     
@@ -458,28 +596,29 @@ class DownloadService:
                         fallback_opts = {
                             "format": "best[ext=mp4]/best",
                             "quiet": False,
-                            "verbose": True,
+                            "verbose": log.debug_traffic.get(),
                             "no_warnings": False,
-                            "outtmpl": str(temp_file),
+                            "outtmpl": outtmpl,
+                            "clip": clip,
+                            **postprocess_opts(container, transcode),
                             "retries": 15,
                             "fragment_retries": 15,
                             "skip_unavailable_fragments": True,
                             "http_headers": opts["http_headers"],
                             "nocheckcertificate": True,
                             "prefer_insecure": True,
-                            "sleep_interval": 5,
-                            "max_sleep_interval": 10,
-                            "sleep_interval_requests": 2,
                         }
                         
-                        # If we have a cookies file, use it
-                        if "cookiefile" in opts and os.path.exists(opts["cookiefile"]):
-                            fallback_opts["cookiefile"] = opts["cookiefile"]
+                        # Keep the browser cookies, if any
+                        if "browser_cookies" in opts:
+                            fallback_opts["browser_cookies"] = opts["browser_cookies"]
                         
-                        with yt_dlp.YoutubeDL(fallback_opts) as ydl:
-                            logger.info("Executing fallback download method...")
-                            info = await asyncio.to_thread(ydl.extract_info, url)
-                            logger.info("Fallback download method succeeded!")
+                        logger.info("Executing fallback download method...")
+                        info = await self._call_ydl(
+                            pool, "download", fallback_opts, url, platform=platform,
+                            progress_hooks=progress_hooks, postprocessor_hooks=postprocessor_hooks,
+                        )
+                        logger.info("Fallback download method succeeded!")
                     else:
                         # If it's not a YouTube extraction error or fallback is not applicable, re-raise
                         # Create a more user-friendly error message
@@ -496,8 +635,10 @@ class DownloadService:
                         raise Exception(error_message + error_context)
                 
                 # At this point, we have successfully downloaded the video
-                # Always use mp4 extension
-                filename = f"download_{timestamp}.mp4"
+                if not info.get("filepath"):
+                    raise Exception(f"Download completed but yt-dlp reported no output file for {basename}")
+                temp_file = Path(info["filepath"])
+                filename = temp_file.name
                 
                 # Verify the file exists and has content
                 if not temp_file.exists():
@@ -506,28 +647,309 @@ class DownloadService:
                 if temp_file.stat().st_size == 0:
                     raise Exception(f"Download completed but file is empty at {temp_file}")
                 
-                logger.info(f"Download successful! File size: {temp_file.stat().st_size} bytes")
+                logger.info(
+                    f"Download successful! File size: {temp_file.stat().st_size} bytes, "
+                    f"postprocessing took {info.get('postprocess_seconds', 0)}s"
+                )
+
+                title = info.get("title", "Unknown Title")
+                ext = temp_file.suffix.lstrip(".")
+                media_key = make_media_key(
+                    info.get("extractor_key"), info.get("id"), info.get("format_id"), output_key(container, transcode, clip)
+                )
+                # Moving the file (a copy across filesystems) and saving the index block, so keep them off the loop
+                entry = await asyncio.to_thread(
+                    self._store_in_cache, media_key, str(temp_file), title,
+                    self._request_key(url, format_id, platform, cookies, container, transcode, clip),
+                )
+                if entry is not None:
+                    return dict(
+                        self._cached_result(entry), filename=filename, title=title,
+                        postprocess_seconds=info.get("postprocess_seconds"), pinned=True,
+                    )
 
                 return {
                     "file_path": str(temp_file),
                     "filename": filename,
-                    "title": info.get("title", "Unknown Title"),
-                    "content_type": "video/mp4",
+                    "title": title,
+                    "content_type": CONTENT_TYPES.get(ext, "application/octet-stream"),
+                    "postprocess_seconds": info.get("postprocess_seconds"),
                 }
 
             except Exception as e:
                 logger.error(f"Error downloading video: {str(e)}")
-                if temp_file.exists():
-                    try:
-                        temp_file.unlink()
-                        logger.info(f"Cleaned up incomplete download file: {temp_file}")
-                    except Exception as clean_err:
-                        logger.warning(f"Failed to clean up file {temp_file}: {clean_err}")
+                for leftover in self.temp_dir.glob(f"{basename}.*"):
+                    if leftover.exists():
+                        try:
+                            leftover.unlink()
+                            logger.info(f"Cleaned up incomplete download file: {leftover}")
+                        except Exception as clean_err:
+                            logger.warning(f"Failed to clean up file {leftover}: {clean_err}")
+                raise
+
+    async def download_shared(
+        self, url: str, format_id: Optional[str] = None, platform: str = None, cookies: str = None, auth_info: Optional[Dict[str, Any]] = None,
+        priority: int = PRIORITY_DOWNLOAD, container: str = "mp4", transcode: bool = False,
+        clip: Optional[Tuple[float, Optional[float]]] = None,
+    ) -> Artifact:
+        """Download a video once for every concurrent request asking for the same thing.
+
+        Requests are coalesced on the normalized URL, platform, cookie set,
+        format string and output container; all of them get the same artifact and each response takes
+        its own lease on it. The download is cancelled only if every waiter leaves.
+        """
+        key = self._request_key(url, format_id, platform, cookies, container, transcode, clip)
+        cancel_event = threading.Event()
+
+        def check_cancelled(status: Dict[str, Any]) -> None:
+            if cancel_event.is_set():
+                from yt_dlp.utils import DownloadCancelled
+                raise DownloadCancelled("All clients disconnected")
+
+        async def run() -> Artifact:
+            result = await self.download_video(
+                url, format_id, platform=platform, cookies=cookies, auth_info=auth_info,
+                progress_hooks=[check_cancelled], priority=priority, container=container, transcode=transcode,
+                clip=clip,
+            )
+            return self.register_result(result)
+
+        return await self.in_flight.do(key, run, on_abandon=cancel_event.set)
+
+    async def list_playlist(
+        self, url: str, limit: int, platform: str = None, cookies: str = None, auth_info: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Entry URLs and titles of a playlist, without extracting each video; a single video lists itself."""
+        opts = self._get_yt_dlp_opts(cookies=cookies, platform=platform, auth_info=auth_info)
+        pool = self.scheduler.extraction
+        async with pool.slot(platform, PRIORITY_BULK):
+            entries = await self._call_ydl(pool, "list_entries", opts, url, limit, platform=platform)
+        logger.info(f"Listed {len(entries)} entries for {platform} URL")
+        return entries
+
+    async def start_progressive_download(
+        self, url: str, format_id: Optional[str] = None, platform: str = None, cookies: str = None, auth_info: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Start a download whose bytes can be streamed while yt-dlp is still writing them.
+
+        Only formats that need no merge or postprocessing step qualify; anything
+        else raises ProgressiveUnavailable so the caller can use download_video.
+        Concurrent requests for the same video and format tail the same file; it
+        is removed when the last of them finishes.
+        """
+        settings = get_settings()
+        key = self._request_key(url, format_id, platform, cookies)
+        shared = self._progressive.get(key)
+        if shared is None or shared["cancel_event"].is_set():
+            shared = await self.in_flight.do(
+                key + ("progressive",),
+                lambda: self._start_shared_progressive(key, url, format_id, platform, cookies, auth_info),
+            )
+        else:
+            logger.info(f"Joining running progressive download of {shared['file_path']}")
+        shared["refs"] += 1
+
+        temp_file = Path(shared["file_path"])
+        return {
+            "file_path": shared["file_path"],
+            "filename": temp_file.name,
+            "title": shared["title"],
+            "content_type": CONTENT_TYPES.get(temp_file.suffix.lstrip("."), "application/octet-stream"),
+            "shared": shared,
+            "stream": tail_file(temp_file, shared["task"], settings.STREAM_CHUNK_SIZE, settings.STREAM_POLL_INTERVAL),
+        }
+
+    async def _get_info(
+        self, url: str, platform: str = None, cookies: str = None, auth_info: Optional[Dict[str, Any]] = None,
+        priority: int = PRIORITY_DOWNLOAD,
+    ) -> Optional[Dict[str, Any]]:
+        """Slim info dict from the info cache or a fresh extraction; None for playlists."""
+        cache_key = make_cache_key(url, platform, cookies)
+        await self.prefetcher.join(cache_key)
+        info = self.info_cache.get(cache_key)
+        if info is None:
+            extract_opts = self._get_yt_dlp_opts(cookies=cookies, platform=platform, auth_info=auth_info)
+            async with self.scheduler.extraction.slot(platform, priority):
+                result = await self._call_ydl(self.scheduler.extraction, "extract", extract_opts, url, platform=platform)
+            info = result["info"]
+            self._cache_info(cache_key, info)
+        return info
+
+    def prefetch_info(
+        self, url: str, platform: str = None, cookies: str = None, auth_info: Optional[Dict[str, Any]] = None,
+        client: str = "anonymous",
+    ) -> str:
+        """Start extracting `url` into the info cache in the background, if there's room.
+
+        Returns what happened: "cached", "started", "in_flight", or "busy" when
+        the prefetch budget is used up or real requests are already queued for
+        extraction, or "disabled".
+        """
+        if not self.prefetcher.enabled:
+            return "disabled"
+        cache_key = make_cache_key(url, platform, cookies)
+        if cache_key in self.info_cache:
+            return "cached"
+        pool = self.scheduler.extraction
+        if pool.queued:
+            # Never add to a queue that users are already waiting in
+            self.prefetcher.dropped += 1
+            return "busy"
+
+        async def run(mark_started: Callable[[], None]) -> None:
+            opts = self._get_yt_dlp_opts(cookies=cookies, platform=platform, auth_info=auth_info)
+            async with pool.slot(platform, PRIORITY_PREFETCH):
+                mark_started()
+                result = await self._call_ydl(pool, "extract", opts, url, platform=platform)
+            self._cache_info(cache_key, result["info"])
+            logger.info(f"Prefetched info for {platform} URL: {url[:30]}...")
+
+        return self.prefetcher.submit(client, cache_key, run)
+
+    async def resolve_direct_url(
+        self, url: str, format_id: Optional[str] = None, platform: str = None, cookies: str = None, auth_info: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """The media URL of a single-file format that the browser can fetch itself.
+
+        Returns None when the bytes have to go through us: the platform isn't
+        in DIRECT_URL_PLATFORMS, the format needs merging or is a manifest, the
+        URL is bound to our IP, or fetching it needs cookies or credentials
+        the browser wouldn't send.
+        """
+        settings = get_settings()
+        if getattr(platform, "value", platform) not in settings.direct_url_platforms:
+            return None
+        info = await self._get_info(url, platform, cookies, auth_info)
+        if info is None:
+            return None
+        opts = self._get_yt_dlp_opts(format_id, cookies=cookies, platform=platform, auth_info=auth_info)
+        selected = await self._select_single_file(opts, info)
+        if selected is None:
+            logger.info(f"Direct delivery unavailable for {platform} URL, proxying instead: no single-file format")
+            return None
+
+        reason = direct_url_blocker(selected)
+        if reason is not None:
+            logger.info(f"Direct delivery unavailable for {platform} URL, proxying instead: {reason}")
+            return None
+        ext = selected["ext"] or "mp4"
+        return {
+            "url": selected["url"],
+            "headers": {k: v for k, v in selected["http_headers"].items() if k.lower() not in CREDENTIAL_HEADERS},
+            "filename": f"{self._unique_basename()}.{ext}",
+            "title": info.get("title", "Unknown Title"),
+            "content_type": CONTENT_TYPES.get(ext, "application/octet-stream"),
+            "filesize": selected["filesize"],
+        }
+
+    async def _select_single_file(self, opts: Dict[str, Any], info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run a progressive format string on `info`; None when the video has no such format (HLS/DASH only)."""
+        try:
+            return await self._call_ydl(self.scheduler.extraction, "select_format", opts, info)
+        except Exception as e:
+            # yt-dlp raises ExtractorError here, which a worker process may hand back as another type
+            if classify_ytdlp_error(str(e)) != "format_unavailable":
                 raise
-            finally:
-                # Cleanup any temporary cookie files
-                for file in self.temp_dir.glob("*.txt"):
-                    try:
-                        file.unlink()
-                    except Exception as e:
-                        logger.warning(f"Failed to delete temporary file {file}: {e}")
+            return None
+
+    async def _start_shared_progressive(
+        self, key: tuple, url: str, format_id: Optional[str], platform: str, cookies: str, auth_info: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        settings = get_settings()
+        logger.info(f"Starting progressive download for {platform} URL: {url[:30]}...")
+
+        info = await self._get_info(url, platform, cookies, auth_info)
+        if info is None:
+            raise ProgressiveUnavailable("Playlists cannot be streamed progressively")
+
+        from yt_dlp.utils import DownloadCancelled
+
+        basename = self._unique_basename()
+        cancel_event = threading.Event()
+
+        def check_cancelled(status: Dict[str, Any]) -> None:
+            if cancel_event.is_set():
+                raise DownloadCancelled("Client disconnected")
+
+        opts = self._get_yt_dlp_opts(format_id, cookies=cookies, platform=platform, auth_info=auth_info)
+        opts.update({
+            "outtmpl": str(self.temp_dir / f"{basename}.%(ext)s"),
+            "nopart": True,  # Write straight to the file we are tailing
+            "continuedl": False,
+            "parallel_connections": 1,  # The tail reader needs the file written front to back
+            "fixup": "never",  # A fixup would rewrite the file after its bytes were already sent
+        })
+
+        # Format selection is cheap; it doesn't need a slot of its own
+        selected = await self._select_single_file(opts, info)
+        if selected is None:
+            raise ProgressiveUnavailable("No single-file HTTP format to stream")
+        if selected["needs_merge"] or not selected["url"]:
+            raise ProgressiveUnavailable("Selected format requires merging separate streams")
+
+        ext = selected["ext"] or "mp4"
+        temp_file = self.temp_dir / f"{basename}.{ext}"
+
+        async def run_download():
+            pool = self.scheduler.downloads
+            async with pool.slot(platform, PRIORITY_DOWNLOAD):
+                await self._call_ydl(
+                    pool, "download", opts, url, info, platform=platform, progress_hooks=[check_cancelled]
+                )
+
+        task = asyncio.create_task(run_download())
+        shared = {
+            "key": key,
+            "file_path": str(temp_file),
+            "title": info.get("title", "Unknown Title"),
+            "task": task,
+            "cancel_event": cancel_event,
+            "refs": 0,
+        }
+
+        # Hold the response until the first bytes exist so early failures still return an error
+        try:
+            await wait_for_file(temp_file, task, settings.STREAM_POLL_INTERVAL)
+            if task.done() and task.exception() is not None:
+                raise task.exception()
+        except BaseException:
+            # Nobody will stream this file; stop the download and remove whatever it wrote
+            cancel_event.set()
+            def discard(done: asyncio.Task) -> None:
+                if not done.cancelled() and done.exception() is not None:
+                    logger.info(f"Abandoned progressive download ended with: {done.exception()}")
+                self._remove_file(temp_file)
+
+            task.add_done_callback(discard)
+            raise
+
+        logger.info(f"Progressive download started, streaming from {temp_file}")
+        self._progressive[key] = shared
+        return shared
+
+    async def finish_progressive_download(self, result: Dict[str, Any]) -> None:
+        """Drop one client's reference; the last one stops the download and removes its file."""
+        shared = result["shared"]
+        shared["refs"] -= 1
+        if shared["refs"] > 0:
+            logger.info(f"{shared['refs']} clients still streaming {shared['file_path']}")
+            return
+
+        shared["cancel_event"].set()
+        if self._progressive.get(shared["key"]) is shared:
+            del self._progressive[shared["key"]]
+        try:
+            await shared["task"]
+        except Exception as e:
+            logger.info(f"Progressive download ended with: {e}")
+        self._remove_file(shared["file_path"])
+
+    @staticmethod
+    def _remove_file(path) -> None:
+        try:
+            os.unlink(path)
+            logger.info(f"Cleaned up file: {path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error cleaning up file: {str(e)}")
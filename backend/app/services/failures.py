@@ -0,0 +1,238 @@
+"""
+Fail fast on requests that can only fail again.
+
+NegativeCache remembers permanent per-URL failures (private, removed or
+unsupported videos) for a short TTL, so retries get the same error straight
+away instead of another round of yt-dlp's extractor and HTTP retries.
+
+CircuitBreakers counts consecutive extractor-level failures (YouTube's broken
+player response, "Unable to extract ...") per platform and yt-dlp extractor.
+After CIRCUIT_BREAKER_THRESHOLD of them in a row the breaker opens and calls
+for that extractor raise CircuitOpen for the cool-down; then one request is
+let through as a probe, and its outcome closes or re-opens the breaker.
+
+Both are only touched from the event loop thread.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from . import ydl_worker
+
+logger = logging.getLogger(__name__)
+
+# classify_ytdlp_error classes that won't change until the video itself does
+PERMANENT_ERROR_CLASSES = {"private", "unavailable", "unsupported_url"}
+# Classes that mean the extractor is broken rather than this one video
+EXTRACTOR_ERROR_CLASSES = {"player_response", "extractor"}
+
+# URLs whose extractor name is remembered, so an open breaker doesn't re-match them
+EXTRACTOR_NAME_CACHE_SIZE = 1024
+
+# yt-dlp prefixes extractor errors with the extractor's IE_NAME: "ERROR: [youtube] id: ..."
+EXTRACTOR_NAME_RE = re.compile(r"\[([\w:.-]+)\]")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an extractor whose breaker is open."""
+
+    def __init__(self, platform: str, extractor: str, retry_after: int):
+        super().__init__(
+            f"{extractor} extraction is failing for {platform}; not retrying for {retry_after}s"
+        )
+        self.platform = platform
+        self.extractor = extractor
+        self.retry_after = retry_after
+
+
+def extractor_from_error(message: str) -> Optional[str]:
+    match = EXTRACTOR_NAME_RE.search(message)
+    return match.group(1) if match else None
+
+
+class NegativeCache:
+    """Bounded TTL cache of error messages keyed like the info cache."""
+
+    def __init__(self, ttl: float = 120, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+
+    @classmethod
+    def from_settings(cls, settings) -> "NegativeCache":
+        return cls(ttl=settings.NEGATIVE_CACHE_TTL, max_entries=settings.NEGATIVE_CACHE_MAX_ENTRIES)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, message = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self.hits += 1
+        return message
+
+    def set(self, key: Tuple[str, str, str], message: str) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.time() + self.ttl, message)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "ttl": self.ttl, "hits": self.hits}
+
+
+class Breaker:
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.trips = 0
+        self.rejected = 0
+
+
+class CircuitBreakers:
+    """A breaker per (platform, extractor name)."""
+
+    def __init__(
+        self, threshold: int = 5, cooldown: float = 60,
+        resolve_extractor: Optional[Callable[[str], Awaitable[str]]] = None,
+    ):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        # Must match the URL wherever yt-dlp's extractors are loaded: a worker process in process mode
+        self.resolve_extractor = resolve_extractor or (lambda url: asyncio.to_thread(ydl_worker.extractor_name, url))
+        self._breakers: Dict[Tuple[str, str], Breaker] = {}
+        self._extractor_names: "OrderedDict[str, str]" = OrderedDict()
+
+    @classmethod
+    def from_settings(
+        cls, settings, resolve_extractor: Optional[Callable[[str], Awaitable[str]]] = None,
+    ) -> "CircuitBreakers":
+        return cls(
+            threshold=settings.CIRCUIT_BREAKER_THRESHOLD,
+            cooldown=settings.CIRCUIT_BREAKER_COOLDOWN,
+            resolve_extractor=resolve_extractor,
+        )
+
+    @staticmethod
+    def _platform(platform: Optional[str]) -> str:
+        return str(getattr(platform, "value", platform) or "unknown")
+
+    async def _extractor_name(self, url: str) -> str:
+        name = self._extractor_names.get(url)
+        if name is None:
+            # suitable() over every extractor takes milliseconds, and imports them all the first time
+            name = await self.resolve_extractor(url)
+            self._extractor_names[url] = name
+            while len(self._extractor_names) > EXTRACTOR_NAME_CACHE_SIZE:
+                self._extractor_names.popitem(last=False)
+        else:
+            self._extractor_names.move_to_end(url)
+        return name
+
+    async def check(self, platform: Optional[str], url: str) -> Optional[Tuple[str, str]]:
+        """Raise CircuitOpen if the URL's extractor is failing.
+
+        Returns the breaker key when this call is the half-open probe; pass it
+        back to `record`, and to `release` once the call is over, so the probe
+        is settled whatever the outcome.
+        """
+        platform = self._platform(platform)
+        if not any(b.state != CLOSED for (p, _), b in self._breakers.items() if p == platform):
+            return None
+        # Only worth matching the URL against yt-dlp's extractors while something is open
+        key = (platform, await self._extractor_name(url))
+        breaker = self._breakers.get(key)
+        if breaker is None or breaker.state == CLOSED:
+            return None
+
+        remaining = breaker.opened_at + self.cooldown - time.monotonic()
+        if breaker.state == OPEN and remaining <= 0:
+            breaker.state = HALF_OPEN
+        if breaker.state == HALF_OPEN and not breaker.probing:
+            breaker.probing = True
+            logger.info(f"Letting a probe request through the {key[1]} breaker for {platform}")
+            return key
+        breaker.rejected += 1
+        raise CircuitOpen(platform, key[1], max(int(remaining) + 1, 1))
+
+    def release(self, probe: Optional[Tuple[str, str]]) -> None:
+        """End a probe whose call finished without an outcome (cancelled, say); no-op once recorded."""
+        breaker = self._breakers.get(probe) if probe is not None else None
+        if breaker is not None:
+            breaker.probing = False
+
+    def record(
+        self, platform: Optional[str], extractor: Optional[str], error_class: Optional[str] = None,
+        probe: Optional[Tuple[str, str]] = None,
+    ) -> None:
+        """Feed back a call's outcome; `error_class` is from classify_ytdlp_error, None on success."""
+        if self.threshold <= 0:
+            return
+        platform = self._platform(platform)
+        key = (platform, extractor) if extractor else None
+        if probe is not None and probe != key:
+            # The probe ended without telling us anything about its extractor
+            self._breakers[probe].probing = False
+        if key is None:
+            return
+
+        if error_class is None:
+            breaker = self._breakers.get(key)
+            if breaker is not None:
+                if breaker.state != CLOSED:
+                    logger.info(f"Closing the {extractor} breaker for {platform}")
+                breaker.state = CLOSED
+                breaker.failures = 0
+                breaker.probing = False
+            return
+        if error_class not in EXTRACTOR_ERROR_CLASSES:
+            if probe == key:
+                self._breakers[key].probing = False
+            return
+
+        breaker = self._breakers.setdefault(key, Breaker())
+        breaker.failures += 1
+        breaker.probing = False
+        if breaker.state == HALF_OPEN or breaker.failures >= self.threshold:
+            if breaker.state != OPEN:
+                breaker.trips += 1
+                logger.warning(
+                    f"Opening the {extractor} breaker for {platform} after {breaker.failures} "
+                    f"consecutive extractor failures; failing fast for {self.cooldown:.0f}s"
+                )
+            breaker.state = OPEN
+            breaker.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "threshold": self.threshold,
+            "cooldown": self.cooldown,
+            "breakers": [
+                {
+                    "platform": platform,
+                    "extractor": extractor,
+                    "state": b.state,
+                    "consecutive_failures": b.failures,
+                    "retry_in": round(max(b.opened_at + self.cooldown - now, 0), 1) if b.state == OPEN else 0,
+                    "trips": b.trips,
+                    "rejected": b.rejected,
+                }
+                for (platform, extractor), b in sorted(self._breakers.items())
+            ],
+        }
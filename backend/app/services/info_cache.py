@@ -0,0 +1,183 @@
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that never change what yt-dlp extracts
+TRACKING_PARAMS = {"si", "feature", "fbclid", "gclid", "igshid", "ref", "ref_src", "pp"}
+
+# Treat stream URLs as expired slightly before the CDN does
+STREAM_EXPIRY_MARGIN = 60
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so equivalent links share a cache entry."""
+    try:
+        parsed = urlparse(url.strip())
+    except Exception:
+        return url.strip()
+
+    query = [
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and not k.startswith("utm_")
+    ]
+    query.sort()
+
+    netloc = parsed.netloc.lower()
+    if netloc.startswith("m."):
+        netloc = "www." + netloc[2:]
+
+    return urlunparse((
+        parsed.scheme.lower() or "https",
+        netloc,
+        parsed.path.rstrip("/") or "/",
+        "",
+        urlencode(query),
+        "",
+    ))
+
+
+def make_cache_key(url: str, platform: Optional[str] = None, cookies: Optional[str] = None) -> Tuple[str, str, str]:
+    """Build a cache key from the normalized URL, platform and cookie set.
+
+    Cookies are part of the key (as a digest) so an authenticated extraction is
+    never served to a different browser session.
+    """
+    platform = getattr(platform, "value", platform) or ""
+    cookie_digest = hashlib.sha256(cookies.encode()).hexdigest()[:16] if cookies else ""
+    return (platform, normalize_url(url), cookie_digest)
+
+
+def stream_expiry(info: Dict[str, Any]) -> Optional[float]:
+    """Return the earliest `expire=` timestamp found in the info's stream URLs."""
+    earliest = None
+    urls = [info.get("url")] + [f.get("url") for f in info.get("formats") or []]
+    for stream_url in urls:
+        if not stream_url or "expire" not in stream_url:
+            continue
+        try:
+            params = dict(parse_qsl(urlparse(stream_url).query))
+            expire = float(params["expire"])
+        except (KeyError, ValueError):
+            continue
+        if earliest is None or expire < earliest:
+            earliest = expire
+    return earliest
+
+
+class InfoCache:
+    """Bounded TTL + LRU cache for yt-dlp extraction results.
+
+    Entries are stored pickled: an info dict with thousands of fragment dicts
+    takes several times its pickled size as live objects, and every lookup
+    needs a private copy anyway, which unpickling makes faster than deepcopy.
+    Bounded by entry count and by total pickled bytes. Each entry's digest is
+    its validator: responses built from it carry it as their ETag.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl: float = 300, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, bytes, str]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        """Return a private copy of the cached info dict, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, data, _ = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        # yt-dlp mutates info dicts while processing them
+        return pickle.loads(data)
+
+    def _remove(self, key: Tuple[str, str, str]) -> None:
+        _, data, _ = self._entries.pop(key)
+        self._bytes -= len(data)
+
+    def __contains__(self, key: Tuple[str, str, str]) -> bool:
+        """Whether a live entry exists, without counting a lookup or copying it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.time()
+
+    def validator(self, key: Tuple[str, str, str]) -> Optional[Tuple[str, float]]:
+        """(digest, expires_at) of a live entry, without counting a lookup or copying it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                return None
+            return entry[2], entry[0]
+
+    def set(self, key: Tuple[str, str, str], info: Dict[str, Any]) -> None:
+        """Store an info dict, expiring it no later than its stream URLs."""
+        if self.max_entries <= 0 or self.ttl <= 0 or self.max_bytes <= 0:
+            return
+
+        expires_at = time.time() + self.ttl
+        expire = stream_expiry(info)
+        if expire is not None:
+            expires_at = min(expires_at, expire - STREAM_EXPIRY_MARGIN)
+        if expires_at <= time.time():
+            logger.info("Not caching info: stream URLs are about to expire")
+            return
+
+        data = pickle.dumps(info, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            logger.info(f"Not caching info: {len(data)} bytes is over INFO_CACHE_MAX_BYTES")
+            return
+
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, data, digest)
+            self._bytes += len(data)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, key: Tuple[str, str, str]) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,361 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, asdict, fields
+from enum import Enum
+from typing import Dict, Any, Optional, List, Tuple
+
+
+from .scheduler import PRIORITY_BULK
+
+logger = logging.getLogger(__name__)
+
+
+class JobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+TERMINAL_STATES = {JobState.COMPLETED, JobState.FAILED, JobState.CANCELLED}
+
+
+@dataclass
+class Job:
+    id: str
+    url: str
+    platform: Optional[str]
+    format_string: Optional[str]
+    container: str = "mp4"
+    transcode: bool = False
+    clip: Optional[Tuple[float, Optional[float]]] = None
+    state: JobState = JobState.QUEUED
+    stage: Optional[str] = None
+    downloaded_bytes: int = 0
+    total_bytes: Optional[int] = None
+    percent: Optional[float] = None
+    speed: Optional[float] = None
+    eta: Optional[int] = None
+    error: Optional[str] = None
+    title: Optional[str] = None
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    postprocess_seconds: Optional[float] = None
+    artifact_id: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["state"] = self.state.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        known = {f.name for f in fields(cls)}
+        job = cls(**{k: v for k, v in data.items() if k in known})
+        job.state = JobState(job.state)
+        return job
+
+
+class JobStore(ABC):
+    """Persistence for job state. Implementations must be thread-safe."""
+
+    @abstractmethod
+    def save(self, job: Job) -> None:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def list(self) -> List[Job]:
+        ...
+
+
+class InMemoryJobStore(JobStore):
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.id] = job.to_dict()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            data = self._jobs.get(job_id)
+        return Job.from_dict(data) if data else None
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return [Job.from_dict(data) for data in self._jobs.values()]
+
+
+class SQLiteJobStore(JobStore):
+    """Job store backed by a single SQLite file, shared across restarts."""
+
+    def __init__(self, path: str = "jobs.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL, data TEXT NOT NULL)"
+            )
+
+    def save(self, job: Job) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, state, updated_at, data) VALUES (?, ?, ?, ?)",
+                (job.id, job.state.value, job.updated_at, json.dumps(job.to_dict())),
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_dict(json.loads(row[0])) if row else None
+
+    def delete(self, job_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM jobs").fetchall()
+        return [Job.from_dict(json.loads(row[0])) for row in rows]
+
+
+def create_job_store(kind: str = "memory", path: str = "jobs.db") -> JobStore:
+    if kind == "sqlite":
+        return SQLiteJobStore(path)
+    if kind != "memory":
+        logger.warning(f"Unknown job store {kind!r}, using in-memory store")
+    return InMemoryJobStore()
+
+
+class JobManager:
+    """Runs downloads in the background and records their progress in a JobStore."""
+
+    def __init__(self, download_service, store: JobStore, result_ttl: float = 3600, progress_interval: float = 0.5):
+        self.download_service = download_service
+        self.store = store
+        self.result_ttl = result_ttl
+        self.progress_interval = progress_interval
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._gc_task: Optional[asyncio.Task] = None
+        self._recover()
+
+    def _recover(self) -> None:
+        """Jobs that were running when the process stopped can never finish."""
+        for job in self.store.list():
+            if job.state not in TERMINAL_STATES:
+                self._finish(job, JobState.FAILED, error="Interrupted by a server restart")
+
+    def _finish(self, job: Job, state: JobState, error: Optional[str] = None) -> None:
+        job.state = state
+        job.error = error
+        job.eta = None
+        job.speed = None
+        job.updated_at = job.finished_at = time.time()
+        self.store.save(job)
+
+    def submit(
+        self, url: str, format_string: Optional[str], platform: Optional[str] = None,
+        cookies: Optional[str] = None, auth_info: Optional[Dict[str, Any]] = None,
+        container: str = "mp4", transcode: bool = False, clip: Optional[Tuple[float, Optional[float]]] = None,
+    ) -> Job:
+        platform = getattr(platform, "value", platform)
+        # Refuse up front rather than accepting a job that can only fail
+        self.download_service.scheduler.downloads.check_capacity()
+        job = Job(
+            id=uuid.uuid4().hex, url=url, platform=platform, format_string=format_string,
+            container=container, transcode=transcode, clip=clip,
+        )
+        self.store.save(job)
+
+        # Cookies only live in memory for the lifetime of the task, never in the store
+        self._cancel_events[job.id] = threading.Event()
+        self._tasks[job.id] = asyncio.create_task(self._run(job.id, cookies, auth_info))
+        self._ensure_gc()
+        logger.info(f"Submitted job {job.id} for {platform} URL: {url[:30]}...")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job, or discard a finished job's result."""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+
+        event = self._cancel_events.get(job_id)
+        if event is not None:
+            event.set()
+        task = self._tasks.get(job_id)
+        if task is not None and job.state == JobState.QUEUED:
+            # Still waiting for a download slot; nothing is running in a thread yet
+            task.cancel()
+
+        if job.state in TERMINAL_STATES:
+            self.download_service.artifacts.expire(job.artifact_id)
+        else:
+            self._finish(job, JobState.CANCELLED, error="Cancelled by client")
+        logger.info(f"Cancelled job {job_id}")
+        return job
+
+    def _progress_hook(self, job_id: str, cancel_event: threading.Event):
+        from yt_dlp.utils import DownloadCancelled
+
+        last_save = 0.0
+
+        def hook(status: Dict[str, Any]) -> None:
+            nonlocal last_save
+            if cancel_event.is_set():
+                raise DownloadCancelled("Job cancelled")
+
+            now = time.time()
+            finished = status.get("status") == "finished"
+            if not finished and now - last_save < self.progress_interval:
+                return
+            last_save = now
+
+            job = self.store.get(job_id)
+            if job is None or job.state in TERMINAL_STATES:
+                return
+            total = status.get("total_bytes") or status.get("total_bytes_estimate")
+            downloaded = status.get("downloaded_bytes") or 0
+            job.state = JobState.RUNNING
+            job.stage = "downloading"
+            job.downloaded_bytes = downloaded
+            job.total_bytes = int(total) if total else None
+            job.percent = round(downloaded / total * 100, 1) if total else None
+            job.speed = status.get("speed")
+            job.eta = status.get("eta")
+            job.updated_at = now
+            if cancel_event.is_set():
+                raise DownloadCancelled("Job cancelled")
+            self.store.save(job)
+
+        return hook
+
+    def _mark_started(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        if job is None or job.state in TERMINAL_STATES:
+            return
+        job.state = JobState.RUNNING
+        job.stage = "extracting"
+        job.updated_at = time.time()
+        self.store.save(job)
+
+    def _postprocessor_hook(self, job_id: str):
+        def hook(status: Dict[str, Any]) -> None:
+            if status.get("status") != "started":
+                return
+            job = self.store.get(job_id)
+            if job is None or job.state in TERMINAL_STATES:
+                return
+            job.stage = "postprocessing"
+            job.updated_at = time.time()
+            self.store.save(job)
+
+        return hook
+
+    async def _run(self, job_id: str, cookies: Optional[str], auth_info: Optional[Dict[str, Any]]) -> None:
+        job = self.store.get(job_id)
+        cancel_event = self._cancel_events[job_id]
+        try:
+            result = await self.download_service.download_video(
+                job.url,
+                job.format_string,
+                platform=job.platform,
+                cookies=cookies,
+                auth_info=auth_info,
+                progress_hooks=[self._progress_hook(job_id, cancel_event)],
+                postprocessor_hooks=[self._postprocessor_hook(job_id)],
+                on_start=lambda: self._mark_started(job_id),
+                priority=PRIORITY_BULK,
+                container=job.container,
+                transcode=job.transcode,
+                clip=tuple(job.clip) if job.clip else None,
+            )
+        except asyncio.CancelledError:
+            logger.info(f"Job {job_id} cancelled before it started")
+            return
+        except Exception as e:
+            job = self.store.get(job_id)
+            if job is not None and job.state not in TERMINAL_STATES:
+                logger.error(f"Job {job_id} failed: {e}")
+                self._finish(job, JobState.FAILED, error=str(e))
+            return
+        finally:
+            self._tasks.pop(job_id, None)
+            self._cancel_events.pop(job_id, None)
+
+        artifact = self.download_service.register_result(result, retention=self.result_ttl)
+        job = self.store.get(job_id)
+        if job is None or job.state == JobState.CANCELLED:
+            self.download_service.artifacts.expire(artifact.id)
+            return
+
+        job.title = result.get("title")
+        job.filename = result["filename"]
+        job.content_type = result["content_type"]
+        job.postprocess_seconds = result.get("postprocess_seconds")
+        job.artifact_id = artifact.id
+        job.stage = None
+        job.percent = 100.0
+        if job.total_bytes is None:
+            job.total_bytes = job.downloaded_bytes
+        self._finish(job, JobState.COMPLETED)
+        logger.info(f"Job {job_id} completed: {result['filename']}")
+
+    def _ensure_gc(self) -> None:
+        if self._gc_task is None or self._gc_task.done():
+            self._gc_task = asyncio.create_task(self._gc_loop())
+
+    async def _gc_loop(self) -> None:
+        interval = max(min(self.result_ttl / 4, 60), 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.collect_garbage()
+            except Exception as e:
+                logger.error(f"Job garbage collection failed: {e}")
+            if not self.store.list():
+                # Restarted by the next submit
+                return
+
+    def collect_garbage(self) -> int:
+        """Drop finished jobs (and their artifacts) older than the result TTL."""
+        cutoff = time.time() - self.result_ttl
+        removed = 0
+        for job in self.store.list():
+            if job.state in TERMINAL_STATES and job.finished_at and job.finished_at < cutoff:
+                self.download_service.artifacts.expire(job.artifact_id)
+                self.store.delete(job.id)
+                removed += 1
+        if removed:
+            logger.info(f"Garbage collected {removed} finished jobs")
+        return removed
@@ -0,0 +1,283 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cached files are named after the digest of their media key
+CACHE_FILE_RE = re.compile(r"^[0-9a-f]{32}\.\w+$")
+
+
+def make_media_key(extractor_key: Optional[str], video_id: Optional[str], format_id: Optional[str], container: str) -> Optional[str]:
+    """Identify downloaded media by what was fetched, not by the URL that asked for it."""
+    if not (extractor_key and video_id and format_id):
+        return None
+    return f"{extractor_key}:{video_id}:{format_id}:{container}"
+
+
+def make_request_key(request_key: tuple) -> str:
+    return "|".join(str(part or "") for part in request_key)
+
+
+@dataclass
+class MediaEntry:
+    key: str
+    filename: str
+    size: int
+    title: Optional[str] = None
+    created_at: float = 0.0
+    last_access: float = 0.0
+    hits: int = 0
+
+
+class MediaCache:
+    """Content-addressed cache of finished downloads with a size budget.
+
+    Entries are keyed by extractor, video id, resolved format ids and output
+    container. Requests are mapped onto entries through aliases (normalized
+    URL, platform, cookie digest and format string) so a repeat request can be
+    served without running yt-dlp at all. Files are moved in with an atomic
+    rename and the index is persisted next to them so the cache survives
+    restarts. Evicts by least recent use ("lru") or fewest hits ("lfu").
+
+    Hits only update access times in memory; the index is written when
+    entries or aliases change, and by `flush` at shutdown. Files handed out
+    as artifacts are pinned until the artifact is gone, and eviction skips
+    them so a response or a resumed Range request never loses its file.
+    """
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, directory: str, max_bytes: int, policy: str = "lru"):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._entries: Dict[str, MediaEntry] = {}
+        self._aliases: Dict[str, str] = {}
+        # Filename -> artifacts still serving it
+        self._pins: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.enabled:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.size for entry in self._entries.values())
+
+    def path_for(self, entry: MediaEntry) -> Path:
+        return self.directory / entry.filename
+
+    def _load(self) -> None:
+        index_path = self.directory / self.INDEX_NAME
+        try:
+            with open(index_path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = {}
+        except Exception as e:
+            logger.warning(f"Media cache index is unreadable, starting empty: {e}")
+            data = {}
+
+        for raw in data.get("entries", []):
+            entry = MediaEntry(**raw)
+            try:
+                if os.path.getsize(self.path_for(entry)) == entry.size:
+                    self._entries[entry.key] = entry
+            except OSError:
+                pass
+        self._aliases = {
+            alias: key for alias, key in data.get("aliases", {}).items() if key in self._entries
+        }
+
+        # Drop half-written files and files the index no longer knows about
+        known = {entry.filename for entry in self._entries.values()}
+        for path in self.directory.iterdir():
+            if path.name.endswith(".tmp") or (CACHE_FILE_RE.match(path.name) and path.name not in known):
+                path.unlink(missing_ok=True)
+
+        logger.info(f"Loaded media cache with {len(self._entries)} entries ({self.total_bytes} bytes)")
+        self._evict()
+
+    def _save(self) -> None:
+        data = {
+            "entries": [asdict(entry) for entry in self._entries.values()],
+            "aliases": self._aliases,
+        }
+        tmp = self.directory / f"{self.INDEX_NAME}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.directory / self.INDEX_NAME)
+        except Exception as e:
+            logger.error(f"Failed to save media cache index: {e}")
+            tmp.unlink(missing_ok=True)
+        else:
+            self._dirty = False
+
+    def flush(self) -> None:
+        """Persist access times recorded since the index was last written."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _touch(self, entry: MediaEntry) -> Optional[MediaEntry]:
+        if not self.path_for(entry).exists():
+            # Removed behind our back
+            self._remove(entry)
+            self._save()
+            return None
+        entry.hits += 1
+        entry.last_access = time.time()
+        self.hits += 1
+        self._dirty = True
+        return entry
+
+    def pin(self, path: str) -> None:
+        """Keep a cached file on disk while an artifact points at it."""
+        with self._lock:
+            name = Path(path).name
+            self._pins[name] = self._pins.get(name, 0) + 1
+
+    def unpin(self, path: str) -> None:
+        with self._lock:
+            name = Path(path).name
+            count = self._pins.get(name, 0) - 1
+            if count > 0:
+                self._pins[name] = count
+                return
+            self._pins.pop(name, None)
+            # Eviction may have skipped this file while it was pinned
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+                self._save()
+
+    def get(self, media_key: Optional[str]) -> Optional[MediaEntry]:
+        if not self.enabled or not media_key:
+            return None
+        with self._lock:
+            entry = self._entries.get(media_key)
+            if entry is None:
+                return None
+            return self._touch(entry)
+
+    def get_alias(self, request_key: tuple) -> Optional[MediaEntry]:
+        """Look up the media a previous identical request resolved to."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            key = self._aliases.get(make_request_key(request_key))
+            entry = self._entries.get(key) if key else None
+            if entry is None:
+                return None
+            return self._touch(entry)
+
+    def has_alias(self, request_key: tuple) -> bool:
+        with self._lock:
+            return self._aliases.get(make_request_key(request_key)) in self._entries
+
+    def add_alias(self, request_key: tuple, media_key: str) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if media_key in self._entries:
+                self._aliases[make_request_key(request_key)] = media_key
+                self._save()
+
+    def put(self, media_key: Optional[str], src: str, title: Optional[str] = None, pin: bool = False) -> Optional[MediaEntry]:
+        """Move a finished download into the cache; returns None if it wasn't cached.
+
+        With `pin` the entry is pinned before anything can evict it; the caller owes an `unpin`.
+        """
+        if not self.enabled or not media_key:
+            return None
+        # Every download that reaches the cache is one we couldn't serve from it
+        self.misses += 1
+        size = os.path.getsize(src)
+        if size > self.max_bytes:
+            logger.info(f"Not caching {src}: {size} bytes exceeds the cache budget")
+            return None
+
+        suffix = Path(src).suffix
+        filename = hashlib.sha256(media_key.encode()).hexdigest()[:32] + suffix
+        final = self.directory / filename
+        try:
+            try:
+                os.replace(src, final)
+            except OSError:
+                # Different filesystem: copy next to the target, then rename into place
+                tmp = self.directory / f"{filename}.{uuid.uuid4().hex[:8]}.tmp"
+                shutil.copyfile(src, tmp)
+                os.replace(tmp, final)
+                os.unlink(src)
+        except Exception as e:
+            logger.error(f"Failed to move {src} into the media cache: {e}")
+            return None
+
+        now = time.time()
+        entry = MediaEntry(key=media_key, filename=filename, size=size, title=title, created_at=now, last_access=now)
+        with self._lock:
+            self._entries[media_key] = entry
+            if pin:
+                self._pins[filename] = self._pins.get(filename, 0) + 1
+            self._evict(keep=media_key)
+            self._save()
+        logger.info(f"Cached {media_key} ({size} bytes) as {filename}")
+        return entry
+
+    def _remove(self, entry: MediaEntry) -> None:
+        self._entries.pop(entry.key, None)
+        self._aliases = {alias: key for alias, key in self._aliases.items() if key != entry.key}
+        self.path_for(entry).unlink(missing_ok=True)
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        total = self.total_bytes
+        if total <= self.max_bytes:
+            return
+        if self.policy == "lfu":
+            order = sorted(self._entries.values(), key=lambda e: (e.hits, e.last_access))
+        else:
+            order = sorted(self._entries.values(), key=lambda e: e.last_access)
+        for entry in order:
+            if total <= self.max_bytes:
+                break
+            if entry.key == keep or entry.filename in self._pins:
+                continue
+            total -= entry.size
+            self._remove(entry)
+            self.evictions += 1
+            logger.info(f"Evicted {entry.key} from the media cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "policy": self.policy,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,182 @@
+"""
+Multi-connection downloads for large progressive HTTP files.
+
+ParallelHttpFD takes the place of yt-dlp's default HttpFD. When a format is a
+plain HTTP(S) file of at least `parallel_min_size` bytes and the server answers
+a one-byte Range probe with 206, the file is preallocated and split into byte
+ranges that `parallel_connections` threads fetch and write in place. Anything
+else, including servers without Range support, goes through the stock
+single-stream HttpFD. HLS/DASH fragments are fetched concurrently by yt-dlp
+itself through `concurrent_fragment_downloads`.
+
+`parallel_connections` and `parallel_min_size` are our YoutubeDL params, not
+yt-dlp's. This module imports yt-dlp, so only import it lazily.
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional, Tuple
+
+import yt_dlp.downloader
+from yt_dlp.downloader.http import HttpFD
+from yt_dlp.networking import Request
+from yt_dlp.networking.exceptions import RequestError
+from yt_dlp.utils import DownloadError
+
+CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+READ_SIZE = 1024 * 1024
+# Ranges smaller than this aren't worth a request of their own
+MIN_PART_SIZE = 1024 * 1024
+PROGRESS_INTERVAL = 0.5
+
+
+class _Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, amount: int) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class ParallelHttpFD(HttpFD):
+    def real_download(self, filename: str, info_dict: Dict[str, Any]) -> bool:
+        connections = self.params.get("parallel_connections") or 1
+        if (
+            connections > 1
+            and filename != "-"
+            and not self.params.get("test")
+            and not info_dict.get("is_live")
+            and info_dict.get("protocol") in ("http", "https")
+        ):
+            size = self._probe_size(info_dict)
+            if size and size >= self.params.get("parallel_min_size", 0):
+                return self._download_ranges(filename, info_dict, size, connections)
+        return super().real_download(filename, info_dict)
+
+    def _probe_size(self, info_dict: Dict[str, Any]) -> Optional[int]:
+        """Return the file size if the server honours Range requests."""
+        headers = dict(info_dict.get("http_headers") or {}, Range="bytes=0-0")
+        try:
+            with self.ydl.urlopen(Request(info_dict["url"], headers=headers)) as response:
+                match = CONTENT_RANGE_RE.match(response.headers.get("Content-Range") or "")
+                if response.status != 206 or not match:
+                    return None
+                return int(match.group(3))
+        except RequestError as e:
+            self.to_screen(f"[parallel] Range probe failed, using a single connection: {e}")
+            return None
+
+    def _plan(self, info_dict: Dict[str, Any], size: int, connections: int) -> list:
+        # A couple of parts per connection so one slow range doesn't hold up the end
+        part = max(-(-size // (connections * 2)), MIN_PART_SIZE)
+        # Sites that throttle long ranges (YouTube) ask for bounded chunks
+        chunk_size = (info_dict.get("downloader_options") or {}).get("http_chunk_size")
+        if chunk_size:
+            part = min(part, chunk_size)
+        return [(start, min(start + part, size) - 1) for start in range(0, size, part)]
+
+    def _download_ranges(self, filename: str, info_dict: Dict[str, Any], size: int, connections: int) -> bool:
+        tmpfilename = self.temp_name(filename)
+        ranges = self._plan(info_dict, size, connections)
+        connections = min(connections, len(ranges))
+        self.to_screen(f"[parallel] Downloading {size} bytes in {len(ranges)} ranges over {connections} connections")
+
+        url = info_dict["url"]
+        headers = info_dict.get("http_headers") or {}
+        downloaded = _Counter()
+        stop = threading.Event()
+        started = time.time()
+
+        fd = os.open(tmpfilename, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            _preallocate(fd, size)
+            with ThreadPoolExecutor(connections, thread_name_prefix="range-download") as executor:
+                pending = [
+                    executor.submit(self._fetch_range, url, headers, fd, span, downloaded, stop)
+                    for span in ranges
+                ]
+                try:
+                    while pending:
+                        done, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_EXCEPTION)
+                        for future in done:
+                            future.result()
+                        now = time.time()
+                        self._hook_progress({
+                            "status": "downloading",
+                            "downloaded_bytes": downloaded.value,
+                            "total_bytes": size,
+                            "tmpfilename": tmpfilename,
+                            "filename": filename,
+                            "elapsed": now - started,
+                            "speed": self.calc_speed(started, now, downloaded.value),
+                            "eta": self.calc_eta(started, now, size, downloaded.value),
+                        }, info_dict)
+                except BaseException:
+                    # Includes DownloadCancelled raised by a progress hook
+                    stop.set()
+                    raise
+        except BaseException:
+            os.close(fd)
+            # The file has holes; there is nothing to resume from
+            self.try_remove(tmpfilename)
+            raise
+        os.close(fd)
+
+        self.try_rename(tmpfilename, filename)
+        self._hook_progress({
+            "status": "finished",
+            "downloaded_bytes": size,
+            "total_bytes": size,
+            "filename": filename,
+            "elapsed": time.time() - started,
+        }, info_dict)
+        return True
+
+    def _fetch_range(
+        self, url: str, headers: Dict[str, str], fd: int, span: Tuple[int, int], downloaded: _Counter, stop: threading.Event
+    ) -> None:
+        """Fetch one byte range into place, resuming from where a failed attempt stopped."""
+        pos, end = span
+        retries = self.params.get("retries", 10)
+        attempts = 0
+        while pos <= end and not stop.is_set():
+            try:
+                request = Request(url, headers=dict(headers, Range=f"bytes={pos}-{end}"))
+                with self.ydl.urlopen(request) as response:
+                    if response.status != 206:
+                        raise DownloadError(f"Server ignored Range request (HTTP {response.status})")
+                    while pos <= end and not stop.is_set():
+                        block = response.read(min(READ_SIZE, end - pos + 1))
+                        if not block:
+                            break
+                        os.pwrite(fd, block, pos)
+                        pos += len(block)
+                        downloaded.add(len(block))
+                if pos > end or stop.is_set():
+                    return
+                error = "connection closed early"
+            except RequestError as e:
+                error = e
+            attempts += 1
+            if attempts > retries:
+                raise DownloadError(f"Giving up on bytes {pos}-{end} after {retries} retries: {error}")
+            self.to_screen(f"[parallel] Retrying bytes {pos}-{end} ({attempts}/{retries}): {error}")
+            time.sleep(min(attempts, 5))
+
+
+def _preallocate(fd: int, size: int) -> None:
+    try:
+        os.posix_fallocate(fd, 0, size)
+    except (AttributeError, OSError):
+        # Not available on every platform/filesystem; a sparse file works too
+        os.ftruncate(fd, size)
+
+
+def install() -> None:
+    """Make ParallelHttpFD yt-dlp's default downloader for HTTP(S) formats."""
+    yt_dlp.downloader.HttpFD = ParallelHttpFD
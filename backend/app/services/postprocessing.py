@@ -0,0 +1,38 @@
+"""
+Output containers and the yt-dlp postprocessing that gets a download into one.
+
+Format strings prefer codecs that fit the target container (H.264 + AAC for
+mp4, AAC for m4a), so merging is a `-c copy` and anything else is remuxed
+with FFmpegVideoRemuxer, which also stream-copies. FFmpegVideoConvertor and
+FFmpegExtractAudio, which re-encode whatever doesn't already fit, are only
+used when a request allows it with `transcode`.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+
+def output_key(container: str, transcode: bool = False, clip: Optional[Tuple[float, Optional[float]]] = None) -> str:
+    """Output label for cache keys; transcoded output and clips are different media."""
+    key = f"{container}-transcoded" if transcode else container
+    if clip is not None:
+        start, end = clip
+        key += f"@{start:g}-{'end' if end is None else f'{end:g}'}"
+    return key
+
+
+def postprocess_opts(container: str = "mp4", transcode: bool = False) -> Dict[str, Any]:
+    """yt-dlp options that produce `container`, stream-copying unless `transcode` is set."""
+    if container == "m4a":
+        if transcode:
+            postprocessor = {"key": "FFmpegExtractAudio", "preferredcodec": "m4a"}
+        else:
+            postprocessor = {"key": "FFmpegVideoRemuxer", "preferedformat": "m4a"}
+        return {"postprocessors": [postprocessor]}
+
+    return {
+        "merge_output_format": container,
+        "postprocessors": [{
+            "key": "FFmpegVideoConvertor" if transcode else "FFmpegVideoRemuxer",
+            "preferedformat": container,
+        }],
+    }
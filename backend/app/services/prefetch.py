@@ -0,0 +1,162 @@
+"""
+Speculative extraction for pages the user is likely to download from.
+
+The extension posts the URL of a video page as soon as it's opened, and the
+extraction runs at the lowest priority so that the /info and /start calls that
+follow find the info dict already cached (and yt-dlp's connections to the
+origin already open). Prefetches are best-effort by design:
+
+* at most PREFETCH_MAX_CONCURRENCY run or wait for a slot at once; more are
+  dropped rather than queued,
+* each client has one current prefetch; opening another page cancels the
+  previous one if it hasn't reached yt-dlp yet,
+* a real request for the same URL joins a prefetch that is already extracting
+  and cancels one that is still waiting, so it never queues behind it.
+
+Only touched from the event loop thread.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class _Prefetch:
+    __slots__ = ("key", "clients", "task", "started")
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.clients: Set[str] = set()
+        self.task: Optional[asyncio.Task] = None
+        # Set once the extraction holds a worker slot; from then on it can't be stopped
+        self.started = False
+
+
+class Prefetcher:
+    def __init__(self, max_concurrency: int = 2):
+        self.max_concurrency = max_concurrency
+        self._by_key: Dict[Hashable, _Prefetch] = {}
+        self._by_client: Dict[str, _Prefetch] = {}
+        self.started = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.cancelled = 0
+        self.completed = 0
+        self.failed = 0
+        self.joined = 0
+
+    @classmethod
+    def from_settings(cls, settings) -> "Prefetcher":
+        return cls(max_concurrency=settings.PREFETCH_MAX_CONCURRENCY)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrency > 0
+
+    def submit(self, client: str, key: Hashable, run: Callable[[Callable[[], None]], Awaitable[Any]]) -> str:
+        """Start `run(mark_started)` in the background unless it's redundant or over budget.
+
+        `run` must call `mark_started` once it holds its worker slot. Returns
+        "started", "in_flight" (already being prefetched) or "busy" (dropped).
+        """
+        previous = self._by_client.get(client)
+        if previous is not None and previous.key != key:
+            self._detach(client, previous)
+
+        prefetch = self._by_key.get(key)
+        if prefetch is not None:
+            prefetch.clients.add(client)
+            self._by_client[client] = prefetch
+            self.deduplicated += 1
+            return "in_flight"
+
+        if len(self._by_key) >= self.max_concurrency:
+            self.dropped += 1
+            return "busy"
+
+        prefetch = _Prefetch(key)
+        prefetch.clients.add(client)
+        self._by_key[key] = prefetch
+        self._by_client[client] = prefetch
+        prefetch.task = asyncio.create_task(self._run(prefetch, run))
+        self.started += 1
+        return "started"
+
+    def _detach(self, client: str, prefetch: _Prefetch) -> None:
+        """The client moved on; cancel its prefetch if nobody else wants it and it hasn't started."""
+        prefetch.clients.discard(client)
+        if self._by_client.get(client) is prefetch:
+            del self._by_client[client]
+        if not prefetch.clients and not prefetch.started:
+            logger.info("Cancelling a stale prefetch that was still waiting for a slot")
+            self._cancel(prefetch)
+
+    def _cancel(self, prefetch: _Prefetch) -> None:
+        # Forget it right away: a task cancelled before its first step never reaches _run's cleanup
+        self._forget(prefetch)
+        if not prefetch.task.done():
+            prefetch.task.cancel()
+            self.cancelled += 1
+
+    def _forget(self, prefetch: _Prefetch) -> None:
+        if self._by_key.get(prefetch.key) is prefetch:
+            del self._by_key[prefetch.key]
+        for client in prefetch.clients:
+            if self._by_client.get(client) is prefetch:
+                del self._by_client[client]
+
+    async def _run(self, prefetch: _Prefetch, run: Callable[[Callable[[], None]], Awaitable[Any]]) -> None:
+        def mark_started() -> None:
+            prefetch.started = True
+
+        try:
+            await run(mark_started)
+            self.completed += 1
+        except Exception as e:
+            # Permanent errors are in the negative cache; the real request reports them
+            self.failed += 1
+            logger.info(f"Prefetch failed: {e}")
+        finally:
+            self._forget(prefetch)
+
+    async def join(self, key: Hashable) -> bool:
+        """Let a real request take over a prefetch of `key`.
+
+        Waits for a prefetch that is already extracting and returns True once
+        it's done (its result is in the info cache unless it failed). One still
+        waiting for a slot is cancelled instead, since the caller's own
+        extraction is queued ahead of it; returns False then, or if there was
+        no prefetch.
+        """
+        prefetch = self._by_key.get(key)
+        if prefetch is None:
+            return False
+        if not prefetch.started:
+            self._cancel(prefetch)
+            return False
+
+        self.joined += 1
+        logger.info("Joining an in-flight prefetch")
+        try:
+            await asyncio.shield(prefetch.task)
+        except asyncio.CancelledError:
+            if not prefetch.task.cancelled():
+                raise
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": len(self._by_key),
+            "extracting": sum(1 for p in self._by_key.values() if p.started),
+            "started": self.started,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+            "cancelled": self.cancelled,
+            "completed": self.completed,
+            "failed": self.failed,
+            "joined": self.joined,
+        }
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import multiprocessing
+import queue as queue_module
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from . import ydl_worker
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessRunner:
+    """Runs ydl_worker functions in a pool of long-lived worker processes.
+
+    Workers are spawned (not forked, so they don't inherit the event loop or
+    open sockets), pre-import yt-dlp and its extractors, and are recycled by
+    rotating to a fresh pool once any worker reports it has served
+    `max_jobs_per_worker` jobs or crossed `max_worker_memory_mb` of peak RSS.
+    In-flight jobs on the old pool are allowed to finish.
+    """
+
+    def __init__(self, size: int, max_jobs_per_worker: int = 50, max_worker_memory_mb: int = 512):
+        self.size = max(size, 1)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_worker_memory_mb = max_worker_memory_mb
+        self._context = multiprocessing.get_context("spawn")
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._lock = threading.Lock()
+        self.jobs = 0
+        self.recycles = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                logger.info(f"Starting yt-dlp process pool with {self.size} workers")
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    mp_context=self._context,
+                    initializer=ydl_worker.init_worker,
+                )
+            return self._executor
+
+    def _get_manager(self):
+        with self._lock:
+            if self._manager is None:
+                self._manager = self._context.Manager()
+            return self._manager
+
+    def _rotate(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is not executor:
+                return  # Someone else already rotated this pool
+            self._executor = None
+            self.recycles += 1
+        logger.info("Recycling yt-dlp worker processes")
+        executor.shutdown(wait=False)
+
+    def warm_up(self) -> None:
+        """Spawn every worker now so the first requests don't pay for the import."""
+        executor = self._get_executor()
+        for _ in range(self.size):
+            executor.submit(ydl_worker.init_worker)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            manager, self._manager = self._manager, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if manager is not None:
+            manager.shutdown()
+
+    def _relay(self, events, cancel_event, done: threading.Event, hooks: Dict[str, List[Callable]]) -> None:
+        """Forward worker progress events to the caller's hooks on a parent thread."""
+        while True:
+            try:
+                kind, payload = events.get(timeout=0.1)
+            except queue_module.Empty:
+                if done.is_set():
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            for hook in hooks.get(kind, []):
+                try:
+                    hook(payload)
+                except Exception as e:
+                    # Parent hooks raise (e.g. DownloadCancelled) to stop the download
+                    logger.info(f"Hook requested cancellation: {e}")
+                    cancel_event.set()
+
+    async def run(
+        self,
+        func_name: str,
+        *args,
+        progress_hooks: Optional[List[Callable]] = None,
+        postprocessor_hooks: Optional[List[Callable]] = None,
+    ) -> Any:
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+
+        events = cancel_event = relay = None
+        done = threading.Event()
+        if progress_hooks or postprocessor_hooks:
+            manager = self._get_manager()
+            events, cancel_event = manager.Queue(), manager.Event()
+            relay = threading.Thread(
+                target=self._relay,
+                args=(events, cancel_event, done,
+                      {"progress": progress_hooks or [], "postprocessor": postprocessor_hooks or []}),
+                daemon=True,
+            )
+            relay.start()
+
+        try:
+            outcome = await loop.run_in_executor(
+                executor, ydl_worker.run_in_worker, func_name, args,
+                self.max_jobs_per_worker, self.max_worker_memory_mb, events, cancel_event,
+            )
+        except asyncio.CancelledError:
+            if cancel_event is not None:
+                cancel_event.set()
+            raise
+        finally:
+            done.set()
+            if relay is not None:
+                await asyncio.to_thread(relay.join)
+
+        self.jobs += 1
+        if outcome.get("recycle"):
+            self._rotate(executor)
+
+        error = outcome.get("error")
+        if error:
+            from yt_dlp.utils import DownloadCancelled, DownloadError
+
+            if error["type"] == "DownloadCancelled":
+                raise DownloadCancelled(error["message"])
+            if error["type"] == "DownloadError":
+                raise DownloadError(error["message"])
+            raise Exception(error["message"])
+        return outcome["result"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "jobs": self.jobs,
+            "recycles": self.recycles,
+            "max_jobs_per_worker": self.max_jobs_per_worker,
+            "max_worker_memory_mb": self.max_worker_memory_mb,
+        }
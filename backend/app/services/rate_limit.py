@@ -0,0 +1,169 @@
+"""
+Adaptive per-platform, per-host rate limiting for yt-dlp work.
+
+Every extraction or download takes a token from the bucket for its platform
+and origin host before it starts. Under budget that costs nothing; only when
+a bucket runs dry does the caller wait for the next token. The refill rate
+adapts AIMD-style: each success adds a little back (up to the platform's
+ceiling), and a throttling error (HTTP 429, YouTube's bot check) halves it and
+empties the bucket, so the next request waits instead of piling on.
+
+All state lives on the event loop thread, so no locking is needed.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# classify_ytdlp_error classes that mean the origin wants us to slow down
+THROTTLE_ERROR_CLASSES = {"rate_limited", "bot_check"}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, min_rate: float, increase: float, decrease: float):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.last_backoff = 0.0
+
+        # Metrics
+        self.acquired = 0
+        self.delayed = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.tokens + (now - self.updated) * self.rate, self.burst)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it (0 while under budget)."""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        self.acquired += 1
+        if self.tokens >= 0:
+            return 0.0
+        # Tokens go negative so later callers queue up behind this one
+        wait = -self.tokens / self.rate
+        self.delayed += 1
+        self.total_wait += wait
+        return wait
+
+    def on_success(self) -> None:
+        self.rate = min(self.rate + self.increase, self.max_rate)
+
+    def on_throttle(self) -> None:
+        now = time.monotonic()
+        self.throttled += 1
+        # Requests already in flight when the first 429 came back don't count again
+        if now - self.last_backoff < 1 / self.rate:
+            return
+        self.last_backoff = now
+        self._refill(now)
+        self.rate = max(self.rate * self.decrease, self.min_rate)
+        self.tokens = min(self.tokens, 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill(time.monotonic())
+        return {
+            "rate": round(self.rate, 3),
+            "max_rate": self.max_rate,
+            "tokens": round(self.tokens, 2),
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "throttled": self.throttled,
+            "total_wait_seconds": round(self.total_wait, 3),
+        }
+
+
+class RateLimiter:
+    """Token buckets keyed by (platform, origin host)."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        rate: float = 2.0,
+        burst: float = 5.0,
+        min_rate: float = 0.05,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        platform_rates: Optional[Dict[str, float]] = None,
+    ):
+        self.enabled = enabled
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.platform_rates = platform_rates or {}
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    @classmethod
+    def from_settings(cls, settings) -> "RateLimiter":
+        return cls(
+            enabled=settings.RATE_LIMIT_ENABLED,
+            rate=settings.RATE_LIMIT_RPS,
+            burst=settings.RATE_LIMIT_BURST,
+            min_rate=settings.RATE_LIMIT_MIN_RPS,
+            increase=settings.RATE_LIMIT_INCREASE,
+            decrease=settings.RATE_LIMIT_DECREASE,
+            platform_rates=settings.platform_rate_limits,
+        )
+
+    @staticmethod
+    def _key(platform: Optional[str], url: str) -> Tuple[str, str]:
+        host = (urlparse(url).hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        return str(getattr(platform, "value", platform) or "unknown"), host
+
+    def _bucket(self, platform: Optional[str], url: str) -> TokenBucket:
+        key = self._key(platform, url)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate = self.platform_rates.get(key[0], self.rate)
+            bucket = self._buckets[key] = TokenBucket(rate, self.burst, self.min_rate, self.increase, self.decrease)
+        return bucket
+
+    async def acquire(self, platform: Optional[str], url: str) -> float:
+        """Wait until a request to `url` fits the budget; returns the time waited."""
+        if not self.enabled:
+            return 0.0
+        wait = self._bucket(platform, url).reserve()
+        if wait > 0:
+            logger.info(f"Rate limiting {platform} ({self._key(platform, url)[1]}): waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+        return wait
+
+    def record(self, platform: Optional[str], url: str, error_class: Optional[str] = None) -> None:
+        """Feed back the outcome of a request; `error_class` is from classify_ytdlp_error."""
+        if not self.enabled:
+            return
+        bucket = self._bucket(platform, url)
+        if error_class is None:
+            bucket.on_success()
+        elif error_class in THROTTLE_ERROR_CLASSES:
+            bucket.on_throttle()
+            logger.warning(
+                f"{platform} is throttling us ({error_class}); rate for "
+                f"{self._key(platform, url)[1]} is now {bucket.rate:.2f}/s"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "buckets": [
+                {"platform": platform, "host": host, **bucket.stats()}
+                for (platform, host), bucket in sorted(self._buckets.items())
+            ],
+        }
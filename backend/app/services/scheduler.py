@@ -0,0 +1,218 @@
+import asyncio
+import bisect
+import contextvars
+import itertools
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0   # /info, the user is looking at the popup
+PRIORITY_DOWNLOAD = 10     # /start, a user is waiting on the response
+PRIORITY_BULK = 20         # background jobs and batches
+PRIORITY_PREFETCH = 30     # speculative extractions nobody is waiting on yet
+
+
+class QueueFull(Exception):
+    """Raised when a pool's wait queue is full; maps to HTTP 429."""
+
+    def __init__(self, pool: str, retry_after: int):
+        super().__init__(f"The {pool} queue is full, please retry in {retry_after} seconds")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class WorkPool:
+    """A bounded worker pool with a priority wait queue and per-platform caps.
+
+    Admission is decided on the event loop; the actual yt-dlp work runs on the
+    pool's own thread executor so it never competes with other pools (or with
+    the default executor Starlette uses for sync endpoints).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        platform_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.name = name
+        self.max_workers = max(max_workers, 1)
+        self.max_queue = max_queue
+        self.platform_limits = platform_limits or {}
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"ufd-{name}")
+
+        self._active = 0
+        self._active_by_platform: Counter = Counter()
+        self._waiters: List[Tuple[int, int, Optional[str], asyncio.Future]] = []
+        self._seq = itertools.count()
+
+        # Metrics
+        self.acquired = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.avg_service_time = 0.0
+
+    def _platform_limit(self, platform: Optional[str]) -> int:
+        return self.platform_limits.get(platform, self.max_workers)
+
+    def _can_start(self, platform: Optional[str]) -> bool:
+        return (
+            self._active < self.max_workers
+            and self._active_by_platform[platform] < self._platform_limit(platform)
+        )
+
+    def _start(self, platform: Optional[str]) -> None:
+        self._active += 1
+        self._active_by_platform[platform] += 1
+
+    def retry_after(self) -> int:
+        """Rough estimate of how long until a queued request would start."""
+        per_slot = self.avg_service_time or 5.0
+        return max(int(per_slot * (len(self._waiters) + 1) / self.max_workers), 1)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def check_capacity(self) -> None:
+        """Raise QueueFull if a new request would be rejected right now."""
+        if len(self._waiters) >= self.max_queue and self._active >= self.max_workers:
+            self.rejected += 1
+            raise QueueFull(self.name, self.retry_after())
+
+    async def acquire(self, platform: Optional[str] = None, priority: int = PRIORITY_DOWNLOAD) -> float:
+        """Wait for a worker slot and return how long we waited."""
+        platform = getattr(platform, "value", platform)
+        if self._can_start(platform) and not self._waiters:
+            self._start(platform)
+            self.acquired += 1
+            return 0.0
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(self.name, self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), platform, waiter)
+        bisect.insort(self._waiters, entry, key=lambda e: (e[0], e[1]))
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+            elif waiter.done() and not waiter.cancelled():
+                # The slot was granted just as we were cancelled; hand it back
+                self._finish(platform)
+            raise
+
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def release(self, platform: Optional[str] = None, service_time: Optional[float] = None) -> None:
+        platform = getattr(platform, "value", platform)
+        if service_time is not None:
+            self.completed += 1
+            # Exponential moving average, used for Retry-After estimates
+            self.avg_service_time = (
+                service_time if not self.avg_service_time
+                else 0.8 * self.avg_service_time + 0.2 * service_time
+            )
+        self._finish(platform)
+
+    def _finish(self, platform: Optional[str]) -> None:
+        self._active -= 1
+        self._active_by_platform[platform] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the highest-priority waiters whose platform is under its cap."""
+        for entry in list(self._waiters):
+            if self._active >= self.max_workers:
+                break
+            _, _, platform, waiter = entry
+            if waiter.done():
+                self._waiters.remove(entry)
+                continue
+            if not self._can_start(platform):
+                continue
+            self._waiters.remove(entry)
+            self._start(platform)
+            waiter.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, platform: Optional[str] = None, priority: int = PRIORITY_DOWNLOAD):
+        waited = await self.acquire(platform, priority)
+        metrics.POOL_WAIT_SECONDS.observe(waited, pool=self.name, platform=platform)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(platform, time.monotonic() - started)
+
+    async def to_thread(self, func: Callable, *args, **kwargs) -> Any:
+        """Run blocking work on this pool's executor (caller must hold a slot).
+
+        Like asyncio.to_thread, the work sees the caller's context variables (request ids in logs).
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, partial(ctx.run, func, *args, **kwargs))
+
+    async def run(self, func: Callable, *args, platform: Optional[str] = None, priority: int = PRIORITY_DOWNLOAD, **kwargs) -> Any:
+        async with self.slot(platform, priority):
+            return await self.to_thread(func, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        queued_by_platform = Counter(entry[2] for entry in self._waiters)
+        return {
+            "max_workers": self.max_workers,
+            "active": self._active,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "queued_by_platform": {str(k): v for k, v in queued_by_platform.items()},
+            "active_by_platform": {str(k): v for k, v in self._active_by_platform.items() if v},
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": round(self.total_wait / self.acquired, 3) if self.acquired else 0.0,
+            "max_wait_seconds": round(self.max_wait, 3),
+            "avg_service_seconds": round(self.avg_service_time, 3),
+        }
+
+
+class Scheduler:
+    """Separate pools for extraction (/info) and downloads (/start, jobs)."""
+
+    def __init__(self, extraction: WorkPool, downloads: WorkPool):
+        self.extraction = extraction
+        self.downloads = downloads
+
+    @classmethod
+    def from_settings(cls, settings) -> "Scheduler":
+        limits = settings.platform_concurrency_limits
+        return cls(
+            extraction=WorkPool("extraction", settings.MAX_CONCURRENT_EXTRACTIONS, settings.MAX_QUEUED_EXTRACTIONS, limits),
+            downloads=WorkPool("downloads", settings.MAX_CONCURRENT_DOWNLOADS, settings.MAX_QUEUED_DOWNLOADS, limits),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "extraction": self.extraction.stats(),
+            "downloads": self.downloads.stats(),
+        }
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    __slots__ = ("task", "waiters", "on_abandon")
+
+    def __init__(self, task: asyncio.Task, on_abandon: Optional[Callable[[], None]]):
+        self.task = task
+        self.waiters = 0
+        self.on_abandon = on_abandon
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one running task.
+
+    Every caller awaits the same result (or exception). Callers that go away
+    don't cancel the shared work; when the last one leaves, `on_abandon` is
+    called (or the task is cancelled if none was given) and the key is freed
+    so the next request starts fresh.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def do(
+        self, key: Hashable, func: Callable[[], Awaitable[Any]],
+        on_abandon: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(func()), on_abandon)
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._done(key, flight))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"Joining in-flight work ({flight.waiters} already waiting)")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                logger.info("All waiters left, abandoning in-flight work")
+                self._forget(key, flight)
+                if flight.on_abandon is not None:
+                    flight.on_abandon()
+                else:
+                    flight.task.cancel()
+
+    def _done(self, key: Hashable, flight: _Flight) -> None:
+        self._forget(key, flight)
+        # Abandoned flights may fail with nobody awaiting them
+        if not flight.task.cancelled() and flight.task.exception() is not None and flight.waiters == 0:
+            logger.info(f"Abandoned work finished with: {flight.task.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressiveUnavailable(Exception):
+    """Raised when the selected format cannot be streamed while downloading."""
+
+
+async def wait_for_file(path: Path, task: asyncio.Future, poll_interval: float = 0.05) -> None:
+    """Wait until yt-dlp has created `path` or the download task has finished."""
+    while not path.exists() and not task.done():
+        await asyncio.sleep(poll_interval)
+
+
+async def tail_file(
+    path: Path,
+    task: asyncio.Future,
+    chunk_size: int = 64 * 1024,
+    poll_interval: float = 0.05,
+) -> AsyncIterator[bytes]:
+    """Yield bytes from a file that is still being written by a download task.
+
+    Reads until the task has finished and the file is drained. If the task
+    failed, the error is re-raised after the bytes written so far so the client
+    connection is aborted instead of ending with a silently truncated file.
+    """
+    await wait_for_file(path, task, poll_interval)
+    if not path.exists():
+        # The task finished without ever creating the file
+        await task
+        raise FileNotFoundError(f"Download finished but file was not created at {path}")
+
+    sent = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if chunk:
+                sent += len(chunk)
+                yield chunk
+                continue
+
+            if task.done():
+                # Drain anything written between the last read and completion
+                while chunk := await asyncio.to_thread(f.read, chunk_size):
+                    sent += len(chunk)
+                    yield chunk
+                break
+
+            await asyncio.sleep(poll_interval)
+
+    logger.info(f"Progressive stream finished after {sent} bytes")
+    # Surface download errors that happened mid-stream
+    await task
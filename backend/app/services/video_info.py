@@ -0,0 +1,129 @@
+"""
+Compact forms of a yt-dlp extraction result.
+
+A raw YouTube info dict runs to megabytes: every format carries its own copy
+of the request headers, storyboards list a fragment per sprite sheet, and
+subtitles, captions and the description ride along. Extraction results are
+projected as soon as extract_info returns, inside the worker:
+
+* `project_info` keeps only what a later process_ie_result needs to select
+  and download a format. Bulky top-level keys, storyboards and fields yt-dlp
+  recomputes are dropped, and identical header dicts are shared between
+  formats (pickling and copying preserve the sharing). Formats whose URL or
+  fragments yt-dlp computes lazily (live DASH) can't be sanitized or replayed,
+  so they are dropped, and results that had any are not cached.
+* `VideoSummary` is the /info response: title, thumbnail, duration and a
+  format table with one row per height, codec and container, best first.
+
+Like ydl_worker, this module must not import FastAPI or services.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Info keys that are large and never used by /info or a later process_ie_result
+BULKY_INFO_KEYS = {
+    "subtitles", "automatic_captions", "heatmap", "thumbnails", "description",
+    "chapters", "comments", "tags", "categories",
+}
+
+# Format keys yt-dlp fills in again while processing, only used for display
+DERIVED_FORMAT_KEYS = {"format", "resolution", "aspect_ratio"}
+
+
+def is_plain_format(f: Dict[str, Any]) -> bool:
+    """False when a format's URL or fragments are a callable, generator or LazyList rather than data."""
+    return isinstance(f.get("url", ""), str) and isinstance(f.get("fragments", []), (list, tuple))
+
+
+def project_info(info: Dict[str, Any]) -> Dict[str, Any]:
+    """Sanitize an info dict down to what format selection and a download need."""
+    import yt_dlp
+    if "formats" in info:
+        # sanitize_info would exhaust a lazy fragment list and turn a callable into its repr
+        info = dict(info, formats=[f for f in info["formats"] if is_plain_format(f)])
+    info = yt_dlp.YoutubeDL.sanitize_info(info, remove_private_keys=True)
+    projected = {k: v for k, v in info.items() if k not in BULKY_INFO_KEYS}
+    if "formats" not in info:
+        return projected
+
+    shared_headers: Dict[Tuple, Dict[str, str]] = {}
+    formats = []
+    for f in info["formats"]:
+        if f.get("vcodec") == "none" and f.get("acodec") == "none":
+            continue  # Storyboards and other image "formats"
+        f = {k: v for k, v in f.items() if k not in DERIVED_FORMAT_KEYS}
+        headers = f.get("http_headers")
+        if headers:
+            f["http_headers"] = shared_headers.setdefault(tuple(sorted(headers.items())), headers)
+        formats.append(f)
+    projected["formats"] = formats
+    return projected
+
+
+def _codec(codec: Optional[str]) -> Optional[str]:
+    """Codec family ("avc1", "vp9", "mp4a"); None when unknown or absent."""
+    if not codec or codec == "none":
+        return None
+    return codec.split(".")[0]
+
+
+@dataclass(slots=True)
+class FormatOption:
+    """A row of the /info format table: one per height, video codec and container."""
+    height: Optional[int]
+    vcodec: Optional[str]
+    acodec: Optional[str]
+    ext: Optional[str]
+    fps: Optional[float]
+    size: Optional[int]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "quality": f"{self.height}p" if self.height else "unknown",
+            "format": "video",
+            "height": self.height,
+            "vcodec": self.vcodec,
+            "acodec": self.acodec,
+            "ext": self.ext,
+            "fps": self.fps,
+            "size": self.size,
+        }
+
+
+@dataclass(slots=True)
+class VideoSummary:
+    title: str
+    thumbnail: Optional[str] = None
+    duration: Optional[float] = None
+    formats: List[FormatOption] = field(default_factory=list)
+
+    @classmethod
+    def from_info(cls, info: Dict[str, Any]) -> "VideoSummary":
+        rows: Dict[Tuple, FormatOption] = {}
+        for f in info.get("formats") or []:
+            if f.get("vcodec", "none") == "none":
+                continue  # Audio only, or a codec yt-dlp didn't report
+            height = f.get("height")
+            vcodec = _codec(f.get("vcodec"))
+            size = f.get("filesize") or f.get("filesize_approx")
+            key = (height, vcodec, f.get("ext"))
+            row = rows.get(key)
+            # Formats of the same height and codec differ in bitrate; keep the largest
+            if row is None or (size or 0) > (row.size or 0):
+                rows[key] = FormatOption(height, vcodec, _codec(f.get("acodec")), f.get("ext"), f.get("fps"), size)
+        formats = sorted(rows.values(), key=lambda r: (-(r.height or 0), -(r.size or 0)))
+        return cls(
+            title=info.get("title", "Unknown Title"),
+            thumbnail=info.get("thumbnail"),
+            duration=info.get("duration"),
+            formats=formats,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "title": self.title,
+            "thumbnail": self.thumbnail,
+            "duration": self.duration,
+            "formats": [f.to_dict() for f in self.formats],
+        }
@@ -0,0 +1,223 @@
+"""
+Pool of warm YoutubeDL instances, shared by ydl_worker in threads or worker processes.
+
+Building a YoutubeDL per request re-creates its HTTP handler stack and drops
+the extractor instances along with their open connections and player/signature
+caches. Instances here are keyed by the options that don't vary per request
+(platform extractor args, format, postprocessors, Docker/Render extras); the
+per-request options are swapped in on checkout.
+
+Swapping them relies on YoutubeDL internals, so pooling only runs on the yt-dlp
+release it was written against. On any other release, or if an internal it
+touches has gone, every checkout builds a fresh instance instead.
+"""
+
+import json
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .cookies import cookie_cache
+
+logger = logging.getLogger(__name__)
+
+# Options applied on every checkout instead of being baked into the instance.
+# `browser_cookies` is ours, not yt-dlp's: a (cookie header, platform) pair
+# loaded into the instance's cookie jar from memory.
+PER_REQUEST_OPTS = (
+    "http_headers", "cookiefile", "browser_cookies", "outtmpl", "progress_hooks", "postprocessor_hooks",
+    "download_ranges",
+)
+
+# The yt-dlp release whose internals _apply/_checkin were written against
+POOL_YTDLP_VERSION = "2025.03.31"
+# Private YoutubeDL attributes they read or reset
+PRIVATE_ATTRS = (
+    "_YoutubeDL__header_cookies", "_load_cookies", "_parse_outtmpl", "_progress_hooks",
+    "_postprocessor_hooks", "_pps", "_first_webpage_request", "_playlist_level", "_playlist_urls",
+)
+
+
+def profile_key(opts: Dict[str, Any]) -> str:
+    static = {k: v for k, v in opts.items() if k not in PER_REQUEST_OPTS}
+    return json.dumps(static, sort_keys=True, default=repr)
+
+
+class YoutubeDLPool:
+    """Idle YoutubeDL instances per option profile; each checkout has exclusive use."""
+
+    def __init__(self, max_idle_per_profile: int = 4, max_uses: int = 50):
+        self.max_idle_per_profile = max_idle_per_profile
+        self.max_uses = max_uses
+        self._idle: Dict[str, List[Any]] = defaultdict(list)
+        self._uses: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        # None until the first instance has been checked against POOL_YTDLP_VERSION/PRIVATE_ATTRS
+        self.enabled: Optional[bool] = None
+        self.created = 0
+        self.reused = 0
+
+    @contextmanager
+    def checkout(self, opts: Dict[str, Any]) -> Iterator[Any]:
+        import yt_dlp
+        from .parallel_download import install as install_parallel_download
+
+        install_parallel_download()
+        if self.enabled is False:
+            with self._fresh(opts) as ydl:
+                yield ydl
+            return
+
+        key = profile_key(opts)
+        with self._lock:
+            ydl = self._idle[key].pop() if self._idle[key] else None
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL({k: v for k, v in opts.items() if k not in PER_REQUEST_OPTS})
+            self.created += 1
+            if self.enabled is None:
+                self.enabled = self._supported(ydl)
+        else:
+            self.reused += 1
+
+        applied = False
+        if self.enabled:
+            try:
+                self._apply(ydl, opts)
+                applied = True
+            except AttributeError as e:
+                logger.warning(f"Disabling the YoutubeDL pool, could not reuse an instance: {e}")
+                self._disable()
+        if not applied:
+            # Fail closed: never run a request on a half-reset instance
+            ydl.close()
+            with self._fresh(opts) as ydl:
+                yield ydl
+            return
+
+        try:
+            yield ydl
+        finally:
+            self._checkin(key, ydl)
+
+    @contextmanager
+    def _fresh(self, opts: Dict[str, Any]) -> Iterator[Any]:
+        """A single-use instance built with the request's options, through public API only."""
+        import yt_dlp
+
+        params = {k: v for k, v in opts.items() if k != "browser_cookies"}
+        if not params.get("download_ranges"):
+            params.pop("download_ranges", None)
+        ydl = yt_dlp.YoutubeDL(params)
+        try:
+            if opts.get("browser_cookies"):
+                for cookie in cookie_cache.get(*opts["browser_cookies"]):
+                    ydl.cookiejar.set_cookie(cookie)
+            yield ydl
+        finally:
+            ydl.close()
+
+    def _supported(self, ydl) -> bool:
+        from yt_dlp.version import __version__
+
+        if __version__ != POOL_YTDLP_VERSION:
+            logger.warning(
+                f"YoutubeDL pool disabled: written against yt-dlp {POOL_YTDLP_VERSION}, found {__version__}"
+            )
+            return False
+        missing = [attr for attr in PRIVATE_ATTRS if not hasattr(ydl, attr)]
+        if missing:
+            logger.warning(f"YoutubeDL pool disabled: yt-dlp lacks {', '.join(missing)}")
+            return False
+        return True
+
+    def _disable(self) -> None:
+        with self._lock:
+            self.enabled = False
+            idle = [ydl for instances in self._idle.values() for ydl in instances]
+            self._idle.clear()
+            self._uses.clear()
+        for ydl in idle:
+            ydl.close()
+
+    def _apply(self, ydl, opts: Dict[str, Any]) -> None:
+        """Swap in one request's headers, cookies, output template and hooks."""
+        from yt_dlp.utils.networking import HTTPHeaderDict, std_headers
+
+        headers = HTTPHeaderDict(std_headers, opts.get("http_headers"))
+        cookie_header = headers.pop("Cookie", None)
+        ydl.params["http_headers"] = headers
+
+        # Never let one request's cookies leak into the next
+        ydl.cookiejar.clear()
+        ydl._YoutubeDL__header_cookies = []
+        cookiefile = opts.get("cookiefile")
+        ydl.params["cookiefile"] = cookiefile
+        if cookiefile:
+            ydl.cookiejar.load(cookiefile)
+        if opts.get("browser_cookies"):
+            for cookie in cookie_cache.get(*opts["browser_cookies"]):
+                ydl.cookiejar.set_cookie(cookie)
+        if cookie_header:
+            ydl._load_cookies(cookie_header)
+
+        ydl.params["outtmpl"] = opts.get("outtmpl") or {}
+        ydl._parse_outtmpl()
+        # yt-dlp treats a present-but-None download_ranges as callable
+        if opts.get("download_ranges"):
+            ydl.params["download_ranges"] = opts["download_ranges"]
+        else:
+            ydl.params.pop("download_ranges", None)
+
+        ydl._progress_hooks = []
+        ydl._postprocessor_hooks = []
+        for pps in ydl._pps.values():
+            for pp in pps:
+                if not hasattr(pp, "_progress_hooks"):
+                    raise AttributeError(f"{type(pp).__name__} has no _progress_hooks")
+                pp._progress_hooks = []
+        for hook in opts.get("progress_hooks") or []:
+            ydl.add_progress_hook(hook)
+        for hook in opts.get("postprocessor_hooks") or []:
+            ydl.add_postprocessor_hook(hook)
+
+        # yt-dlp only skips sleep_interval_requests before an instance's first request
+        ydl._first_webpage_request = True
+        ydl._playlist_level = 0
+        ydl._playlist_urls = set()
+
+    def _checkin(self, key: str, ydl) -> None:
+        # Drop per-request state so idle instances hold no cookies or hooks
+        try:
+            ydl.cookiejar.clear()
+            ydl._YoutubeDL__header_cookies = []
+            ydl.params["cookiefile"] = None
+            ydl.params.pop("download_ranges", None)
+            ydl._progress_hooks = []
+            ydl._postprocessor_hooks = []
+        except AttributeError as e:
+            logger.warning(f"Disabling the YoutubeDL pool, could not reset an instance: {e}")
+            self._disable()
+
+        uses = self._uses.get(id(ydl), 0) + 1
+        with self._lock:
+            if self.enabled and uses < self.max_uses and len(self._idle[key]) < self.max_idle_per_profile:
+                self._uses[id(ydl)] = uses
+                self._idle[key].append(ydl)
+                return
+            self._uses.pop(id(ydl), None)
+        ydl.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "profiles": sum(1 for idle in self._idle.values() if idle),
+                "idle": sum(len(idle) for idle in self._idle.values()),
+                "created": self.created,
+                "reused": self.reused,
+            }
+
+
+ydl_pool = YoutubeDLPool()
@@ -0,0 +1,240 @@
+"""
+yt-dlp entry points that can run either in-process or in a worker process.
+
+Everything here takes and returns plain picklable data (opts dicts, projected
+info dicts, summaries and small result dicts) so the same functions back both
+execution modes. This module must stay free of FastAPI/service imports: worker processes import
+it on startup. yt-dlp itself is imported on first use (or by `preload`) so
+importing the app stays cheap.
+"""
+
+import copy
+import logging
+import time
+from typing import Dict, Any, Optional, List, Callable
+
+from .video_info import VideoSummary, is_plain_format, project_info
+from .ydl_pool import ydl_pool
+
+logger = logging.getLogger(__name__)
+
+# Progress fields relayed from worker processes back to the caller's hooks
+PROGRESS_KEYS = (
+    "status", "downloaded_bytes", "total_bytes", "total_bytes_estimate",
+    "speed", "eta", "filename", "fragment_index", "fragment_count",
+)
+
+
+def extract(opts: Dict[str, Any], url: str) -> Dict[str, Any]:
+    """Extract a URL without downloading; returns the /info summary and a cacheable info dict.
+
+    The full info dict never leaves this function; see video_info for what is kept.
+    """
+    with ydl_pool.checkout(opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+    extractor = info.get("extractor")
+    if info.get("_type", "video") != "video":
+        return {"summary": VideoSummary.from_info(info), "info": None, "extractor": extractor}
+    # A download replaying a result without its lazy formats could pick a different one
+    cacheable = all(is_plain_format(f) for f in info.get("formats") or [])
+    info = project_info(info)
+    return {"summary": VideoSummary.from_info(info), "info": info if cacheable else None, "extractor": extractor}
+
+
+def list_entries(opts: Dict[str, Any], url: str, limit: int) -> List[Dict[str, Any]]:
+    """Flat-extract a playlist (or gallery) into its entry URLs; a single video yields itself."""
+    opts = dict(opts, extract_flat="in_playlist", playlistend=limit)
+    with ydl_pool.checkout(opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+    if info.get("_type") not in ("playlist", "multi_video"):
+        return [{"url": info.get("webpage_url") or url, "title": info.get("title")}]
+    entries = []
+    for entry in info.get("entries") or []:
+        if not entry:
+            continue
+        # Flat entries are references to resolve; resolved entries embedded in the
+        # playlist page itself (generic extractor) only have their media URL
+        if entry.get("_type", "video") != "video" or entry.get("webpage_url") in (None, info.get("webpage_url")):
+            entry_url = entry.get("url")
+        else:
+            entry_url = entry["webpage_url"]
+        if entry_url:
+            entries.append({"url": entry_url, "title": entry.get("title")})
+    return entries[:limit]
+
+
+def extractor_name(url: str) -> str:
+    """IE_NAME of the extractor yt-dlp would pick for a URL, as it appears in error messages."""
+    from yt_dlp.extractor import gen_extractor_classes
+    for ie in gen_extractor_classes():
+        if ie.suitable(url) and ie.working():
+            return ie.IE_NAME
+    return "generic"
+
+
+def select_format(opts: Dict[str, Any], info: Dict[str, Any]) -> Dict[str, Any]:
+    """Run format selection on an info dict and describe the chosen format."""
+    with ydl_pool.checkout(opts) as ydl:
+        selected = ydl.process_ie_result(copy.deepcopy(info), download=False)
+    return {
+        "ext": selected.get("ext"),
+        "url": selected.get("url"),
+        "needs_merge": bool(selected.get("requested_formats")),
+        "format_id": selected.get("format_id"),
+        "protocol": selected.get("protocol"),
+        "http_headers": selected.get("http_headers") or {},
+        # Cookies from the jar that apply to the media URL itself
+        "cookies": selected.get("cookies"),
+        "filesize": selected.get("filesize") or selected.get("filesize_approx"),
+    }
+
+
+def download(
+    opts: Dict[str, Any],
+    url: str,
+    cached_info: Optional[Dict[str, Any]] = None,
+    progress_hooks: Optional[List[Callable]] = None,
+    postprocessor_hooks: Optional[List[Callable]] = None,
+) -> Dict[str, Any]:
+    """Download a URL, reusing a cached info dict when one is given.
+
+    `cached_info` is processed in place, so pass a copy nobody else holds
+    (InfoCache.get returns one); copying it again would double its footprint
+    for the length of the download.
+
+    A `clip` option (ours, not yt-dlp's) of (start, end) seconds downloads only
+    that section (end None: to the end): yt-dlp fetches just the fragments or
+    byte ranges it covers and cuts at the nearest keyframes without re-encoding.
+
+    Returns a compact result; `cache_stale` is set when the cached info had to
+    be discarded so the caller can invalidate its cache entry.
+    """
+    from yt_dlp.utils import DownloadError, download_range_func
+
+    opts = dict(opts)
+    clip = opts.pop("clip", None)
+    if clip is not None:
+        start, end = clip
+        opts["download_ranges"] = download_range_func(None, [(start, float("inf") if end is None else end)])
+    opts["progress_hooks"] = list(progress_hooks or [])
+    opts["postprocessor_hooks"] = list(postprocessor_hooks or [])
+    cache_stale = False
+    with ydl_pool.checkout(opts) as ydl:
+        info = None
+        if cached_info is not None:
+            try:
+                logger.info("Reusing cached extraction result, skipping extract_info")
+                info = ydl.process_ie_result(cached_info, download=True)
+            except DownloadError as e:
+                # Stream URLs may have been revoked early; fall back to a fresh extraction
+                logger.warning(f"Download from cached info failed, re-extracting: {e}")
+                cache_stale = True
+        if info is None:
+            info = ydl.extract_info(url)
+    # Final path after merging/remuxing, which decides the extension
+    downloads = info.get("requested_downloads") or [{}]
+    return {
+        "title": info.get("title", "Unknown Title"),
+        "ext": info.get("ext"),
+        "filepath": downloads[-1].get("filepath"),
+        "extractor": info.get("extractor"),
+        "extractor_key": info.get("extractor_key"),
+        "id": info.get("id"),
+        "format_id": info.get("format_id"),
+        "cache_stale": cache_stale,
+    }
+
+
+# --- Worker-process side -------------------------------------------------
+
+_jobs_done = 0
+
+
+def preload() -> None:
+    """Pay the yt-dlp import and extractor load up front instead of on the first request."""
+    started = time.monotonic()
+    from yt_dlp.extractor import gen_extractor_classes
+    gen_extractor_classes()
+    logger.info(f"Loaded yt-dlp in {time.monotonic() - started:.2f}s")
+
+
+def init_worker() -> None:
+    """Process pool initializer: load yt-dlp once per worker."""
+    preload()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+
+def _peak_rss_mb() -> float:
+    import resource
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _relay_hook(queue, kind: str, cancel_event, min_interval: float = 0.25):
+    last = 0.0
+
+    def hook(status: Dict[str, Any]) -> None:
+        nonlocal last
+        if cancel_event is not None and cancel_event.is_set():
+            from yt_dlp.utils import DownloadCancelled
+            raise DownloadCancelled("Cancelled by parent process")
+        now = time.monotonic()
+        if kind == "progress" and status.get("status") == "downloading" and now - last < min_interval:
+            return
+        last = now
+        if kind == "progress":
+            payload = {k: status.get(k) for k in PROGRESS_KEYS}
+        else:
+            payload = {"status": status.get("status"), "postprocessor": status.get("postprocessor")}
+        queue.put((kind, payload))
+
+    return hook
+
+
+def run_in_worker(
+    func_name: str,
+    args: tuple,
+    max_jobs: int,
+    max_memory_mb: int,
+    queue=None,
+    cancel_event=None,
+) -> Dict[str, Any]:
+    """Entry point executed inside a worker process.
+
+    Hooks can't be pickled, so when a relay queue is given, progress and
+    postprocessor events are forwarded through it to the parent. yt-dlp
+    exceptions don't reliably pickle either, so errors come back as plain data.
+    The `recycle` flag is set once this worker has hit its job or memory limit.
+    """
+    global _jobs_done
+    from yt_dlp.utils import DownloadCancelled, DownloadError
+
+    func = {
+        "extract": extract, "list_entries": list_entries, "select_format": select_format, "download": download,
+        "extractor_name": extractor_name,
+    }[func_name]
+    kwargs = {}
+    if queue is not None:
+        kwargs = {
+            "progress_hooks": [_relay_hook(queue, "progress", cancel_event)],
+            "postprocessor_hooks": [_relay_hook(queue, "postprocessor", cancel_event)],
+        }
+
+    outcome: Dict[str, Any] = {}
+    try:
+        outcome["result"] = func(*args, **kwargs)
+    except DownloadCancelled as e:
+        outcome["error"] = {"type": "DownloadCancelled", "message": str(e)}
+    except DownloadError as e:
+        outcome["error"] = {"type": "DownloadError", "message": str(e)}
+    except Exception as e:
+        outcome["error"] = {"type": type(e).__name__, "message": str(e)}
+
+    _jobs_done += 1
+    outcome["recycle"] = bool(
+        (max_jobs and _jobs_done >= max_jobs)
+        or (max_memory_mb and _peak_rss_mb() >= max_memory_mb)
+    )
+    return outcome
@@ -0,0 +1,45 @@
+import json
+import logging
+import urllib.request
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+PYPI_URL = "https://pypi.org/pypi/yt-dlp/json"
+
+
+@lru_cache()
+def installed_ytdlp_version() -> Optional[str]:
+    try:
+        return version("yt-dlp")
+    except PackageNotFoundError:
+        return None
+
+
+def check_ytdlp_version(timeout: float = 5) -> Optional[bool]:
+    """Compare the installed yt-dlp with the latest release on PyPI.
+
+    Blocking; run it off the event loop. Returns None when either version
+    can't be determined.
+    """
+    current_version = installed_ytdlp_version()
+    if current_version is None:
+        logger.error("yt-dlp is not installed")
+        return None
+    logger.info(f"Current yt-dlp version: {current_version}")
+
+    try:
+        with urllib.request.urlopen(PYPI_URL, timeout=timeout) as response:
+            latest_version = json.loads(response.read().decode())["info"]["version"]
+    except Exception as e:
+        logger.warning(f"Could not check for yt-dlp updates: {e}")
+        return None
+
+    if current_version != latest_version:
+        logger.warning(f"yt-dlp version {current_version} is outdated! Latest is {latest_version}")
+        logger.warning("You may encounter extraction errors with YouTube. Consider updating with: python -m pip install -U yt-dlp")
+        return False
+    logger.info(f"yt-dlp is up to date (version {current_version})")
+    return True
@@ -0,0 +1,54 @@
+import asyncio
+import time
+import zipfile
+from typing import AsyncIterator, List
+
+
+class _Sink:
+    """Write-only, unseekable file object; zipfile falls back to data descriptors."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStream:
+    """Builds a ZIP archive incrementally so it can be streamed as entries are added.
+
+    Entries are stored uncompressed (media doesn't compress) and sizes/CRCs go
+    into data descriptors, so nothing is buffered beyond the chunk in flight.
+    """
+
+    def __init__(self, chunk_size: int = 1024 * 1024):
+        self.chunk_size = chunk_size
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, mode="w", compression=zipfile.ZIP_STORED, allowZip64=True)
+
+    async def add_file(self, arcname: str, path: str) -> AsyncIterator[bytes]:
+        entry = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+        entry.compress_type = zipfile.ZIP_STORED
+        with open(path, "rb") as src, self._zip.open(entry, "w", force_zip64=True) as dest:
+            while chunk := await asyncio.to_thread(src.read, self.chunk_size):
+                dest.write(chunk)
+                yield self._sink.drain()
+        yield self._sink.drain()
+
+    def add_bytes(self, arcname: str, data: bytes) -> bytes:
+        self._zip.writestr(zipfile.ZipInfo(arcname, date_time=time.localtime()[:6]), data)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Write the central directory; returns the archive's last bytes."""
+        self._zip.close()
+        return self._sink.drain()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark clip downloads against full downloads of the same video.
+
+Generates a test video with ffmpeg (keyframe every --gop seconds) and serves
+it from a local origin that counts the bytes it sends, both as a progressive
+mp4 (clips are fetched with Range requests) and as an HLS playlist (clips
+fetch only the segments they overlap). Every connection is capped at
+--per-conn-mbps, so bytes a client abandons when it seeks aren't counted as
+transferred. The info dict is extracted once up front, as the info cache
+does for /start, and each case downloads through ydl_worker.download in full
+and as a --clip-seconds clip, reporting bytes transferred, output size and
+wall time as JSON. Needs ffmpeg and ffprobe on PATH.
+
+Usage:
+    python benchmarks/bench_clip_download.py [--duration 600] [--clip-seconds 30] [--sources mp4,m3u8]
+"""
+
+import argparse
+import functools
+import http.server
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import ydl_worker  # noqa: E402
+
+
+def make_media(directory, duration, kbps, gop):
+    """A progressive mp4 and an HLS rendition of the same synthetic video."""
+    source = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size=640x360:rate=25:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-b:v", f"{kbps}k",
+        "-g", str(gop * 25), "-keyint_min", str(gop * 25), "-sc_threshold", "0",
+        "-c:a", "aac", "-b:a", "64k",
+    ]
+    subprocess.run(source + ["-movflags", "+faststart", os.path.join(directory, "video.mp4")], check=True)
+    subprocess.run([
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", os.path.join(directory, "video.mp4"),
+        "-c", "copy", "-f", "hls", "-hls_time", str(gop), "-hls_playlist_type", "vod",
+        os.path.join(directory, "video.m3u8"),
+    ], check=True)
+
+
+class CountingHandler(http.server.SimpleHTTPRequestHandler):
+    """Static files with Range support, counting the body bytes sent."""
+
+    sent = 0
+    lock = threading.Lock()
+    per_conn_bytes_s = 10e6
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        byte_range = self.headers.get("Range")
+        if not byte_range or not os.path.isfile(path):
+            return super().send_head()
+        size = os.path.getsize(path)
+        start, _, end = byte_range.replace("bytes=", "").partition("-")
+        start = int(start)
+        end = min(int(end) if end else size - 1, size - 1)
+        f = open(path, "rb")
+        f.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        self._remaining = end - start + 1
+        return f
+
+    def copyfile(self, source, outputfile):
+        remaining = getattr(self, "_remaining", None)
+        while remaining is None or remaining > 0:
+            chunk = source.read(64 * 1024 if remaining is None else min(64 * 1024, remaining))
+            if not chunk:
+                break
+            try:
+                outputfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                break
+            with CountingHandler.lock:
+                CountingHandler.sent += len(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+            time.sleep(len(chunk) / CountingHandler.per_conn_bytes_s)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_case(url, info, out_dir, name, clip=None):
+    opts = {
+        "format": "best",
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "outtmpl": os.path.join(out_dir, f"{name}.%(ext)s"),
+        "clip": clip,
+    }
+    CountingHandler.sent = 0
+    wall = time.perf_counter()
+    result = ydl_worker.download(opts, url, info)
+    wall = time.perf_counter() - wall
+    size = os.path.getsize(result["filepath"])
+    os.unlink(result["filepath"])
+    return {
+        "case": name,
+        "clip": list(clip) if clip else None,
+        "bytes_transferred": CountingHandler.sent,
+        "output_bytes": size,
+        "wall_s": round(wall, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duration", type=int, default=600, help="source length in seconds")
+    parser.add_argument("--clip-seconds", type=float, default=30)
+    parser.add_argument("--kbps", type=int, default=2000, help="video bitrate")
+    parser.add_argument("--gop", type=int, default=2, help="keyframe interval (and HLS segment length) in seconds")
+    parser.add_argument("--per-conn-mbps", type=float, default=10.0, help="per-connection cap in MB/s")
+    parser.add_argument("--sources", default="mp4,m3u8")
+    args = parser.parse_args()
+    CountingHandler.per_conn_bytes_s = args.per_conn_mbps * 1e6
+
+    start = args.duration / 2
+    clip = (start, start + args.clip_seconds)
+    with tempfile.TemporaryDirectory() as media_dir, tempfile.TemporaryDirectory() as out_dir:
+        make_media(media_dir, args.duration, args.kbps, args.gop)
+        handler = functools.partial(CountingHandler, directory=media_dir)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            results = []
+            for source in args.sources.split(","):
+                url = f"{base}/video.{source}"
+                info = ydl_worker.extract({"quiet": True, "no_warnings": True}, url)["info"]
+                full = run_case(url, info, out_dir, f"{source}-full")
+                part = run_case(url, info, out_dir, f"{source}-clip", clip)
+                part["transfer_ratio"] = round(part["bytes_transferred"] / full["bytes_transferred"], 4)
+                results += [full, part]
+        finally:
+            server.shutdown()
+
+    print(json.dumps({
+        "benchmark": "clip_download",
+        "source_seconds": args.duration,
+        "clip_seconds": args.clip_seconds,
+        "clip_fraction": round(args.clip_seconds / args.duration, 4),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
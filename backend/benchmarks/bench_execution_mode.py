@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark /health latency while 8 extractions run, EXECUTION_MODE=thread vs process.
+
+Starts the API under uvicorn once per mode, plus a local origin serving a large
+HTML page (inline JSON-LD and a <video> tag) so yt-dlp's generic extractor does
+real parsing work without touching the network. Each client repeatedly posts
+/info for a distinct URL (so the info cache never hits) while a probe measures
+/health. Reports p50/p99/max latency as JSON.
+
+Usage:
+    python benchmarks/bench_execution_mode.py [--concurrency 8] [--duration 20]
+"""
+
+import argparse
+import http.server
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def build_page(size_kb):
+    ld = json.dumps({
+        "@context": "https://schema.org",
+        "@type": "VideoObject",
+        "name": "Benchmark clip",
+        "contentUrl": "/clip.mp4",
+        "thumbnailUrl": "/thumb.jpg",
+        "uploadDate": "2024-01-01",
+        "duration": "PT1M",
+    })
+    filler = "".join(
+        f'<div class="row" data-id="{i}"><a href="/p/{i}">item {i}</a><script>var x{i}={i};</script></div>\n'
+        for i in range(size_kb * 1024 // 90)
+    )
+    return (
+        "<html><head><title>Benchmark clip</title>"
+        f'<script type="application/ld+json">{ld}</script></head><body>'
+        f'{filler}<video src="/clip.mp4"></video></body></html>'
+    ).encode()
+
+
+def start_origin(page):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = page if not self.path.startswith("/clip") else b"\0" * 4096
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html" if body is page else "video/mp4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_HEAD = do_GET
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_api(mode, port, concurrency, workdir):
+    env = dict(
+        os.environ,
+        EXECUTION_MODE=mode,
+        MAX_CONCURRENT_EXTRACTIONS=str(concurrency),
+        PROCESS_POOL_SIZE=str(concurrency),
+        PYTHONPATH=BACKEND_DIR,
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning",
+         "--app-dir", BACKEND_DIR],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/v1/health", timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"API did not start in {mode} mode")
+
+
+def post_info(api, url):
+    req = urllib.request.Request(
+        f"{api}/api/v1/download/info",
+        data=json.dumps({"url": url, "platform": "youtube", "format": "video", "quality": "720p"}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        urllib.request.urlopen(req, timeout=120).read()
+        return True
+    except OSError:
+        return False
+
+
+def run_mode(mode, origin, args, workdir):
+    port = free_port()
+    api = f"http://127.0.0.1:{port}"
+    proc = start_api(mode, port, args.concurrency, workdir)
+    try:
+        stop = threading.Event()
+        counter = iter(range(10**9))
+        done = {"ok": 0, "failed": 0}
+
+        def client():
+            while not stop.is_set():
+                ok = post_info(api, f"{origin}/watch?v={next(counter)}")
+                done["ok" if ok else "failed"] += 1
+
+        clients = [threading.Thread(target=client, daemon=True) for _ in range(args.concurrency)]
+        for t in clients:
+            t.start()
+        time.sleep(args.warmup)
+
+        latencies = []
+        end = time.time() + args.duration
+        while time.time() < end:
+            started = time.perf_counter()
+            urllib.request.urlopen(f"{api}/api/v1/health", timeout=30).read()
+            latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(args.probe_interval)
+
+        stop.set()
+        for t in clients:
+            t.join(timeout=120)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "probes": len(latencies),
+        "extractions_ok": done["ok"],
+        "extractions_failed": done["failed"],
+        "health_p50_ms": round(statistics.median(latencies), 2),
+        "health_p99_ms": round(latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)], 2),
+        "health_max_ms": round(latencies[-1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--probe-interval", type=float, default=0.02)
+    parser.add_argument("--page-kb", type=int, default=2048)
+    parser.add_argument("--modes", default="thread,process")
+    args = parser.parse_args()
+
+    origin = start_origin(build_page(args.page_kb))
+    origin_url = f"http://127.0.0.1:{origin.server_address[1]}"
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in args.modes.split(","):
+            results.append(run_mode(mode, origin_url, args, workdir))
+    origin.shutdown()
+
+    print(json.dumps({"benchmark": "execution_mode", "concurrency": args.concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark finished-file delivery: the old 8 KiB sync generator vs RangeFileResponse.
+
+Drives the ASGI responses directly (no network, no HTTP parsing) so the numbers
+isolate the per-chunk Python overhead of each delivery path. Reports throughput
+and CPU seconds per GB as JSON.
+
+Usage:
+    python benchmarks/bench_file_delivery.py [--size-mb 512] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.responses import StreamingResponse  # noqa: E402
+
+from app.api.responses import RangeFileResponse  # noqa: E402
+
+
+def generator_response(path):
+    def iterfile():
+        with open(path, "rb") as f:
+            while chunk := f.read(8192):
+                yield chunk
+    return StreamingResponse(iterfile(), media_type="video/mp4")
+
+
+async def drive(response, zerocopy=False):
+    """Run an ASGI response and count body bytes, discarding them."""
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    received = 0
+
+    async def receive():
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+        elif message["type"] == "http.response.zerocopy":
+            offset, count = message["offset"], message["count"]
+            while count > 0:
+                sent = os.sendfile(devnull, message["file"], offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+                count -= sent
+                received += sent
+
+    scope = {"type": "http", "method": "GET", "headers": []}
+    if zerocopy:
+        scope["extensions"] = {"http.response.zerocopy": {}}
+    try:
+        await response(scope, receive, send)
+    finally:
+        os.close(devnull)
+    return received
+
+
+def run_case(name, make_response, size, repeat, zerocopy=False):
+    results = []
+    for _ in range(repeat):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        received = asyncio.run(drive(make_response(), zerocopy=zerocopy))
+        cpu = time.process_time() - cpu
+        wall = time.perf_counter() - wall
+        assert received == size, f"{name}: received {received} of {size} bytes"
+        results.append((wall, cpu))
+
+    wall = min(r[0] for r in results)
+    cpu = min(r[1] for r in results)
+    gb = size / 1e9
+    return {
+        "case": name,
+        "bytes": size,
+        "wall_s": round(wall, 4),
+        "throughput_mb_s": round(size / 1e6 / wall, 1),
+        "cpu_s_per_gb": round(cpu / gb, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chunk-kb", type=int, default=1024)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as f:
+        block = os.urandom(1024 * 1024)
+        for _ in range(args.size_mb):
+            f.write(block)
+        path = f.name
+
+    try:
+        chunk = args.chunk_kb * 1024
+        cases = [
+            run_case("generator_8k", lambda: generator_response(path), size, args.repeat),
+            run_case(
+                f"range_file_{args.chunk_kb}k",
+                lambda: RangeFileResponse(path, chunk_size=chunk, media_type="video/mp4"),
+                size, args.repeat,
+            ),
+            run_case(
+                "range_file_zerocopy",
+                lambda: RangeFileResponse(path, chunk_size=chunk, media_type="video/mp4"),
+                size, args.repeat, zerocopy=True,
+            ),
+        ]
+    finally:
+        os.unlink(path)
+
+    print(json.dumps({"benchmark": "file_delivery", "results": cases}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory held by N concurrent /info calls and the info cache they fill.
+
+Uses the offline origin and fake extractor from fake_media.py, with every info
+dict padded to --extra-formats DASH formats (each with its own headers and
+fragment list, like a YouTube extraction). All --concurrency calls run at
+once against main.app over raw ASGI, for distinct videos so each is a full
+extraction. Reports the Python heap at its peak and what is still allocated
+afterwards (tracemalloc), the same for RSS above the idle baseline, the /info
+response size and the size of the info cache as JSON.
+
+Usage:
+    python benchmarks/bench_info_memory.py [--concurrency 32] [--extra-formats 60] [--duration 600]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import ctypes
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def release_free_memory():
+    """Collect garbage and hand freed heap pages back to the OS, so RSS shows what is still live."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass  # Not glibc; RSS includes freed memory the allocator kept
+
+
+async def run(args, origin):
+    import main as backend
+    from bench_load import RssSampler, request
+    from fake_media import register_extractor
+
+    register_extractor()
+    path = f"{backend.settings.API_V1_STR}/download/info"
+    run_id = uuid.uuid4().hex[:8]
+
+    def body(i):
+        url = origin.watch_url("dash", f"{run_id}-{i}")
+        return {"url": url, "platform": "youtube", "format": "video", "quality": "highest"}
+
+    async with backend.app.router.lifespan_context(backend.app):
+        await request(backend.app, "POST", path, body("warmup"))
+        backend.download.download_service.info_cache.clear()
+        release_free_memory()
+        with RssSampler() as idle:
+            pass
+        # Python heap allocations are exact where RSS keeps freed arenas around
+        tracemalloc.start()
+        with RssSampler() as rss:
+            results = await asyncio.gather(*(
+                request(backend.app, "POST", path, body(i)) for i in range(args.concurrency)
+            ))
+        _, heap_peak = tracemalloc.get_traced_memory()
+        release_free_memory()
+        heap_retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with RssSampler() as after:
+            pass
+        cache = backend.download.download_service.info_cache.stats()
+
+    statuses = {}
+    for status, *_ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "statuses": statuses,
+        "heap_peak_mb": round(heap_peak / 2**20, 1),
+        "heap_retained_mb": round(heap_retained / 2**20, 1),
+        "idle_rss_mb": idle.peak_mb,
+        "peak_rss_mb": rss.peak_mb,
+        "peak_over_idle_mb": round(rss.peak_mb - idle.peak_mb, 1),
+        "retained_over_idle_mb": round(after.peak_mb - idle.peak_mb, 1),
+        "response_bytes": results[0][3],
+        "cached_entries": cache["entries"],
+        "cached_bytes": cache["bytes"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32, help="/info calls in flight at once")
+    parser.add_argument("--extra-formats", type=int, default=60, help="padding formats per info dict")
+    parser.add_argument("--duration", type=int, default=600, help="video length; sets the fragment count")
+    parser.add_argument("--segment-seconds", type=int, default=2)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="ufd-bench-")
+    for key, value in {
+        "EXECUTION_MODE": "thread",
+        "RATE_LIMIT_ENABLED": "false",
+        "YTDLP_VERSION_CHECK": "false",
+        "LOG_LEVEL": "WARNING",
+        "MAX_CONCURRENT_EXTRACTIONS": str(args.concurrency),
+        "INFO_CACHE_MAX_ENTRIES": str(args.concurrency * 2),
+        "INFO_CACHE_MAX_BYTES": str(2**31),
+        "DOWNLOAD_DIR": os.path.join(work_dir, "downloads"),
+        "TEMP_DIR": os.path.join(work_dir, "temp"),
+    }.items():
+        os.environ.setdefault(key, value)
+    from fake_media import MediaOrigin
+
+    # Only the info dicts matter here, so the media is a little random data
+    origin = MediaOrigin(
+        duration=args.duration, kbps=8, segment_seconds=args.segment_seconds,
+        extra_formats=args.extra_formats, encode=False,
+    )
+    origin.start()
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            result = asyncio.run(run(args, origin))
+    finally:
+        origin.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps({
+        "benchmark": "info_memory",
+        "concurrency": args.concurrency,
+        "extra_formats": args.extra_formats,
+        "fragments_per_format": len(origin.segments) + 1,
+        **result,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Offline load test of /info and /start against main.app.
+
+Serves a synthetic video from a local origin (see fake_media.py) as
+progressive, HLS and DASH media with configurable bandwidth, latency and error
+rate, registers a fake yt-dlp extractor for it, and drives main.app over raw
+ASGI (no sockets, no HTTP parsing on the client side) with --concurrency
+clients per scenario:
+
+    info_cold          /info for a new video every time (full extraction)
+    info_warm          /info for one video (info cache hits)
+    start_progressive  /start for a new video every time, per media kind
+    start_hls
+    start_dash
+    mixed              alternating cold /info and progressive /start
+
+Each scenario reports req/s, latency and time-to-first-byte percentiles,
+response bytes/s, origin traffic and the peak RSS sampled while it ran, as
+JSON. With --compare BASELINE.json, scenarios whose req/s fell or whose p95
+latency rose by more than --tolerance are listed under "regressions" and the
+exit status is 1. Runs with EXECUTION_MODE=thread, rate limiting off and logs
+at WARNING unless those are set in the environment.
+
+Usage:
+    python benchmarks/bench_load.py [--requests 40] [--concurrency 8] [--scenarios info_cold,start_hls]
+        [--bandwidth-mbps 50] [--latency-ms 20] [--error-rate 0.01] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("info_cold", "info_warm", "start_progressive", "start_hls", "start_dash", "mixed")
+
+
+class RssSampler:
+    """Peak resident set size of this process while the block runs, sampled from /proc."""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._page = os.sysconf("SC_PAGE_SIZE")
+
+    def _sample(self):
+        with open("/proc/self/statm") as f:
+            self.peak = max(self.peak, int(f.read().split()[1]) * self._page)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    @property
+    def peak_mb(self) -> float:
+        return round(self.peak / 2**20, 1)
+
+
+async def request(app, method, path, body=None):
+    """One ASGI request; returns (status, ttfb, total seconds, body bytes)."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [(b"host", b"bench"), (b"user-agent", b"bench_load"), (b"content-length", str(len(payload)).encode())]
+    if body is not None:
+        headers.append((b"content-type", b"application/json"))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+    status, ttfb, size = None, None, 0
+    finished = asyncio.Event()
+    received = False
+    started = time.perf_counter()
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        # Streaming responses listen for a disconnect until they are done
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, ttfb, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk and ttfb is None:
+                ttfb = time.perf_counter() - started
+            size += len(chunk)
+            if not message.get("more_body"):
+                finished.set()
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        finished.set()
+    total = time.perf_counter() - started
+    return status, total if ttfb is None else ttfb, total, size
+
+
+def percentiles(values):
+    if len(values) < 2:
+        value = round(values[0] * 1000, 2) if values else None
+        return {"p50": value, "p95": value, "p99": value, "max": value}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "p50": round(cuts[49] * 1000, 2),
+        "p95": round(cuts[94] * 1000, 2),
+        "p99": round(cuts[98] * 1000, 2),
+        "max": round(max(values) * 1000, 2),
+    }
+
+
+def scenario_requests(name, origin, api, run_id):
+    """A function from request index to (method, path, body) for the scenario."""
+
+    def info(url):
+        return ("POST", f"{api}/download/info", {"url": url, "platform": "youtube", "format": "video", "quality": "highest"})
+
+    def start(url):
+        return ("POST", f"{api}/download/start", {"url": url, "platform": "youtube", "format": "video", "quality": "highest"})
+
+    if name == "info_cold":
+        return lambda i: info(origin.watch_url("progressive", f"{run_id}-cold-{i}"))
+    if name == "info_warm":
+        return lambda i: info(origin.watch_url("progressive", f"{run_id}-warm"))
+    if name.startswith("start_"):
+        kind = name[len("start_"):]
+        return lambda i: start(origin.watch_url(kind, f"{run_id}-{kind}-{i}"))
+    if name == "mixed":
+        return lambda i: (info if i % 2 else start)(origin.watch_url("progressive", f"{run_id}-mixed-{i}"))
+    raise ValueError(f"Unknown scenario {name}")
+
+
+async def run_scenario(app, name, make_request, total, concurrency, origin):
+    if name == "info_warm":
+        await request(app, *make_request(0))  # fill the cache outside the timed run
+    origin.reset_counters()
+    indexes = itertools.count()
+    results = []
+
+    async def client():
+        for i in indexes:
+            if i >= total:
+                return
+            results.append(await request(app, *make_request(i)))
+
+    with RssSampler() as rss:
+        wall = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        wall = time.perf_counter() - wall
+    origin_counters = origin.reset_counters()
+
+    ok = [r for r in results if r[0] is not None and r[0] < 400]
+    statuses = {}
+    for status, *_ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    body_bytes = sum(r[3] for r in ok)
+    return {
+        "scenario": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": total - len(ok),
+        "statuses": statuses,
+        "wall_s": round(wall, 3),
+        "req_per_s": round(len(ok) / wall, 2),
+        "latency_ms": percentiles([r[2] for r in ok]),
+        "ttfb_ms": percentiles([r[1] for r in ok]),
+        "response_bytes": body_bytes,
+        "bytes_per_s": round(body_bytes / wall),
+        "origin_requests": origin_counters["requests"],
+        "origin_errors": origin_counters["errors"],
+        "origin_bytes": origin_counters["bytes_sent"],
+        "peak_rss_mb": rss.peak_mb,
+    }
+
+
+async def run(args, origin):
+    import main as backend
+    from fake_media import register_extractor
+
+    register_extractor()
+    api = backend.settings.API_V1_STR
+    run_id = uuid.uuid4().hex[:8]
+    results = []
+    async with backend.app.router.lifespan_context(backend.app):
+        for name in args.scenarios.split(","):
+            make_request = scenario_requests(name, origin, api, run_id)
+            results.append(await run_scenario(backend.app, name, make_request, args.requests, args.concurrency, origin))
+    return results
+
+
+def compare(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        base = baseline.get(r["scenario"])
+        if base is None:
+            continue
+        if base["req_per_s"] and r["req_per_s"] < base["req_per_s"] * (1 - tolerance):
+            regressions.append({"scenario": r["scenario"], "metric": "req_per_s", "baseline": base["req_per_s"], "current": r["req_per_s"]})
+        base_p95, p95 = base["latency_ms"]["p95"], r["latency_ms"]["p95"]
+        if base_p95 and p95 is not None and p95 > base_p95 * (1 + tolerance):
+            regressions.append({"scenario": r["scenario"], "metric": "latency_p95_ms", "baseline": base_p95, "current": p95})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=40, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=int, default=30, help="video length in seconds")
+    parser.add_argument("--kbps", type=int, default=2000, help="video bitrate")
+    parser.add_argument("--segment-seconds", type=int, default=2)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0, help="per-connection cap in MB/s (0: unlimited)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay before every origin response")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of origin requests answered with 503")
+    parser.add_argument("--extra-formats", type=int, default=0, help="padding formats per info dict")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier output of this script to check against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative change before flagging")
+    args = parser.parse_args()
+    for name in args.scenarios.split(","):
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+
+    work_dir = tempfile.mkdtemp(prefix="ufd-bench-")
+    for key, value in {
+        "EXECUTION_MODE": "thread",
+        "RATE_LIMIT_ENABLED": "false",
+        "YTDLP_VERSION_CHECK": "false",
+        "LOG_LEVEL": "WARNING",
+        "DOWNLOAD_DIR": os.path.join(work_dir, "downloads"),
+        "TEMP_DIR": os.path.join(work_dir, "temp"),
+    }.items():
+        os.environ.setdefault(key, value)
+    from fake_media import MediaOrigin
+
+    origin = MediaOrigin(
+        duration=args.duration, kbps=args.kbps, segment_seconds=args.segment_seconds,
+        bandwidth_mbps=args.bandwidth_mbps, latency_ms=args.latency_ms, error_rate=args.error_rate,
+        extra_formats=args.extra_formats,
+    )
+    origin.start()
+    try:
+        # yt-dlp prints download progress to stdout; keep it clear for the report
+        with contextlib.redirect_stdout(sys.stderr):
+            results = asyncio.run(run(args, origin))
+    finally:
+        origin.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "benchmark": "load",
+        "config": {k: v for k, v in vars(args).items() if k not in ("compare", "tolerance")},
+        "media_bytes": len(origin.files["video.mp4"]),
+        "results": results,
+        # ru_maxrss is in KiB on Linux
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if args.compare:
+        report["regressions"] = compare(results, args.compare, args.tolerance)
+    print(json.dumps(report, indent=2))
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark request throughput with logging off, synchronous, and queued.
+
+Drives main.app's /health route over raw ASGI (no network, no HTTP parsing)
+with a number of concurrent clients, so the numbers isolate the cost of the
+request-path logging. Log records go to a temp file; --sink-delay-ms adds a
+sleep to every write to mimic a slow stdout pipe or log driver, which is
+where a synchronous handler stalls the event loop. Reports req/s as JSON.
+
+Usage:
+    python benchmarks/bench_logging.py [--requests 5000] [--concurrency 32] [--sink-delay-ms 1]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main as backend  # noqa: E402
+from app.core import log  # noqa: E402
+
+PATH = f"{backend.settings.API_V1_STR}/health"
+
+
+class SlowSink:
+    """A text stream whose writes block for a fixed time, like a congested pipe."""
+
+    def __init__(self, f, delay: float):
+        self.f = f
+        self.delay = delay
+
+    def write(self, data):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.f.write(data)
+
+    def flush(self):
+        self.f.flush()
+
+
+async def request(app):
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": PATH,
+        "raw_path": PATH.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench_logging")],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+    assert status == 200, f"unexpected status {status}"
+
+
+async def drive(app, total, concurrency):
+    remaining = total
+
+    async def client():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await request(app)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+
+
+def run_case(name, total, concurrency, sink, **config):
+    log.configure_logging(stream=sink, **config)
+    asyncio.run(drive(backend.app, min(total, 200), concurrency))  # warm-up
+    wall = time.perf_counter()
+    asyncio.run(drive(backend.app, total, concurrency))
+    wall = time.perf_counter() - wall
+    log.stop_logging()
+    return {"case": name, "requests": total, "wall_s": round(wall, 3), "req_per_s": round(total / wall, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--sink-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    cases = [
+        ("off", {"level": "WARNING", "use_queue": False}),
+        ("sync_text", {"fmt": "text", "use_queue": False}),
+        ("queue_text", {"fmt": "text", "use_queue": True}),
+        ("queue_json", {"fmt": "json", "use_queue": True}),
+        ("queue_json_sampled_10pct", {"fmt": "json", "use_queue": True, "sample_rates": {PATH: 0.1}}),
+    ]
+    results = []
+    with tempfile.TemporaryFile("w+") as f:
+        sink = SlowSink(f, args.sink_delay_ms / 1000)
+        for name, config in cases:
+            results.append(run_case(name, args.requests, args.concurrency, sink, **config))
+
+    print(json.dumps({
+        "benchmark": "logging",
+        "concurrency": args.concurrency,
+        "sink_delay_ms": args.sink_delay_ms,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
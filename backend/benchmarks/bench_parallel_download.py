@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark single- vs multi-connection downloads against a throttled local origin.
+
+The origin caps every connection at --per-conn-mbps, like CDNs that throttle
+per connection, and serves byte ranges unless --no-ranges is given (which
+shows the single-stream fallback). Each case downloads the file through
+ydl_worker.download with a different `parallel_connections` and reports wall
+time and throughput as JSON.
+
+Usage:
+    python benchmarks/bench_parallel_download.py [--size-mb 64] [--per-conn-mbps 4] [--connections 1,2,4,8]
+"""
+
+import argparse
+import http.server
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import ydl_worker  # noqa: E402
+
+RANGE_RE = re.compile(r"bytes=(\d+)-(\d*)")
+WRITE_SIZE = 64 * 1024
+
+
+def start_origin(body, per_conn_bytes_s, ranges=True):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            start, end = 0, len(body) - 1
+            match = RANGE_RE.match(self.headers.get("Range") or "")
+            if ranges and match:
+                start = int(match.group(1))
+                end = min(int(match.group(2) or end), end)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(end - start + 1))
+            if ranges:
+                self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+            if self.command == "HEAD":
+                return
+            pos = start
+            try:
+                while pos <= end:
+                    chunk = body[pos:min(pos + WRITE_SIZE, end + 1)]
+                    self.wfile.write(chunk)
+                    pos += len(chunk)
+                    time.sleep(len(chunk) / per_conn_bytes_s)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        do_HEAD = do_GET
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_case(url, size, connections, out_dir):
+    opts = {
+        "format": "best",
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "outtmpl": os.path.join(out_dir, f"conn{connections}.%(ext)s"),
+        "parallel_connections": connections,
+        "parallel_min_size": 0,
+    }
+    wall = time.perf_counter()
+    info = ydl_worker.download(opts, url)
+    wall = time.perf_counter() - wall
+    path = os.path.join(out_dir, f"conn{connections}.{info['ext']}")
+    assert os.path.getsize(path) == size, f"{connections} connections: wrong size"
+    os.unlink(path)
+    return {
+        "connections": connections,
+        "wall_s": round(wall, 3),
+        "throughput_mb_s": round(size / 1e6 / wall, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--per-conn-mbps", type=float, default=4.0, help="per-connection cap in MB/s")
+    parser.add_argument("--connections", default="1,2,4,8")
+    parser.add_argument("--no-ranges", action="store_true", help="origin ignores Range (fallback path)")
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    body = os.urandom(size)
+    server = start_origin(body, args.per_conn_mbps * 1e6, ranges=not args.no_ranges)
+    url = f"http://127.0.0.1:{server.server_address[1]}/video.mp4"
+
+    try:
+        with tempfile.TemporaryDirectory() as out_dir:
+            cases = [run_case(url, size, int(n), out_dir) for n in args.connections.split(",")]
+    finally:
+        server.shutdown()
+
+    print(json.dumps({
+        "benchmark": "parallel_download",
+        "size_bytes": size,
+        "per_conn_mb_s": args.per_conn_mbps,
+        "ranges": not args.no_ranges,
+        "results": cases,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
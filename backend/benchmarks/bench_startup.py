@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold-start cost: importing the app, running its startup, and the first requests.
+
+Each repeat runs in a fresh interpreter. A local origin serves a small MP4 so
+the first /info exercises yt-dlp without touching the internet. With
+--blackhole-network, outbound HTTPS goes through a proxy that accepts
+connections and never answers, which is what a cold start with a dead network
+looks like. Point --backend-dir at another checkout to compare revisions.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--blackhole-network]
+"""
+
+import argparse
+import http.server
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    t2 = time.perf_counter()
+    client.get("/api/v1/health")
+    t3 = time.perf_counter()
+    r = client.post("/api/v1/download/info", json={
+        "url": sys.argv[1], "platform": "youtube", "format": "video", "quality": "720p",
+    })
+    t4 = time.perf_counter()
+print(json.dumps({
+    "import_s": t1 - t0,
+    "startup_s": t2 - t1,
+    "first_health_ms": (t3 - t2) * 1000,
+    "first_info_ms": (t4 - t3) * 1000,
+    "info_status": r.status_code,
+}))
+"""
+
+
+def start_origin():
+    body = b"\0" * 64 * 1024
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_HEAD = do_GET
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_blackhole():
+    """A proxy that accepts connections and never responds."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(64)
+    held = []
+
+    def accept():
+        while True:
+            conn, _ = sock.accept()
+            held.append(conn)
+
+    threading.Thread(target=accept, daemon=True).start()
+    return sock
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backend-dir", default=BACKEND_DIR)
+    parser.add_argument("--blackhole-network", action="store_true")
+    args = parser.parse_args()
+
+    origin = start_origin()
+    url = f"http://127.0.0.1:{origin.server_address[1]}/clip.mp4"
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(args.backend_dir))
+    env["no_proxy"] = env["NO_PROXY"] = "127.0.0.1,localhost"
+    if args.blackhole_network:
+        proxy = f"http://127.0.0.1:{start_blackhole().getsockname()[1]}"
+        env["https_proxy"] = env["HTTPS_PROXY"] = proxy
+
+    runs = []
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as workdir:
+            out = subprocess.run(
+                [sys.executable, "-c", CHILD, url], cwd=workdir, env=env,
+                capture_output=True, text=True, timeout=300,
+            )
+        if out.returncode != 0:
+            sys.exit(out.stderr)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    summary = {
+        key: round(statistics.median(run[key] for run in runs), 3)
+        for key in ("import_s", "startup_s", "first_health_ms", "first_info_ms")
+    }
+    print(json.dumps({
+        "benchmark": "startup",
+        "backend_dir": os.path.abspath(args.backend_dir),
+        "blackhole_network": args.blackhole_network,
+        "repeat": args.repeat,
+        "median": summary,
+        "info_statuses": sorted({run["info_status"] for run in runs}),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
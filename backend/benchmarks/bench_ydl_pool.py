@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold vs warm yt-dlp extraction: a new YoutubeDL per request vs the instance pool.
+
+Uses the real per-platform options from DownloadService._get_yt_dlp_opts for
+each Platform enum value. By default every platform extracts the same page
+from a local origin, so the numbers isolate YoutubeDL construction and
+connection setup; pass --url PLATFORM=URL to measure a real site as well
+(network required). Sleep intervals are disabled so they don't dominate.
+Reports median latency per platform as JSON.
+
+Usage:
+    python benchmarks/bench_ydl_pool.py [--repeat 10] [--url youtube=https://...]
+"""
+
+import argparse
+import http.server
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.api.routes.download import Platform  # noqa: E402
+from app.services.download import DownloadService  # noqa: E402
+from app.services.ydl_pool import YoutubeDLPool  # noqa: E402
+from app.services import ydl_worker  # noqa: E402
+
+
+def start_origin():
+    page = (
+        b"<html><head><title>Benchmark clip</title>"
+        b'<meta property="og:video" content="/clip.mp4"></head>'
+        b'<body><video src="/clip.mp4"></video></body></html>'
+    )
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            body = b"\0" * 4096 if self.path.startswith("/clip") else page
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4" if body is not page else "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_HEAD = do_GET
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def time_extractions(pool, opts, url, repeat):
+    samples = []
+    for _ in range(repeat):
+        ydl_worker.ydl_pool = pool
+        started = time.perf_counter()
+        ydl_worker.extract(opts, url)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--url", action="append", default=[], help="PLATFORM=URL, may be repeated")
+    args = parser.parse_args()
+
+    origin = start_origin()
+    local_url = f"http://127.0.0.1:{origin.server_address[1]}/watch"
+    urls = dict(item.split("=", 1) for item in args.url)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        service = DownloadService(os.path.join(workdir, "temp"), os.path.join(workdir, "downloads"))
+        results = []
+        for platform in Platform:
+            url = urls.get(platform.value, local_url)
+            opts = service._get_yt_dlp_opts(platform=platform.value)
+            opts.update({"sleep_interval_requests": 0, "sleep_interval": 0, "max_sleep_interval": 0})
+
+            # Cold: the pool never keeps an instance, like the old per-request YoutubeDL
+            cold = time_extractions(YoutubeDLPool(max_idle_per_profile=0), opts, url, args.repeat)
+            warm_pool = YoutubeDLPool()
+            time_extractions(warm_pool, opts, url, 1)  # prime
+            warm = time_extractions(warm_pool, opts, url, args.repeat)
+
+            results.append({
+                "platform": platform.value,
+                "url": url if url != local_url else "local",
+                "cold_median_ms": round(statistics.median(cold), 2),
+                "warm_median_ms": round(statistics.median(warm), 2),
+                "speedup": round(statistics.median(cold) / statistics.median(warm), 2),
+            })
+    origin.shutdown()
+
+    print(json.dumps({"benchmark": "ydl_pool", "repeat": args.repeat, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
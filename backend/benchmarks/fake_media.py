@@ -0,0 +1,289 @@
+"""
+An offline stand-in for a video site, shared by the load benchmarks.
+
+MediaOrigin serves one video from memory as a progressive mp4, an HLS
+playlist and DASH fragments (the same fMP4 segments; the extractor lists them
+the way yt-dlp's DASH parser would), with a per-connection bandwidth cap,
+added latency before every response and a random 503 rate. UfdBenchIE is a
+yt-dlp extractor for the origin's /watch/<kind>/<id> pages, which fetches the
+info dict from /api/<kind>/<id>; `register_extractor` puts it ahead of the
+generic extractor in this process (EXECUTION_MODE=thread only).
+
+With ffmpeg on PATH the video is real H.264/AAC, so yt-dlp's fixups and
+remuxes see valid files; without it the bytes are random and yt-dlp skips the
+ffmpeg steps with a warning. `--extra-formats` pads every info dict with
+lower-quality duplicates carrying headers and fragment lists, plus storyboard
+formats, to approach the size of a real YouTube extraction.
+"""
+
+import http.server
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from yt_dlp.extractor.common import InfoExtractor
+
+KINDS = ("progressive", "hls", "dash")
+HEIGHTS = (144, 240, 360, 480, 720)
+VCODEC = "avc1.64001e"
+ACODEC = "mp4a.40.2"
+
+
+def make_media(
+    duration: int, kbps: int, segment_seconds: int, encode: Optional[bool] = None,
+) -> Tuple[Dict[str, bytes], List[Tuple[str, float]]]:
+    """Files by name (video.mp4, init.mp4, seg*.m4s) and the [(segment, seconds)] list.
+
+    `encode` picks real media over random bytes; by default, whenever ffmpeg is on PATH.
+    """
+    if encode if encode is not None else shutil.which("ffmpeg"):
+        return _encode_media(duration, kbps, segment_seconds)
+    size = duration * kbps * 125
+    segment_size = segment_seconds * kbps * 125
+    blob = os.urandom(size)
+    files = {"video.mp4": blob, "init.mp4": blob[:1024]}
+    segments = []
+    for i, offset in enumerate(range(0, size, segment_size)):
+        name = f"seg{i}.m4s"
+        files[name] = blob[offset:offset + segment_size]
+        segments.append((name, min(segment_seconds, duration - i * segment_seconds)))
+    return files, segments
+
+
+def _encode_media(duration: int, kbps: int, segment_seconds: int) -> Tuple[Dict[str, bytes], List[Tuple[str, float]]]:
+    ffmpeg = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"]
+    with tempfile.TemporaryDirectory() as d:
+        subprocess.run(ffmpeg + [
+            "-f", "lavfi", "-i", f"testsrc2=size=640x360:rate=25:duration={duration}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+            "-c:v", "libx264", "-preset", "ultrafast", "-b:v", f"{kbps}k",
+            "-g", str(segment_seconds * 25), "-keyint_min", str(segment_seconds * 25), "-sc_threshold", "0",
+            "-c:a", "aac", "-b:a", "64k", "-movflags", "+faststart", os.path.join(d, "video.mp4"),
+        ], check=True)
+        subprocess.run(ffmpeg + [
+            "-i", os.path.join(d, "video.mp4"), "-c", "copy",
+            "-f", "hls", "-hls_time", str(segment_seconds), "-hls_playlist_type", "vod",
+            "-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", "init.mp4",
+            "-hls_segment_filename", os.path.join(d, "seg%d.m4s"), os.path.join(d, "index.m3u8"),
+        ], check=True)
+        with open(os.path.join(d, "index.m3u8")) as f:
+            playlist = f.read()
+        segments = [
+            (name, float(seconds))
+            for seconds, name in re.findall(r"#EXTINF:([\d.]+),\s*\n(\S+)", playlist)
+        ]
+        files = {}
+        for name in ["video.mp4", "init.mp4"] + [name for name, _ in segments]:
+            with open(os.path.join(d, name), "rb") as f:
+                files[name] = f.read()
+    return files, segments
+
+
+class UfdBenchIE(InfoExtractor):
+    IE_NAME = "ufdbench"
+    _VALID_URL = r"https?://127\.0\.0\.1:\d+/watch/(?P<kind>progressive|hls|dash)/(?P<id>[\w-]+)"
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        return self._download_json(url.replace("/watch/", "/api/", 1), video_id)
+
+
+def register_extractor() -> None:
+    """Make UfdBenchIE the first extractor tried by YoutubeDL instances created from now on."""
+    from yt_dlp.extractor import import_extractors
+    from yt_dlp.globals import extractors
+
+    import_extractors()
+    if "UfdBenchIE" not in extractors.value:
+        extractors.value = {"UfdBenchIE": UfdBenchIE, **extractors.value}
+
+
+class MediaOrigin:
+    def __init__(
+        self, duration: int = 60, kbps: int = 2000, segment_seconds: int = 2,
+        bandwidth_mbps: float = 0, latency_ms: float = 0, error_rate: float = 0, extra_formats: int = 0,
+        encode: Optional[bool] = None,
+    ):
+        self.files, self.segments = make_media(duration, kbps, segment_seconds, encode)
+        self.duration = duration
+        self.kbps = kbps
+        self.bandwidth = bandwidth_mbps * 1e6
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.extra_formats = extra_formats
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self._server = None
+
+    def start(self) -> str:
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def watch_url(self, kind: str, video_id: str) -> str:
+        return f"{self.base_url}/watch/{kind}/{video_id}"
+
+    def reset_counters(self) -> Dict[str, int]:
+        with self.lock:
+            counters = {"requests": self.requests, "errors": self.errors, "bytes_sent": self.bytes_sent}
+            self.requests = self.errors = self.bytes_sent = 0
+        return counters
+
+    def _format(self, kind: str, media: str, format_id: str, height: int, tbr: float) -> Dict[str, Any]:
+        fmt = {
+            "format_id": format_id,
+            "ext": "mp4",
+            "vcodec": VCODEC,
+            "acodec": ACODEC,
+            "width": height * 16 // 9,
+            "height": height,
+            "tbr": tbr,
+        }
+        if kind == "progressive":
+            fmt.update(url=f"{media}/video.mp4", filesize=len(self.files["video.mp4"]))
+        elif kind == "hls":
+            fmt.update(url=f"{media}/index.m3u8", manifest_url=f"{media}/index.m3u8", protocol="m3u8_native")
+        else:
+            fmt.update(
+                url=f"{media}/manifest.mpd", manifest_url=f"{media}/manifest.mpd", protocol="http_dash_segments",
+                # One directory per representation, as DASH manifests usually lay them out
+                fragment_base_url=f"{media}/{format_id}/",
+                fragments=[{"path": "init.mp4"}] + [{"path": name, "duration": d} for name, d in self.segments],
+            )
+        return fmt
+
+    def _storyboards(self, media: str) -> List[Dict[str, Any]]:
+        """Thumbnail sprite "formats" like YouTube's, one fragment per sprite sheet."""
+        return [
+            {
+                "format_id": f"sb{i}", "format_note": "storyboard", "ext": "mhtml", "protocol": "mhtml",
+                "vcodec": "none", "acodec": "none", "width": 160 >> i, "height": 90 >> i, "columns": 10, "rows": 10,
+                "url": f"{media}/sb{i}/M0.jpg",
+                "fragments": [{"url": f"{media}/sb{i}/M{n}.jpg", "duration": 10.0} for n in range(self.duration // 10)],
+            }
+            for i in range(3)
+        ]
+
+    def info(self, kind: str, video_id: str) -> Dict[str, Any]:
+        media = f"{self.base_url}/media/{video_id}"
+        formats = []
+        for i in range(self.extra_formats):
+            height = HEIGHTS[i % (len(HEIGHTS) - 1)]
+            fmt = self._format(kind, media, f"{kind}-{height}-{i}", height, self.kbps * height / 1440)
+            fmt["http_headers"] = {"User-Agent": "Mozilla/5.0 (bench)", "Accept": "*/*", "Referer": self.base_url}
+            formats.append(fmt)
+        formats.append(self._format(kind, media, f"{kind}-{HEIGHTS[-1]}", HEIGHTS[-1], self.kbps))
+        if self.extra_formats:
+            formats += self._storyboards(media)
+        return {
+            "id": video_id,
+            "title": f"Benchmark video {video_id}",
+            "duration": self.duration,
+            "thumbnail": f"{self.base_url}/thumb/{video_id}.jpg",
+            "formats": formats,
+        }
+
+    def playlist(self) -> bytes:
+        target = max(int(d + 0.999) for _, d in self.segments)
+        lines = [
+            "#EXTM3U", "#EXT-X-VERSION:7", f"#EXT-X-TARGETDURATION:{target}",
+            "#EXT-X-MEDIA-SEQUENCE:0", "#EXT-X-PLAYLIST-TYPE:VOD", '#EXT-X-MAP:URI="init.mp4"',
+        ]
+        for name, seconds in self.segments:
+            lines += [f"#EXTINF:{seconds:.3f},", name]
+        lines.append("#EXT-X-ENDLIST")
+        return ("\n".join(lines) + "\n").encode()
+
+    def _handler(self):
+        origin = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_HEAD(self):
+                self.respond(head=True)
+
+            def do_GET(self):
+                self.respond()
+
+            def respond(self, head=False):
+                with origin.lock:
+                    origin.requests += 1
+                if origin.latency:
+                    time.sleep(origin.latency)
+                if origin.error_rate and random.random() < origin.error_rate:
+                    with origin.lock:
+                        origin.errors += 1
+                    return self.send_body(503, b"Service Unavailable", "text/plain", head)
+
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if len(parts) == 3 and parts[0] == "api" and parts[1] in KINDS:
+                    body = json.dumps(origin.info(parts[1], parts[2])).encode()
+                    return self.send_body(200, body, "application/json", head)
+                if len(parts) >= 3 and parts[0] == "media":
+                    if parts[-1] == "index.m3u8":
+                        return self.send_body(200, origin.playlist(), "application/vnd.apple.mpegurl", head)
+                    if parts[-1] in origin.files:
+                        return self.send_media(origin.files[parts[-1]], head)
+                self.send_body(404, b"Not Found", "text/plain", head)
+
+            def send_body(self, status, body, content_type, head):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not head:
+                    self.write_throttled(body)
+
+            def send_media(self, data, head):
+                start, end = 0, len(data) - 1
+                match = re.match(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+                if match and match.group(1):
+                    start = int(match.group(1))
+                    end = min(int(match.group(2)) if match.group(2) else end, end)
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Type", "video/mp4")
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Content-Length", str(end - start + 1))
+                self.end_headers()
+                if not head:
+                    self.write_throttled(memoryview(data)[start:end + 1])
+
+            def write_throttled(self, body):
+                for offset in range(0, len(body), 64 * 1024):
+                    chunk = body[offset:offset + 64 * 1024]
+                    try:
+                        self.wfile.write(chunk)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+                    with origin.lock:
+                        origin.bytes_sent += len(chunk)
+                    if origin.bandwidth:
+                        time.sleep(len(chunk) / origin.bandwidth)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -1,26 +1,65 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import get_settings
+from app.core import log, metrics
 from app.api.routes import download
+from app.services import ydl_worker
+from app.services.ydl_pool import ydl_pool
+from app.services.ytdlp_version import check_ytdlp_version, installed_ytdlp_version
+from contextlib import asynccontextmanager
+import asyncio
 import logging
 import os
+import time
+
+settings = get_settings()
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+log.configure_logging(
+    level=settings.LOG_LEVEL,
+    fmt=settings.LOG_FORMAT,
+    use_queue=settings.LOG_ASYNC,
+    sample_rates=settings.log_sample_rates,
+    default_sample_rate=settings.LOG_DEFAULT_SAMPLE_RATE,
 )
 
 logger = logging.getLogger(__name__)
 
-settings = get_settings()
-
 # Log important configuration
 logger.info(f"API_V1_STR: {settings.API_V1_STR}")
 logger.info(f"CORS Origins: {settings.cors_origins_list}")
 logger.info(f"Environment: {'production' if os.getenv('RENDER') else 'development'}")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing slow runs before the server accepts requests; warm-ups happen in the background
+    background = []
+    runner = download.download_service.process_runner
+    if runner is not None:
+        # Spawn yt-dlp worker processes up front when running in process mode
+        background.append(asyncio.create_task(asyncio.to_thread(runner.warm_up)))
+    elif settings.YTDLP_PRELOAD:
+        background.append(asyncio.create_task(asyncio.to_thread(ydl_worker.preload)))
+    if settings.YTDLP_VERSION_CHECK:
+        background.append(asyncio.create_task(asyncio.to_thread(check_ytdlp_version)))
+
+    yield
+
+    for task in background:
+        task.cancel()
+    download.download_service.media_cache.flush()
+    if runner is not None:
+        runner.shutdown()
+
+
 app = FastAPI(
-    title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    title=settings.PROJECT_NAME,
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
+    # JSON endpoints (jobs, health, prefetch) serialize with orjson
+    default_response_class=ORJSONResponse,
 )
 
 # Set up CORS with logging
@@ -30,20 +69,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allow all methods
     allow_headers=["*"],  # Allow all headers
-    expose_headers=["Content-Disposition", "Content-Type"],
+    expose_headers=[
+        "Content-Disposition",
+        "Content-Type",
+        "Content-Length",
+        "Content-Range",
+        "Accept-Ranges",
+        "ETag",
+        "Content-Location",
+        "Retry-After",
+    ],
     max_age=3600,
 )
 
 
-# Debug middleware to log requests
+# Access log middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    logger.info(f"Request path: {request.url.path}")
-    logger.info(f"Request method: {request.method}")
-    logger.info(f"Request headers: {dict(request.headers)}")
-    logger.info(f"Client host: {request.client.host if request.client else 'Unknown'}")
-    response = await call_next(request)
-    logger.info(f"Response status: {response.status_code}")
+    debug = settings.ALLOW_DEBUG_TRAFFIC and request.headers.get("x-debug-traffic") == "1"
+    with log.request_context(request.url.path, debug=debug):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Request headers: {dict(request.headers)}")
+        started = time.monotonic()
+        response = await call_next(request)
+        elapsed = time.monotonic() - started
+        logger.info(
+            f"{request.method} {request.url.path} {response.status_code} {elapsed * 1000:.1f}ms",
+            extra={
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "duration_ms": round(elapsed * 1000, 1),
+                "client": request.client.host if request.client else None,
+            },
+        )
+    # Label by route template so ids in the path don't explode the label set
+    route = request.scope.get("route")
+    metrics.HTTP_REQUEST_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=response.status_code,
+    )
     return response
 
 
@@ -60,6 +127,69 @@ async def health_check():
         "status": "healthy",
         "service": settings.PROJECT_NAME,
         "version": "1.0.0",
+        "yt_dlp_version": installed_ytdlp_version(),
         "cors_origins": settings.cors_origins_list,
         "environment": "production" if os.getenv("RENDER") else "development",
+        "info_cache": download.download_service.info_cache.stats(),
+        "scheduler": download.download_service.scheduler.stats(),
+        "rate_limiter": download.download_service.rate_limiter.stats(),
+        "negative_cache": download.download_service.negative_cache.stats(),
+        "circuit_breakers": download.download_service.breakers.stats(),
+        "single_flight": download.download_service.in_flight.stats(),
+        "prefetch": download.download_service.prefetcher.stats(),
+        "media_cache": download.download_service.media_cache.stats(),
+        "ydl_pool": ydl_pool.stats(),
+        "process_pool": (
+            download.download_service.process_runner.stats()
+            if download.download_service.process_runner is not None else None
+        ),
     }
+
+
+def collect_service_metrics():
+    """Gauges and counters kept by the scheduler and caches, read at scrape time."""
+    service = download.download_service
+    pools = [service.scheduler.extraction, service.scheduler.downloads]
+    yield ("ufd_pool_queue_depth", "gauge", "Requests waiting for a worker slot",
+           [({"pool": pool.name}, pool.stats()["queued"]) for pool in pools])
+    yield ("ufd_pool_active", "gauge", "Worker slots in use",
+           [({"pool": pool.name}, pool.stats()["active"]) for pool in pools])
+    yield ("ufd_pool_rejected_total", "counter", "Requests rejected because the queue was full",
+           [({"pool": pool.name}, pool.stats()["rejected"]) for pool in pools])
+
+    caches = {"info": service.info_cache.stats(), "media": service.media_cache.stats()}
+    yield ("ufd_cache_lookups_total", "counter", "Cache lookups by result", [
+        ({"cache": name, "result": result}, stats[key])
+        for name, stats in caches.items() for result, key in (("hit", "hits"), ("miss", "misses"))
+    ])
+    yield ("ufd_cache_hit_ratio", "gauge", "Cache hits / lookups since start",
+           [({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items()])
+    buckets = service.rate_limiter.stats()["buckets"]
+    for name, key, type_, help in (
+        ("ufd_rate_limit_rps", "rate", "gauge", "Current allowed requests/s per platform and host"),
+        ("ufd_rate_limit_tokens", "tokens", "gauge", "Tokens left in the bucket (negative: callers queued)"),
+        ("ufd_rate_limit_throttled_total", "throttled", "counter", "Throttling errors (429, bot check) seen"),
+        ("ufd_rate_limit_delayed_total", "delayed", "counter", "Requests that had to wait for a token"),
+        ("ufd_rate_limit_wait_seconds_total", "total_wait_seconds", "counter", "Time spent waiting for tokens"),
+    ):
+        yield (name, type_, help,
+               [({"platform": b["platform"], "host": b["host"]}, b[key]) for b in buckets])
+    breakers = service.breakers.stats()["breakers"]
+    yield ("ufd_circuit_breaker_open", "gauge", "1 while an extractor's breaker is failing calls fast",
+           [({"platform": b["platform"], "extractor": b["extractor"]}, int(b["state"] != "closed")) for b in breakers])
+    flights = service.in_flight.stats()
+    yield ("ufd_coalesced_requests_total", "counter", "Downloads that joined an identical in-flight download",
+           [({}, flights["coalesced"])])
+    prefetch = service.prefetcher.stats()
+    yield ("ufd_prefetches_total", "counter", "Speculative extractions by outcome", [
+        ({"outcome": outcome}, prefetch[outcome])
+        for outcome in ("started", "deduplicated", "dropped", "cancelled", "completed", "failed", "joined")
+    ])
+
+
+metrics.registry.register_collector(collect_service_metrics)
+
+
+@app.get(f"{settings.API_V1_STR}/metrics")
+async def metrics_endpoint():
+    return Response(metrics.registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -41,6 +41,34 @@ const config = {
       reddit: true
     }
   },
+  // Hostname fragments to platform, as in the popup's detectPlatform
+  platformMappings: {
+    "youtube.com": "youtube",
+    "youtu.be": "youtube",
+    "facebook.com": "facebook",
+    "fb.watch": "facebook",
+    "twitter.com": "twitter",
+    "x.com": "twitter",
+    "instagram.com": "instagram",
+    "tiktok.com": "tiktok",
+    "reddit.com": "reddit",
+  },
+  // /info answers kept for revalidation with If-None-Match
+  infoResponseCacheSize: 50,
+  // How often a background download job's status_url is polled
+  jobPollInterval: 1000,
+  prefetch: {
+    enabled: true,
+    // Only pages showing a single video; feeds and profiles would be wasted extractions
+    videoPagePatterns: {
+      youtube: /youtube\.com\/(watch\?|shorts\/)|youtu\.be\//,
+      facebook: /facebook\.com\/.*(\/videos\/|watch\/?\?v=|\/reel\/)|fb\.watch\//,
+      twitter: /\/status\/\d+/,
+      instagram: /instagram\.com\/(p|reel|tv)\//,
+      tiktok: /tiktok\.com\/@[^/]+\/video\//,
+      reddit: /reddit\.com\/r\/[^/]+\/comments\//,
+    },
+  },
   userAgents: {
     desktop: "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
     mobile: "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
@@ -60,6 +88,8 @@ const log = {
 const state = {
   ports: new Map(),
   currentDownload: null,
+  // Last /info answer per video and cookie set, with its ETag, oldest first
+  infoResponses: new Map(),
 };
 
 log.info("Background script initialized");
@@ -203,6 +233,86 @@ async function handleGetCurrentTab(port) {
   }
 }
 
+// Per-install id so the backend can tell our prefetches apart from other users'
+function getClientId() {
+  let clientId = localStorage.getItem('ufd_client_id');
+  if (!clientId) {
+    clientId = crypto.randomUUID();
+    localStorage.setItem('ufd_client_id', clientId);
+  }
+  return clientId;
+}
+
+function detectPlatform(url) {
+  try {
+    const hostname = new URL(url).hostname.toLowerCase();
+    for (const [domain, platform] of Object.entries(config.platformMappings)) {
+      if (hostname.includes(domain)) {
+        return platform;
+      }
+    }
+  } catch (error) {
+    // Not a URL we can parse (about:, chrome:, ...)
+  }
+  return null;
+}
+
+// Ask the backend to start extracting a video page as soon as it is opened,
+// so the popup's info request and the download don't wait for extraction.
+// Fire and forget: the backend drops prefetches it has no room for.
+async function prefetchVideoInfo(url) {
+  const platform = detectPlatform(url);
+  const pattern = platform && config.prefetch.videoPagePatterns[platform];
+  if (!pattern || !pattern.test(url)) {
+    return;
+  }
+
+  try {
+    // Same cookies as the info request, so both land on the same cache entry
+    const headers = {
+      "Content-Type": "application/json",
+      "X-UFD-Client": getClientId(),
+    };
+    const cookieHeader = await getPlatformCookies(platform);
+    if (cookieHeader) {
+      headers["Cookie"] = cookieHeader;
+    }
+
+    const response = await fetch(`${config.API_URL}/download/prefetch`, {
+      method: "POST",
+      headers,
+      body: JSON.stringify({ url, platform }),
+      credentials: 'omit'
+    });
+    if (response.ok) {
+      const result = await response.json();
+      log.debug(`Prefetch for ${platform}: ${result.status}`);
+    }
+  } catch (error) {
+    log.debug("Prefetch failed:", error);
+  }
+}
+
+if (config.prefetch.enabled) {
+  browser.tabs.onUpdated.addListener((tabId, changeInfo, tab) => {
+    // changeInfo.url covers in-page navigation on single-page sites like YouTube
+    if (tab.active && changeInfo.url) {
+      prefetchVideoInfo(changeInfo.url);
+    }
+  });
+
+  browser.tabs.onActivated.addListener(async ({ tabId }) => {
+    try {
+      const tab = await browser.tabs.get(tabId);
+      if (tab.url) {
+        prefetchVideoInfo(tab.url);
+      }
+    } catch (error) {
+      log.debug("Could not read activated tab:", error);
+    }
+  });
+}
+
 // Helper function to get cookies for a specific platform
 async function getPlatformCookies(platform) {
   try {
@@ -351,6 +461,24 @@ async function getAuthStatus(platform) {
   }
 }
 
+// Keep an /info answer that carries an ETag, honouring its Cache-Control max-age
+function rememberInfoResponse(key, response, videoInfo) {
+  state.infoResponses.delete(key);
+  const etag = response.headers.get("ETag");
+  if (!etag) {
+    return;
+  }
+  const maxAge = /max-age=(\d+)/.exec(response.headers.get("Cache-Control") || "");
+  state.infoResponses.set(key, {
+    etag,
+    videoInfo,
+    freshUntil: Date.now() + (maxAge ? Number(maxAge[1]) * 1000 : 0),
+  });
+  while (state.infoResponses.size > config.infoResponseCacheSize) {
+    state.infoResponses.delete(state.infoResponses.keys().next().value);
+  }
+}
+
 // Handler for getting video information
 async function handleGetVideoInfo(data, port) {
   try {
@@ -398,6 +526,21 @@ async function handleGetVideoInfo(data, port) {
       // Continue without cookies
     }
 
+    // A popup reopened on the same video reuses the earlier answer while the
+    // backend says it's fresh, and revalidates it with its ETag after that
+    const infoKey = `${data.platform}|${data.url}|${cookieHeader || ""}`;
+    const previous = state.infoResponses.get(infoKey);
+    if (previous && Date.now() < previous.freshUntil) {
+      log.info("Reusing video info from an earlier request");
+      if (port && state.ports.has(port.name)) {
+        port.postMessage({ type: "videoInfo", data: previous.videoInfo });
+      }
+      return;
+    }
+    if (previous) {
+      headers["If-None-Match"] = previous.etag;
+    }
+
     log.info(`Sending request to ${config.API_URL}/download/info`);
     log.debug(`Request headers: ${Object.keys(headers).join(', ')}`);
 
@@ -408,7 +551,8 @@ async function handleGetVideoInfo(data, port) {
       credentials: 'omit' // Don't send browser credentials automatically, we handle cookies manually
     });
 
-    if (!response.ok) {
+    const notModified = response.status === 304 && previous;
+    if (!response.ok && !notModified) {
       let errorMessage = `Server error: ${response.status}`;
       try {
         const errorData = await response.json();
@@ -450,8 +594,9 @@ async function handleGetVideoInfo(data, port) {
       throw new Error(errorMessage);
     }
 
-    const videoInfo = await response.json();
-    log.info("Video info received successfully");
+    const videoInfo = notModified ? previous.videoInfo : await response.json();
+    log.info(notModified ? "Video info not modified since the last request" : "Video info received successfully");
+    rememberInfoResponse(infoKey, response, videoInfo);
 
     if (port && state.ports.has(port.name)) {
       port.postMessage({
@@ -471,6 +616,58 @@ async function handleGetVideoInfo(data, port) {
   }
 }
 
+// Request headers downloads.download refuses (the whole call throws on any of them)
+const FORBIDDEN_DOWNLOAD_HEADERS = new Set([
+  "accept-charset", "accept-encoding", "access-control-request-headers", "access-control-request-method",
+  "connection", "content-length", "cookie", "cookie2", "date", "dnt", "expect", "host", "keep-alive",
+  "origin", "referer", "set-cookie", "te", "trailer", "transfer-encoding", "upgrade", "user-agent", "via",
+]);
+
+// Headers a direct media URL needs, in the form downloads.download takes
+function downloadHeaders(headers) {
+  const allowed = [];
+  for (const [name, value] of Object.entries(headers || {})) {
+    const lower = name.toLowerCase();
+    if (FORBIDDEN_DOWNLOAD_HEADERS.has(lower) || lower.startsWith("proxy-") || lower.startsWith("sec-")) {
+      // The browser sends its own; nothing we can do about these
+      log.debug(`Dropping header the download manager won't send: ${name}`);
+      continue;
+    }
+    allowed.push({ name, value: String(value) });
+  }
+  return allowed;
+}
+
+// Poll a background download job until it finishes, relaying its progress
+async function waitForJob(statusUrl, port) {
+  while (true) {
+    const response = await fetch(statusUrl, { credentials: 'omit' });
+    if (!response.ok) {
+      throw new Error(`Server error: ${response.status}`);
+    }
+    const job = await response.json();
+    // Each answer carries a freshly signed status_url, so long jobs outlive the first link
+    statusUrl = job.status_url || statusUrl;
+    if (job.state === "completed") {
+      return job;
+    }
+    if (job.state === "failed" || job.state === "cancelled") {
+      throw new Error(job.error || `Download ${job.state}`);
+    }
+
+    if (port && state.ports.has(port.name)) {
+      port.postMessage({
+        type: "downloadStatus",
+        data: {
+          status: job.state === "running" ? "progress" : "starting",
+          progress: Math.round(job.percent || 0),
+        },
+      });
+    }
+    await new Promise((resolve) => setTimeout(resolve, config.jobPollInterval));
+  }
+}
+
 // Handler for downloading video
 async function handleDownloadVideo(data, port) {
   try {
@@ -536,7 +733,10 @@ async function handleDownloadVideo(data, port) {
     const response = await fetch(`${config.API_URL}/download/start`, {
       method: "POST",
       headers,
-      body: JSON.stringify(data),
+      // Ask for a URL to hand to the download manager: the media URL itself when
+      // the browser can fetch it from the CDN, otherwise a signed, expiring link
+      // to the backend's download, which streams to disk and can be resumed
+      body: JSON.stringify({ ...data, delivery: "link" }),
       credentials: 'omit' // Don't send browser credentials automatically, we handle cookies manually
     });
 
@@ -575,6 +775,43 @@ async function handleDownloadVideo(data, port) {
       throw new Error(errorMessage);
     }
 
+    if ((response.headers.get("content-type") || "").includes("application/json")) {
+      const link = await response.json();
+      if (link.mode === "direct" || link.mode === "link") {
+        let url = link.url;
+        if (link.status_url) {
+          // The signed job link only serves the file once the job is done
+          const job = await waitForJob(link.status_url, port);
+          url = job.download_url || url;
+        }
+        // Signed backend links name the file through Content-Disposition
+        const options = { url, saveAs: true };
+        if (link.filename) {
+          options.filename = link.filename.replace(/[/\\?%*:|"<>]/g, '-');
+        }
+        // Direct media URLs can depend on the headers yt-dlp would have sent
+        const extraHeaders = downloadHeaders(link.headers);
+        if (extraHeaders.length) {
+          options.headers = extraHeaders;
+        }
+        log.info(`Handing ${link.mode} download URL to the download manager`);
+        const downloadId = await browser.downloads.download(options);
+        log.info(`Download started with ID: ${downloadId}`);
+
+        if (port && state.ports.has(port.name)) {
+          port.postMessage({
+            type: "downloadStatus",
+            data: {
+              status: "completed",
+              progress: 100,
+              filename: options.filename,
+            },
+          });
+        }
+        return;
+      }
+    }
+
     // Get filename from Content-Disposition header
     const contentDisposition = response.headers.get("content-disposition");
     let filename = "download.mp4";